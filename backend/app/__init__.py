@@ -5,6 +5,17 @@ from .extensions import db, cors # تم التعديل: استيراد db و cor
 from .routes import register_routes # تم التعديل: استيراد دالة تسجيل المسارات
 from .errors.handlers import register_error_handlers # تم التعديل: استيراد دالة تسجيل معالجات الأخطاء
 from .auth.oauth import configure_oauth   # تم التعديل: استيراد دالة تهيئة OAuth من ملفها الجديد
+from .cli import register_commands # أوامر flask (مثل إعادة بناء جدول المبيعات اليومية)
+from .auth.session_cache import init_session_cache
+from .auth.session_touch import init_session_touch_buffer
+from .utils.delivery_index import init_delivery_index
+from .utils.menu_cache import init_menu_cache
+from .utils.email_outbox import init_email_outbox
+from .utils.image_uploads import init_upload_pool
+from .utils.image_variants import init_image_variants
+from .utils.restaurant_purge import init_restaurant_purge
+from .utils.json_provider import FastJSONProvider
+from .utils.db_routing import init_replica_routing
 import os
 import cloudinary
 
@@ -16,6 +27,7 @@ def create_app():
     app = Flask(__name__)
     app.config.from_object('app.config.Config')
     app.secret_key = app.config.get("SECRET_KEY") # استخدام SECRET_KEY من Config
+    app.json = FastJSONProvider(app) # ترميز JSON عبر orjson مباشرة إلى بايت
 
     # --- جديد: تهيئة Cloudinary ---
     cloudinary.config(
@@ -31,6 +43,16 @@ def create_app():
     register_routes(app) # تسجيل جميع مسارات الـ API (بما في ذلك المصادقة)
     register_error_handlers(app) # تسجيل معالجات الأخطاء
     configure_oauth(app) # تهيئة مصادقة OAuth
+    init_replica_routing(app) # تهيئة توجيه القراءات إلى نسخة القراءة
+    init_session_cache(app) # تهيئة ذاكرة الجلسات المؤقتة
+    init_session_touch_buffer(app) # تهيئة الكتابة المؤجلة لآخر استخدام للجلسات
+    init_delivery_index(app) # تهيئة فهرس مناطق التوصيل في الذاكرة
+    init_menu_cache(app) # تهيئة ذاكرة القوائم المؤقتة
+    init_email_outbox(app) # تهيئة عمال إرسال البريد في الخلفية
+    init_upload_pool(app) # تهيئة مجمع رفع الصور في الخلفية
+    init_image_variants(app) # تهيئة عمليات توليد النسخ المصغرة للصور
+    init_restaurant_purge(app) # تهيئة عامل الحذف النهائي للمطاعم في الخلفية
+    register_commands(app) # تسجيل أوامر CLI
 
     app.config['UPLOAD_FOLDER'] = os.path.join(app.root_path, 'static', 'uploads')
     # إنشاء مجلد الرفع إن لم يكن موجوداً
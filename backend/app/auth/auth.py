@@ -3,6 +3,9 @@ from functools import wraps
 import jwt
 from app.models import User, Session
 from app.extensions import db
+from app.auth.session_cache import session_cache, SessionEntry, broadcast_session_revocation
+from app.auth.session_touch import session_touch_buffer
+from app.utils.pg_listener import pg_listener
 from datetime import datetime, timezone
 
 class AuthError(Exception):
@@ -26,6 +29,57 @@ def get_token_auth_header():
    token = parts[1]
    return token
 
+def get_session_entry(session_id):
+   """
+   يُرجع حالة الجلسة من الذاكرة المؤقتة للعامل إن وُجدت، وإلا يقرأها من قاعدة البيانات ويخزنها.
+   """
+   if not session_cache.enabled:
+       session_obj = Session.query.get(session_id)
+       return session_entry_from_model(session_obj) if session_obj else None
+
+   pg_listener.ensure_started(db.engine)
+   entry = session_cache.get(session_id)
+   if entry is not None:
+       return entry
+
+   generation = session_cache.generation
+   session_obj = Session.query.get(session_id)
+   if not session_obj:
+       return None
+   entry = session_entry_from_model(session_obj)
+   session_cache.put(session_id, entry, generation)
+   return entry
+
+def session_entry_from_model(session_obj):
+   return SessionEntry(
+       user_id=session_obj.user_id,
+       session_version=session_obj.session_version,
+       expires_at=session_obj.expires_at,
+       revoked=session_obj.revoked
+   )
+
+def touch_session(session_id, now):
+   """
+   تسجيل آخر استخدام للجلسة. افتراضياً تُجمع اللمسات في الذاكرة وتُكتب دفعة واحدة بشكل دوري.
+   """
+   if not session_touch_buffer.enabled:
+       Session.query.filter_by(id=session_id).update({'last_used_at': now}, synchronize_session=False)
+       db.session.commit()
+       return
+   session_touch_buffer.ensure_started(db.engine, Session.__table__)
+   session_touch_buffer.touch(session_id, now)
+
+def invalidate_user_permissions(user_id):
+   """
+   يرفع إصدار جميع جلسات المستخدم بعد تغيير دوره، ويبث الإبطال لجميع العمال.
+   التوكنات الحالية تُرفض بـ permissions_changed ويحصل العميل على توكن جديد عبر refresh.
+   يجب استدعاؤها قبل db.session.commit() في نفس المعاملة.
+   """
+   Session.query.filter_by(user_id=user_id, revoked=False).update(
+       {Session.session_version: Session.session_version + 1}, synchronize_session=False
+   )
+   broadcast_session_revocation(db.session, user_id=user_id)
+
 def requires_auth(allowed_roles=None):
    if allowed_roles is None:
        allowed_roles = []
@@ -47,15 +101,15 @@ def requires_auth(allowed_roles=None):
                if user_role not in allowed_roles:
                    raise AuthError({'code': 'unauthorized', 'description': 'Permission not found.'}, 403)
                
-               session_obj = Session.query.get(session_id)
-               if not session_obj or session_obj.revoked or session_obj.expires_at < datetime.now(timezone.utc):
+               session_entry = get_session_entry(session_id)
+               now = datetime.now(timezone.utc)
+               if not session_entry or session_entry.revoked or session_entry.expires_at < now:
                    raise AuthError({'code': 'invalid_session', 'description': 'Session is invalid or has been revoked.'}, 401)
                
-               if session_obj.session_version != token_session_version:
+               if session_entry.session_version != token_session_version:
                    raise AuthError({'code': 'permissions_changed', 'description': 'User permissions have changed. Please log in again.'}, 401)
 
-               session_obj.last_used_at = datetime.now(timezone.utc)
-               db.session.commit()
+               touch_session(session_id, now)
 
                return f(payload, *args, **kwargs)
            # --- تم التعديل هنا ---
@@ -0,0 +1,126 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from app.utils.pg_listener import pg_listener, notify
+
+# القناة التي تُبث عليها إبطالات الجلسات بين عمال gunicorn عبر LISTEN/NOTIFY
+REVOCATION_CHANNEL = 'session_revocations'
+
+SessionEntry = namedtuple('SessionEntry', ['user_id', 'session_version', 'expires_at', 'revoked'])
+
+
+class SessionCache:
+    """
+    Bounded LRU cache of validated sessions, local to one worker process.
+    Entries expire after ttl seconds, which bounds staleness even if a revocation
+    broadcast is missed. Revocations from any worker arrive over Postgres
+    LISTEN/NOTIFY and are applied by the shared pg_listener thread.
+    """
+
+    def __init__(self, max_entries=10000, ttl_seconds=30):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = True
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # يزداد مع كل إبطال؛ يمنع تخزين نتيجة قُرئت من قاعدة البيانات قبل إبطال وصل أثناء القراءة
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def configure(self, max_entries, ttl_seconds, enabled=True):
+        with self._lock:
+            self.max_entries = max_entries
+            self.ttl_seconds = ttl_seconds
+            self.enabled = enabled
+            self._entries.clear()
+
+    def get(self, session_id):
+        now = time.monotonic()
+        with self._lock:
+            item = self._entries.get(session_id)
+            if item is None or now - item[1] > self.ttl_seconds:
+                if item is not None:
+                    del self._entries[session_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(session_id)
+            self.hits += 1
+            return item[0]
+
+    def put(self, session_id, entry, generation):
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[session_id] = (entry, time.monotonic())
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, session_ids=None, user_id=None):
+        with self._lock:
+            self.generation += 1
+            if session_ids:
+                for session_id in session_ids:
+                    if self._entries.pop(session_id, None) is not None:
+                        self.invalidations += 1
+            if user_id is not None:
+                stale = [sid for sid, (entry, _) in self._entries.items() if entry.user_id == user_id]
+                for session_id in stale:
+                    del self._entries[session_id]
+                self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'listener_connected': pg_listener.connected
+            }
+
+    def apply_notification(self, data):
+        self.invalidate(session_ids=data.get('sessions'), user_id=data.get('user_id'))
+
+
+session_cache = SessionCache()
+# عند انقطاع الاستماع ربما فاتتنا إشعارات، لذلك نُفرغ الذاكرة المؤقتة بالكامل
+pg_listener.subscribe(REVOCATION_CHANNEL, session_cache.apply_notification, on_reset=session_cache.clear)
+
+
+def init_session_cache(app):
+    """Applies the SESSION_CACHE_* settings to the process-wide cache."""
+    session_cache.configure(
+        app.config['SESSION_CACHE_MAX_ENTRIES'],
+        app.config['SESSION_CACHE_TTL_SECONDS'],
+        app.config['SESSION_CACHE_ENABLED']
+    )
+
+
+def broadcast_session_revocation(db_session, session_ids=None, user_id=None):
+    """
+    Invalidates cached sessions in this worker and queues a NOTIFY for all others.
+    pg_notify is transactional: other workers receive it only when the caller commits.
+    """
+    session_cache.invalidate(session_ids=session_ids, user_id=user_id)
+    payload = {}
+    if session_ids:
+        payload['sessions'] = list(session_ids)
+    if user_id is not None:
+        payload['user_id'] = user_id
+    notify(db_session, REVOCATION_CHANNEL, payload)
@@ -0,0 +1,124 @@
+import atexit
+import os
+import threading
+import time
+from datetime import timedelta
+from sqlalchemy import update, values, column, or_, String, TIMESTAMP
+
+# أقصى عدد صفوف في عبارة UPDATE واحدة عند التفريغ
+FLUSH_BATCH_SIZE = 1000
+
+
+class SessionTouchBuffer:
+    """
+    Write-behind buffer for Session.last_used_at.
+    requires_auth records touches in memory; a background thread flushes them
+    every flush_interval seconds in one UPDATE ... FROM (VALUES ...) per batch.
+    Rows whose stored value is less than staleness seconds old are skipped by
+    the WHERE clause, so busy sessions are not rewritten on every flush.
+    """
+
+    def __init__(self, flush_interval=10, staleness=60):
+        self.flush_interval = flush_interval
+        self.staleness = staleness
+        self.enabled = True
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._engine = None
+        self._table = None
+        self._worker_pid = None
+        self.flushes = 0
+        self.rows_written = 0
+
+    def configure(self, flush_interval, staleness, enabled=True):
+        self.flush_interval = flush_interval
+        self.staleness = staleness
+        self.enabled = enabled
+
+    def touch(self, session_id, timestamp):
+        with self._lock:
+            previous = self._pending.get(session_id)
+            if previous is None or timestamp > previous:
+                self._pending[session_id] = timestamp
+
+    def ensure_started(self, engine, table):
+        """Starts the flush thread once per worker process (after gunicorn forks)."""
+        pid = os.getpid()
+        if self._worker_pid == pid:
+            return
+        with self._lock:
+            if self._worker_pid == pid:
+                return
+            self._worker_pid = pid
+            self._engine = engine
+            self._table = table
+            # لمسات موروثة من العملية الأم قبل fork تُكتب من الأم وليس هنا
+            self._pending = {}
+        threading.Thread(target=self._run, name='session-touch-flusher', daemon=True).start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Session last_used_at flush failed: {e}")
+
+    def flush(self):
+        """Writes all buffered touches. Safe to call from any thread and at shutdown."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending or self._engine is None:
+            return
+
+        table = self._table
+        rows = list(pending.items())
+        try:
+            with self._engine.begin() as connection:
+                for start in range(0, len(rows), FLUSH_BATCH_SIZE):
+                    batch = values(
+                        column('id', String), column('ts', TIMESTAMP(timezone=True)), name='touched'
+                    ).data(rows[start:start + FLUSH_BATCH_SIZE])
+                    result = connection.execute(
+                        update(table)
+                        .where(
+                            table.c.id == batch.c.id,
+                            or_(
+                                table.c.last_used_at.is_(None),
+                                table.c.last_used_at < batch.c.ts - timedelta(seconds=self.staleness)
+                            )
+                        )
+                        .values(last_used_at=batch.c.ts)
+                    )
+                    self.rows_written += result.rowcount
+            self.flushes += 1
+        except Exception:
+            # إعادة اللمسات إلى المخزن لمحاولة لاحقة دون الكتابة فوق لمسات أحدث
+            for session_id, timestamp in rows:
+                self.touch(session_id, timestamp)
+            raise
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'enabled': self.enabled,
+            'pending': pending,
+            'flush_interval_seconds': self.flush_interval,
+            'staleness_seconds': self.staleness,
+            'flushes': self.flushes,
+            'rows_written': self.rows_written
+        }
+
+
+session_touch_buffer = SessionTouchBuffer()
+
+
+def init_session_touch_buffer(app):
+    """Applies the SESSION_TOUCH_* settings to the process-wide buffer."""
+    session_touch_buffer.configure(
+        app.config['SESSION_TOUCH_FLUSH_SECONDS'],
+        app.config['SESSION_TOUCH_STALENESS_SECONDS'],
+        app.config['SESSION_TOUCH_BUFFER_ENABLED']
+    )
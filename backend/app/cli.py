@@ -0,0 +1,96 @@
+import time
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from app.extensions import db
+from app.models import Restaurant, RestaurantPurge
+from app.utils.sales_rollup import rebuild_daily_sales
+from app.utils.email_outbox import email_outbox_pool, outbox_status_counts
+from app.utils.restaurant_purge import restaurant_purge_worker, retry_restaurant_purge
+
+sales_rollup_cli = AppGroup('sales-rollup', help='إدارة جدول التجميع اليومي للمبيعات.')
+
+
+@sales_rollup_cli.command('rebuild')
+@click.option('--restaurant-id', type=int, default=None, help='إعادة البناء لمطعم واحد فقط.')
+def rebuild_sales_rollup(restaurant_id):
+    """إعادة بناء restaurant_daily_sales من جدول الطلبات (تُستخدم أيضاً للتعبئة الأولية)."""
+    if restaurant_id is not None and not Restaurant.query.get(restaurant_id):
+        raise click.ClickException(f"Restaurant {restaurant_id} not found")
+
+    rows = rebuild_daily_sales(current_app.config['RESTAURANT_TIMEZONE'], restaurant_id)
+    click.echo(f"✅ Rebuilt restaurant_daily_sales: {rows} daily rows written.")
+
+
+email_outbox_cli = AppGroup('email-outbox', help='إدارة صندوق البريد الصادر.')
+
+
+@email_outbox_cli.command('work')
+@click.option('--workers', type=int, default=None, help='عدد خيوط الإرسال (الافتراضي EMAIL_OUTBOX_WORKERS).')
+def run_email_outbox_workers(workers):
+    """تشغيل عمال الإرسال كعملية مستقلة (عند EMAIL_OUTBOX_WORKERS=0 في خوادم الويب)."""
+    email_outbox_pool.workers = workers or current_app.config['EMAIL_OUTBOX_WORKERS'] or 1
+    email_outbox_pool.ensure_started(db.engine)
+    click.echo(f"📬 Email outbox: {email_outbox_pool.workers} workers running. Press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        pass
+
+
+@email_outbox_cli.command('status')
+def email_outbox_status():
+    """عرض عدد الرسائل حسب الحالة."""
+    counts = outbox_status_counts()
+    for status in ['pending', 'sending', 'sent', 'failed']:
+        click.echo(f"{status:<8} {counts.get(status, 0)}")
+
+
+restaurant_purge_cli = AppGroup('restaurant-purge', help='إدارة مهام الحذف النهائي للمطاعم.')
+
+
+@restaurant_purge_cli.command('work')
+def run_restaurant_purge_worker():
+    """تشغيل عامل الحذف كعملية مستقلة (عند RESTAURANT_PURGE_WORKERS=0 في خوادم الويب)."""
+    restaurant_purge_worker.workers = current_app.config['RESTAURANT_PURGE_WORKERS'] or 1
+    restaurant_purge_worker.ensure_started(db.engine)
+    click.echo("🧹 Restaurant purge worker running. Press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        pass
+
+
+@restaurant_purge_cli.command('status')
+def restaurant_purge_status():
+    """عرض مهام الحذف غير المكتملة ومرحلة كل منها."""
+    purges = RestaurantPurge.query.filter(RestaurantPurge.status != 'done').order_by(RestaurantPurge.id).all()
+    if not purges:
+        click.echo("No unfinished purges.")
+    for purge in purges:
+        click.echo(f"#{purge.id} restaurant {purge.restaurant_id} {purge.status:<8} {purge.phase:<14} deleted={purge.deleted}")
+
+
+@restaurant_purge_cli.command('retry')
+@click.argument('purge_id', type=int)
+def retry_failed_restaurant_purge(purge_id):
+    """إعادة جدولة مهمة حذف فشلت بعد استنفاد محاولاتها."""
+    purge = RestaurantPurge.query.get(purge_id)
+    if not purge:
+        raise click.ClickException(f"Purge {purge_id} not found")
+    if purge.status != 'failed':
+        raise click.ClickException(f"Purge {purge_id} is {purge.status}, only failed purges can be retried")
+    retry_restaurant_purge(purge)
+    db.session.commit()
+    click.echo(f"🔁 Purge #{purge.id} requeued from phase {purge.phase}.")
+
+
+def register_commands(app):
+    """
+    تسجيل أوامر flask الخاصة بالتطبيق.
+    """
+    app.cli.add_command(sales_rollup_cli)
+    app.cli.add_command(email_outbox_cli)
+    app.cli.add_command(restaurant_purge_cli)
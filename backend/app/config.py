@@ -7,13 +7,81 @@ class Config:
     # URI اتصال قاعدة البيانات PostgreSQL
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")  # يجب أن يحتوي .env على رابط البوستغرس
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # نسخة قراءة اختيارية (replication متدفق): المسارات المعلّمة بـ read_only تقرأ منها،
+    # وتعود إلى الخادم الرئيسي إذا تجاوز تأخرها REPLICA_MAX_LAG_SECONDS (يُقاس كل REPLICA_LAG_CHECK_SECONDS)
+    REPLICA_DATABASE_URL = os.getenv("REPLICA_DATABASE_URL")
+    SQLALCHEMY_BINDS = {'replica': REPLICA_DATABASE_URL} if REPLICA_DATABASE_URL else {}
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", 5))
+    REPLICA_LAG_CHECK_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", 2))
     
     # إعدادات Flask-JWT-Extended
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
     SECRET_KEY = os.getenv("SECRET_KEY") 
 
+    # ذاكرة مؤقتة للجلسات داخل كل عامل؛ الإبطالات تُبث عبر LISTEN/NOTIFY ومدة الصلاحية حدٌّ أعلى للتأخير
+    SESSION_CACHE_ENABLED = os.getenv("SESSION_CACHE_ENABLED", "True").lower() == 'true'
+    SESSION_CACHE_MAX_ENTRIES = int(os.getenv("SESSION_CACHE_MAX_ENTRIES", 10000))
+    SESSION_CACHE_TTL_SECONDS = int(os.getenv("SESSION_CACHE_TTL_SECONDS", 30))
+
+    # كتابة مؤجلة لـ Session.last_used_at: فترة التفريغ، والحد الأدنى لعمر القيمة المخزنة قبل إعادة كتابتها
+    SESSION_TOUCH_BUFFER_ENABLED = os.getenv("SESSION_TOUCH_BUFFER_ENABLED", "True").lower() == 'true'
+    SESSION_TOUCH_FLUSH_SECONDS = int(os.getenv("SESSION_TOUCH_FLUSH_SECONDS", 10))
+    SESSION_TOUCH_STALENESS_SECONDS = int(os.getenv("SESSION_TOUCH_STALENESS_SECONDS", 60))
+
+    # فهرس مكاني في ذاكرة كل عامل لمناطق التوصيل بدلاً من استعلام PostGIS لكل طلب
+    DELIVERY_INDEX_ENABLED = os.getenv("DELIVERY_INDEX_ENABLED", "False").lower() == 'true'
+
+    # عدد المنازل العشرية للإحداثيات و GeoJSON التي تحسبها PostGIS في الاستجابات، ودرجة تبسيط مناطق التوصيل
+    # في قوائم المطاعم بالأمتار (ST_SimplifyPreserveTopology؛ 0 = بلا تبسيط)
+    GEOMETRY_PRECISION = int(os.getenv("GEOMETRY_PRECISION", 6))
+    DELIVERY_AREA_LIST_SIMPLIFY_METRES = float(os.getenv("DELIVERY_AREA_LIST_SIMPLIFY_METRES", 10))
+
+    # إخراج JSON مطابق بايتاً بايتاً للترميز القديم (مفاتيح مرتبة وحروف غير ASCII مهربة) بدلاً من orjson
+    JSON_COMPAT_OUTPUT = os.getenv("JSON_COMPAT_OUTPUT", "False").lower() == 'true'
+
+    # مدة تخزين استجابات الكتالوج العامة (المطاعم والقوائم) لدى العملاء والوكلاء قبل إعادة التحقق عبر ETag
+    CATALOG_MAX_AGE_SECONDS = int(os.getenv("CATALOG_MAX_AGE_SECONDS", 60))
+
+    # ذاكرة مؤقتة للقوائم المسلسلة داخل كل عامل، مفتاحها (restaurant_id, menu_version) وحجمها محدود بالبايت
+    MENU_CACHE_ENABLED = os.getenv("MENU_CACHE_ENABLED", "True").lower() == 'true'
+    MENU_CACHE_MAX_BYTES = int(os.getenv("MENU_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+
+    # صندوق البريد الصادر: عدد عمال الإرسال في كل عملية (0 = تشغيل flask email-outbox work بشكل منفصل)،
+    # حجم الدفعة، فترة الاستطلاع، وعدد المحاولات مع تأخير أُسّي بين المحاولات
+    EMAIL_OUTBOX_WORKERS = int(os.getenv("EMAIL_OUTBOX_WORKERS", 2))
+    EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", 20))
+    EMAIL_OUTBOX_POLL_SECONDS = int(os.getenv("EMAIL_OUTBOX_POLL_SECONDS", 5))
+    EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", 8))
+    EMAIL_OUTBOX_BACKOFF_SECONDS = int(os.getenv("EMAIL_OUTBOX_BACKOFF_SECONDS", 30))
+    EMAIL_OUTBOX_BACKOFF_MAX_SECONDS = int(os.getenv("EMAIL_OUTBOX_BACKOFF_MAX_SECONDS", 3600))
+
     # إعدادات رفع الملفات
+    # رفع الصور في الخلفية: عدد الخيوط، أقصى عدد رفعات معلقة في كل عملية، وحجم الملف الذي يبقى في الذاكرة قبل نقله إلى القرص
+    UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", 4))
+    UPLOAD_QUEUE_SIZE = int(os.getenv("UPLOAD_QUEUE_SIZE", 32))
+    UPLOAD_SPOOL_MEMORY_BYTES = int(os.getenv("UPLOAD_SPOOL_MEMORY_BYTES", 1024 * 1024))
+    # مهمة رفع بقيت pending/running أطول من هذا (بالثواني) فقدت ملفها بتوقف العملية، فتُعلَّم فاشلة
+    UPLOAD_JOB_TIMEOUT_SECONDS = int(os.getenv("UPLOAD_JOB_TIMEOUT_SECONDS", 900))
+    IMAGE_UPLOADER = os.getenv("IMAGE_UPLOADER", "cloudinary") # 'cloudinary' أو 'fake' للاختبار
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+    # النسخ المصغرة (thumbnail/card/full بصيغتي WebP وJPEG) للصور المحفوظة محلياً: تُولَّد في عمليات منفصلة
+    IMAGE_VARIANTS_ENABLED = os.getenv("IMAGE_VARIANTS_ENABLED", "True").lower() == 'true'
+    IMAGE_VARIANT_PROCESSES = int(os.getenv("IMAGE_VARIANT_PROCESSES", 2))
+
+    # الحذف النهائي للمطاعم في الخلفية: عدد الخيوط في كل عملية (0 = عبر flask restaurant-purge work)، حجم الدفعة، فترة الاستطلاع، وأقصى عدد محاولات
+    RESTAURANT_PURGE_WORKERS = int(os.getenv("RESTAURANT_PURGE_WORKERS", 1))
+    RESTAURANT_PURGE_BATCH_SIZE = int(os.getenv("RESTAURANT_PURGE_BATCH_SIZE", 500))
+    RESTAURANT_PURGE_POLL_SECONDS = int(os.getenv("RESTAURANT_PURGE_POLL_SECONDS", 30))
+    RESTAURANT_PURGE_MAX_ATTEMPTS = int(os.getenv("RESTAURANT_PURGE_MAX_ATTEMPTS", 5))
+
+    # مزامنة طلبات بوابة المطعم: هامش التداخل (بالثواني) لالتقاط المعاملات التي تُثبَّت متأخرة
+    PORTAL_SYNC_OVERLAP_SECONDS = int(os.getenv("PORTAL_SYNC_OVERLAP_SECONDS", 5))
+
+    # إحصائيات البوابة: المنطقة الزمنية للمطاعم، أقصى مدى بالأيام، وأقصى عدد نقاط في الرسم البياني
+    RESTAURANT_TIMEZONE = os.getenv("RESTAURANT_TIMEZONE", "Asia/Riyadh")
+    STATISTICS_MAX_RANGE_DAYS = int(os.getenv("STATISTICS_MAX_RANGE_DAYS", 1096))
+    STATISTICS_MAX_BUCKETS = int(os.getenv("STATISTICS_MAX_BUCKETS", 92))
 
     # Cloudinary Credentials
     CLOUDINARY_CLOUD_NAME = os.getenv("CLOUDINARY_CLOUD_NAME")
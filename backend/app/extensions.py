@@ -1,5 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
+from app.utils.db_routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession}) # يوجه قراءات المسارات المعلّمة بـ read_only إلى نسخة القراءة
 cors = CORS()
\ No newline at end of file
@@ -8,4 +8,8 @@ from .order import Order
 from .order_item import OrderItem
 from .rating import Rating
 from .payment import Payment
-from .session import Session
\ No newline at end of file
+from .session import Session
+from .restaurant_daily_sales import RestaurantDailySales
+from .email_outbox import EmailOutbox
+from .upload_job import UploadJob
+from .restaurant_purge import RestaurantPurge
@@ -0,0 +1,25 @@
+from app.extensions import db
+from sqlalchemy.sql import func
+
+# رسائل البريد الصادرة؛ تكتبها الطلبات ضمن معاملتها وترسلها عمال الخلفية لاحقاً
+class EmailOutbox(db.Model):
+    __tablename__ = 'email_outbox'
+    id = db.Column(db.BigInteger, primary_key=True)
+    to_email = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending', server_default='pending') # 'pending', 'sending', 'sent', 'failed'
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # موعد المحاولة التالية، أو نهاية مهلة الحجز أثناء الإرسال
+    next_attempt_at = db.Column(db.TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.TIMESTAMP(timezone=True), server_default=func.now())
+    sent_at = db.Column(db.TIMESTAMP(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # يدعم استعلام الحجز: الرسائل المستحقة التي لم تُرسل بعد
+        db.Index('idx_email_outbox_due', 'next_attempt_at', postgresql_where=db.text("status IN ('pending', 'sending')")),
+    )
+
+    def __repr__(self):
+        return f'<EmailOutbox {self.id} to {self.to_email}: {self.status}>'
@@ -1,12 +1,14 @@
 from app.extensions import db
 from sqlalchemy.sql import func
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import deferred
+from app.utils.search import MENU_ITEM_SEARCH_VECTOR_SQL
 
 
 class MenuItem(db.Model):
    __tablename__ = 'menu_items'
    id = db.Column(db.Integer, primary_key=True)
-   restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurants.id'), nullable=False)
+   restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurants.id'), nullable=False, index=True)
    name = db.Column(db.String(100), nullable=False)
    description = db.Column(db.Text, nullable=True)
    removable_ingredients = db.Column(JSONB, nullable=True) # e.g., ["بصل", "مخلل"]
@@ -14,9 +16,15 @@ class MenuItem(db.Model):
    is_available = db.Column(db.Boolean, default=True)
    created_at = db.Column(db.TIMESTAMP(timezone=True), server_default=func.now())
    updated_at = db.Column(db.TIMESTAMP(timezone=True), onupdate=func.now())
+   # متجه البحث النصي (الاسم والوصف بعد توحيد الحروف العربية)؛ تولده قاعدة البيانات
+   search_vector = deferred(db.Column(TSVECTOR, db.Computed(MENU_ITEM_SEARCH_VECTOR_SQL, persisted=True)))
 
    # جديد: علاقة مع صور المنتج
    images = db.relationship('MenuItemImage', backref='menu_item', lazy=True, cascade="all, delete-orphan")
 
+   __table_args__ = (
+       db.Index('idx_menu_items_search_vector', 'search_vector', postgresql_using='gin'),
+   )
+
    def __repr__(self):
        return f'<MenuItem {self.name} from {self.restaurant_id}>'
\ No newline at end of file
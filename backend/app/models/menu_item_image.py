@@ -1,10 +1,13 @@
 from app.extensions import db
+from sqlalchemy.dialects.postgresql import JSONB
 
 class MenuItemImage(db.Model):
     __tablename__ = 'menu_item_images'
     id = db.Column(db.Integer, primary_key=True)
-    menu_item_id = db.Column(db.Integer, db.ForeignKey('menu_items.id'), nullable=False)
+    menu_item_id = db.Column(db.Integer, db.ForeignKey('menu_items.id'), nullable=False, index=True)
     image_url = db.Column(db.String(255), nullable=False)
+    # النسخ المشتقة: {"thumbnail": {"width", "height", "webp", "jpeg"}, ...}؛ فارغة حتى ينتهي التوليد أو للصور المرفوعة إلى Cloudinary
+    variants = db.Column(JSONB, nullable=True)
 
     def __repr__(self):
         return f'<Image for MenuItem {self.menu_item_id}>'
\ No newline at end of file
@@ -1,6 +1,7 @@
 from app.extensions import db
 from geoalchemy2 import Geometry
 from sqlalchemy.sql import func
+from sqlalchemy.orm import query_expression
 
 class Order(db.Model):
     __tablename__ = 'orders'
@@ -13,10 +14,21 @@ class Order(db.Model):
     delivery_location = db.Column(Geometry(geometry_type='POINT', srid=4326), nullable=False)
     created_at = db.Column(db.TIMESTAMP(timezone=True), server_default=func.now())
     updated_at = db.Column(db.TIMESTAMP(timezone=True), onupdate=func.now())
+    # إحداثيات التوصيل محسوبة في PostGIS عبر order_geometry_options؛ None إن لم تُطلب
+    delivery_latitude = query_expression()
+    delivery_longitude = query_expression()
 
     order_items = db.relationship('OrderItem', backref='order', lazy=True)
     payment = db.relationship('Payment', backref='order', uselist=False, lazy=True)
     rating = db.relationship('Rating', backref='order', uselist=False, lazy=True)
 
+    __table_args__ = (
+        # فهرس يدعم مزامنة طلبات البوابة حسب وقت آخر تغيير
+        db.Index('idx_orders_restaurant_changed_at', 'restaurant_id', func.coalesce(updated_at, created_at)),
+        # فهارس الترقيم بالمؤشر على (created_at, id) لسجل طلبات العميل والمطعم
+        db.Index('idx_orders_user_created_at_id', 'user_id', 'created_at', 'id'),
+        db.Index('idx_orders_restaurant_created_at_id', 'restaurant_id', 'created_at', 'id'),
+    )
+
     def __repr__(self):
         return f'<Order {self.id} Status: {self.status}>'
@@ -5,8 +5,8 @@ from sqlalchemy.dialects.postgresql import JSONB
 class OrderItem(db.Model):
     __tablename__ = 'order_items'
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
-    menu_item_id = db.Column(db.Integer, db.ForeignKey('menu_items.id'), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False, index=True)
+    menu_item_id = db.Column(db.Integer, db.ForeignKey('menu_items.id'), nullable=False, index=True)
     quantity = db.Column(db.Integer, nullable=False)
     price_at_order = db.Column(db.Numeric(10, 2), nullable=False)
     excluded_ingredients = db.Column(JSONB, nullable=True) # المكونات التي أزالها المستخدم
@@ -1,6 +1,9 @@
 from app.extensions import db
 from geoalchemy2 import Geometry
 from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, query_expression
+from app.utils.search import RESTAURANT_SEARCH_VECTOR_SQL
 
 class Restaurant(db.Model):
    __tablename__ = 'restaurants'
@@ -12,12 +15,29 @@ class Restaurant(db.Model):
    location = db.Column(Geometry(geometry_type='POINT', srid=4326), nullable=False)
    delivery_area = db.Column(Geometry(geometry_type='POLYGON', srid=4326), nullable=True)
    manager_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-   status = db.Column(db.String(50), nullable=False, default='active') # 'active', 'suspended'
+   status = db.Column(db.String(50), nullable=False, default='active') # 'active', 'suspended', 'deleting'
    created_at = db.Column(db.TIMESTAMP(timezone=True), server_default=func.now())
    updated_at = db.Column(db.TIMESTAMP(timezone=True), onupdate=func.now())
+   # يزداد مع كل تغيير في بيانات المطعم أو قائمته؛ أساس ETag لواجهات الكتالوج العامة
+   content_version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+   # يزداد فقط مع تغييرات القائمة (العناصر والصور)؛ مفتاح ذاكرة القوائم المؤقتة و ETag القائمة
+   menu_version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+   # متجه البحث النصي (الاسم، الوصف، العنوان بعد توحيد الحروف العربية)؛ تولده قاعدة البيانات ولا يُحمَّل إلا عند طلبه
+   search_vector = deferred(db.Column(TSVECTOR, db.Computed(RESTAURANT_SEARCH_VECTOR_SQL, persisted=True)))
+
+   # قيم تحسبها PostGIS عند طلبها عبر restaurant_geometry_options؛ None إن لم تُطلب
+   location_latitude = query_expression()
+   location_longitude = query_expression()
+   delivery_area_geojson = query_expression()
 
    menu_items = db.relationship('MenuItem', backref='restaurant', lazy=True, cascade="all, delete-orphan")
    orders = db.relationship('Order', backref='restaurant_obj', lazy=True, cascade="all, delete-orphan")
 
+   __table_args__ = (
+       db.Index('idx_restaurants_search_vector', 'search_vector', postgresql_using='gin'),
+       # فهرس KNN بالمسافة الحقيقية بالأمتار (<-> و ST_DWithin على geography)؛ يطابق restaurant_geography()
+       db.Index('idx_restaurants_location_geography', func.geography(location), postgresql_using='gist'),
+   )
+
    def __repr__(self):
        return f'<Restaurant {self.name}>'
\ No newline at end of file
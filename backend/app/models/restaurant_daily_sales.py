@@ -0,0 +1,15 @@
+from app.extensions import db
+from sqlalchemy.sql import func
+
+# تجميع يومي لمبيعات المطعم (الطلبات المُسلَّمة فقط) حسب التاريخ المحلي لإنشاء الطلب
+class RestaurantDailySales(db.Model):
+    __tablename__ = 'restaurant_daily_sales'
+    restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurants.id', ondelete='CASCADE'), primary_key=True)
+    sales_date = db.Column(db.Date, primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    gross_sales = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    item_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f'<RestaurantDailySales {self.restaurant_id} {self.sales_date}: {self.gross_sales}>'
@@ -0,0 +1,29 @@
+from app.extensions import db
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+
+# مهمة الحذف النهائي لمطعم؛ تُنفَّذ في الخلفية على دفعات ويمكن استئنافها بعد أي توقف
+class RestaurantPurge(db.Model):
+    __tablename__ = 'restaurant_purges'
+    id = db.Column(db.Integer, primary_key=True)
+    # بدون مفتاح خارجي: صف المطعم يُحذف في آخر مرحلة ويبقى سجل المهمة
+    restaurant_id = db.Column(db.Integer, nullable=False, unique=True)
+    restaurant_name = db.Column(db.String(100), nullable=True)
+    requested_by = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='pending', server_default='pending') # 'pending', 'running', 'done', 'failed'
+    phase = db.Column(db.String(20), nullable=False, default='orders', server_default='orders') # 'orders', 'menu', 'restaurant', 'remote_images', 'done'
+    # عدد الصفوف عند بدء المهمة وعدد ما حُذف حتى الآن، لكل جدول
+    totals = db.Column(JSONB, nullable=False, default=dict)
+    deleted = db.Column(JSONB, nullable=False, default=dict)
+    # معرفات صور Cloudinary التي حُذفت صفوفها ولم تُحذف من Cloudinary بعد
+    pending_public_ids = db.Column(JSONB, nullable=False, default=list)
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # نهاية مهلة حجز العامل الحالي؛ بعدها يستطيع عامل آخر استئناف المهمة
+    lease_expires_at = db.Column(db.TIMESTAMP(timezone=True), nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.TIMESTAMP(timezone=True), server_default=func.now())
+    updated_at = db.Column(db.TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
+    finished_at = db.Column(db.TIMESTAMP(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f'<RestaurantPurge {self.id} restaurant {self.restaurant_id}: {self.status}/{self.phase}>'
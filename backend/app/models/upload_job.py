@@ -0,0 +1,20 @@
+from app.extensions import db
+from sqlalchemy.sql import func
+import uuid
+
+# مهمة رفع صورة تعمل في الخلفية؛ تُنشأ مع الطلب وتُحدَّث عند انتهاء الرفع
+class UploadJob(db.Model):
+    __tablename__ = 'upload_jobs'
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    kind = db.Column(db.String(30), nullable=False) # 'menu_item_image', 'profile_image'
+    target_id = db.Column(db.Integer, nullable=False) # menu_item_id أو user_id حسب النوع
+    filename = db.Column(db.String(255), nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='pending') # 'pending', 'running', 'done', 'failed'
+    result_url = db.Column(db.String(255), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.TIMESTAMP(timezone=True), server_default=func.now())
+    finished_at = db.Column(db.TIMESTAMP(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f'<UploadJob {self.id} {self.kind}:{self.target_id} {self.status}>'
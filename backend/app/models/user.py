@@ -41,6 +41,13 @@ class User(db.Model):
    applications = db.relationship('RestaurantApplication', backref='user', lazy=True)
    addresses = db.relationship('UserAddress', backref='user', lazy=True, cascade="all, delete-orphan")
 
+   __table_args__ = (
+       # بحث الإدارة: مطابقة جزئية بفهارس الثلاثيات (pg_trgm)، وبادئة رقم الهاتف بفهرس text_pattern_ops
+       db.Index('idx_users_email_trgm', 'email', postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'}),
+       db.Index('idx_users_phone_number_trgm', 'phone_number', postgresql_using='gin', postgresql_ops={'phone_number': 'gin_trgm_ops'}),
+       db.Index('idx_users_phone_number_prefix', 'phone_number', postgresql_ops={'phone_number': 'text_pattern_ops'}),
+   )
+
    def set_password(self, password):
        self.password_hash = generate_password_hash(password)
 
@@ -5,6 +5,8 @@ from app.routes.orders import orders_bp
 from app.routes.portal import portal_bp
 from app.routes.user_routes import user_bp # تم الإضافة: استيراد Blueprint المستخدم الجديد
 from app.routes.admin_routes import admin_bp
+from app.routes.uploads import uploads_bp
+from app.routes.media import media_bp
 from .migrate import migrate_bp
 
 api_bp = Blueprint('api', __name__)
@@ -16,7 +18,9 @@ def register_routes(app):
     api_bp.register_blueprint(portal_bp, url_prefix='/api/v1/portal')
     api_bp.register_blueprint(user_bp, url_prefix='/api/v1/users')
     api_bp.register_blueprint(admin_bp, url_prefix='/api/v1/admin')
+    api_bp.register_blueprint(uploads_bp, url_prefix='/api/v1/uploads')
     api_bp.register_blueprint(migrate_bp, url_prefix='/api/v1/migrate')
 
 
-    app.register_blueprint(api_bp)
\ No newline at end of file
+    app.register_blueprint(api_bp)
+    app.register_blueprint(media_bp, url_prefix='/media') # ملفات مخزن المحتوى بروابط ثابتة
\ No newline at end of file
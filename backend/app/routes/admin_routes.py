@@ -1,53 +1,92 @@
 from flask import Blueprint, request, jsonify, current_app
 from app.extensions import db
-from app.models import User, Restaurant, RestaurantApplication, MenuItem, MenuItemImage
-from app.auth.auth import requires_auth
-from app.utils.serializers import serialize_user, serialize_restaurant_application, serialize_restaurant
-from app.utils.cloudinary_utils import delete_image, extract_public_id_from_url
+from app.models import User, Restaurant, RestaurantApplication, MenuItem, EmailOutbox, RestaurantPurge
+from app.auth.auth import requires_auth, invalidate_user_permissions
+from app.auth.session_cache import session_cache
+from app.auth.session_touch import session_touch_buffer
+from app.utils.delivery_index import delivery_index, broadcast_delivery_area_change
+from app.utils.catalog_cache import bump_content_version
+from app.utils.menu_cache import menu_cache
+from app.utils.email_outbox import email_outbox_pool, outbox_status_counts
+from app.utils.image_uploads import upload_pool
+from app.utils.image_variants import image_variant_pool
+from app.utils.restaurant_purge import restaurant_purge_worker, start_restaurant_purge, retry_restaurant_purge
+from app.utils.pagination import parse_page_size, id_keyset_paginate, approximate_count
+from app.utils.user_queries import addresses_by_user, find_users
+from app.utils.search import build_tsquery, search_rank
+from app.utils.serializers import serialize_user, serialize_restaurant_application, serialize_restaurant, serialize_restaurant_summary, serialize_email_outbox, serialize_restaurant_purge
+from app.utils.restaurant_queries import restaurant_summary_query, restaurant_detail_options, wants_full_detail
+from app.utils.geo_sql import geometry_args, restaurant_geometry_options
+from app.utils.db_routing import read_only, replica_router
+from app.utils.cloudinary_utils import delete_image
 from geoalchemy2.elements import WKTElement
-from sqlalchemy import func, or_
+from sqlalchemy import func
 import json
+import math
 import os
 
 admin_bp = Blueprint('admin_bp', __name__)
 
+# أقصى عدد نتائج لبحث المستخدمين
+SEARCH_MAX_RESULTS = 50
+
 # --- إدارة المستخدمين ---
 
 @admin_bp.route('/users', methods=['GET'])
 @requires_auth(allowed_roles=['manager', 'admin'])
+@read_only
 def get_all_users(payload):
-    """جلب قائمة بجميع المستخدمين مع ترقيم الصفحات."""
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
-    
-    pagination = User.query.order_by(User.id.asc()).paginate(page=page, per_page=per_page, error_out=False)
-    users = pagination.items
-    
+    """
+    جلب قائمة بجميع المستخدمين مع ترقيم الصفحات.
+    عند تمرير limit أو after تُرجع صفحة واحدة مع next_cursor (ترقيم بالمؤشر على id) بزمن ثابت مهما بعدت الصفحة.
+    العدد الكلي تقديري من إحصائيات PostgreSQL للجداول الكبيرة (total_is_estimate).
+    """
+    try:
+        if 'limit' in request.args or 'after' in request.args:
+            limit = parse_page_size(request.args.get('limit'))
+            users, next_cursor = id_keyset_paginate(User.query, User, limit, request.args.get('after'))
+            addresses = addresses_by_user([u.id for u in users])
+            return jsonify({
+                'users': [serialize_user(u, addresses[u.id]) for u in users],
+                'next_cursor': next_cursor
+            }), 200
+    except ValueError:
+        return jsonify({"success": False, "message": "Invalid limit or cursor"}), 400
+
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = max(request.args.get('per_page', 10, type=int), 1)
+
+    users = User.query.order_by(User.id.asc()).offset((page - 1) * per_page).limit(per_page).all()
+    addresses = addresses_by_user([u.id for u in users])
+    total_users, is_estimate = approximate_count(User)
+
     return jsonify({
-        'users': [serialize_user(u) for u in users],
-        'total_pages': pagination.pages,
-        'current_page': pagination.page,
-        'total_users': pagination.total
+        'users': [serialize_user(u, addresses[u.id]) for u in users],
+        'total_pages': math.ceil(total_users / per_page),
+        'current_page': page,
+        'total_users': total_users,
+        'total_is_estimate': is_estimate
     }), 200
 
 @admin_bp.route('/users/search', methods=['GET'])
 @requires_auth(allowed_roles=['manager', 'admin', 'restaurant_manager'])
+@read_only
 def search_users(payload):
-    """البحث عن مستخدمين بالبريد الإلكتروني أو رقم الهاتف."""
+    """
+    البحث عن مستخدمين بالبريد الإلكتروني أو رقم الهاتف.
+    النتائج مرتبة حسب التشابه ومحدودة بـ limit (الافتراضي 20، والأقصى 50).
+    """
     query_param = request.args.get('q')
-    if not query_param:
+    if not query_param or not query_param.strip():
         return jsonify({"success": False, "message": "Search query parameter 'q' is required."}), 400
+    try:
+        limit = parse_page_size(request.args.get('limit'), maximum=SEARCH_MAX_RESULTS)
+    except ValueError:
+        return jsonify({"success": False, "message": "Invalid limit"}), 400
 
-    search_term = f"%{query_param}%"
-    
-    users = User.query.filter(
-        or_(
-            User.email.ilike(search_term),
-            User.phone_number.ilike(search_term)
-        )
-    ).all()
-
-    return jsonify([serialize_user(u) for u in users]), 200
+    users = find_users(query_param, limit)
+    addresses = addresses_by_user([u.id for u in users])
+    return jsonify([serialize_user(u, addresses[u.id]) for u in users]), 200
 
 @admin_bp.route('/users/<int:user_id>/role', methods=['PUT'])
 @requires_auth(allowed_roles=['manager', 'admin'])
@@ -70,6 +109,7 @@ def change_user_role(payload, user_id):
             return jsonify({"success": False, "message": "Managers cannot assign or modify admin/manager roles"}), 403
     
     user_to_change.role = new_role
+    invalidate_user_permissions(user_to_change.id)
     db.session.commit()
     return jsonify({"success": True, "message": f"User {user_id} role changed to {new_role}"}), 200
 
@@ -99,13 +139,26 @@ def unban_user(payload, user_id):
 
 @admin_bp.route('/restaurants', methods=['GET'])
 @requires_auth(allowed_roles=['manager', 'admin'])
+@read_only
 def get_all_restaurants(payload):
     """جلب قائمة بجميع المطاعم مع ترقيم الصفحات والفلترة."""
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
     
+    # النسخة المختصرة افتراضياً؛ ?detail=full لإرجاع القائمة ومنطقة التوصيل
+    full_detail = wants_full_detail(request.args)
+
     # الفلترة
-    query = Restaurant.query
+    if full_detail:
+        # منطقة التوصيل GeoJSON من PostGIS، مبسطة للعرض على الخريطة ما لم يُطلب غير ذلك (?simplify=0)
+        try:
+            precision, simplify = geometry_args(request.args, current_app.config['DELIVERY_AREA_LIST_SIMPLIFY_METRES'])
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+        query = Restaurant.query.options(*restaurant_detail_options(), *restaurant_geometry_options(precision, simplify))
+    else:
+        query = restaurant_summary_query()
+    search = request.args.get('search') # بحث نصي في الاسم والوصف والعنوان، مرتب حسب الصلة
     name = request.args.get('name')
     address_filter = request.args.get('address') # للبحث عن مدينة أو منطقة
     status = request.args.get('status') # فلتر الحالة
@@ -114,14 +167,22 @@ def get_all_restaurants(payload):
         query = query.filter(Restaurant.name.ilike(f"%{name}%"))
     if address_filter:
         query = query.filter(Restaurant.address.ilike(f"%{address_filter}%"))
-    if status and status in ['active', 'suspended']:
+    if status and status in ['active', 'suspended', 'deleting']:
         query = query.filter(Restaurant.status == status)
 
-    pagination = query.order_by(Restaurant.id.asc()).paginate(page=page, per_page=per_page, error_out=False)
+    tsquery = build_tsquery(search) if search else None
+    if tsquery is not None:
+        query = query.filter(Restaurant.search_vector.op('@@')(tsquery)).order_by(
+            search_rank(Restaurant.search_vector, tsquery).desc(), Restaurant.id.asc()
+        )
+    else:
+        query = query.order_by(Restaurant.id.asc())
+
+    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
     restaurants = pagination.items
     
     return jsonify({
-        'restaurants': [serialize_restaurant(r) for r in restaurants],
+        'restaurants': [serialize_restaurant(r) if full_detail else serialize_restaurant_summary(r) for r in restaurants],
         'total_pages': pagination.pages,
         'current_page': pagination.page,
         'total_restaurants': pagination.total
@@ -134,8 +195,11 @@ def suspend_restaurant(payload, restaurant_id):
     restaurant = Restaurant.query.get(restaurant_id)
     if not restaurant:
         return jsonify({"success": False, "message": "Restaurant not found"}), 404
+    if restaurant.status == 'deleting':
+        return jsonify({"success": False, "message": "Restaurant is being deleted"}), 409
     
     restaurant.status = 'suspended'
+    bump_content_version(restaurant.id)
     db.session.commit()
     return jsonify({"success": True, "message": "Restaurant has been suspended."}), 200
 
@@ -146,36 +210,35 @@ def unsuspend_restaurant(payload, restaurant_id):
     restaurant = Restaurant.query.get(restaurant_id)
     if not restaurant:
         return jsonify({"success": False, "message": "Restaurant not found"}), 404
+    if restaurant.status == 'deleting':
+        return jsonify({"success": False, "message": "Restaurant is being deleted"}), 409
     
     restaurant.status = 'active'
+    bump_content_version(restaurant.id)
     db.session.commit()
     return jsonify({"success": True, "message": "Restaurant has been reactivated."}), 200
 
 @admin_bp.route('/restaurants/<int:restaurant_id>/force-delete', methods=['POST'])
 @requires_auth(allowed_roles=['manager', 'admin']) # يفضل أن يكون للأدمن الأعلى فقط
 def force_delete_restaurant(payload, restaurant_id):
-    """الحذف النهائي لمطعم وجميع بياناته المرتبطة به."""
+    """
+    الحذف النهائي لمطعم وجميع بياناته المرتبطة به.
+    يُخفى المطعم فوراً ويُحذف الباقي في الخلفية على دفعات؛ تُتابع الحالة عبر /restaurant-purges/<id>.
+    """
+    existing = RestaurantPurge.query.filter_by(restaurant_id=restaurant_id).first()
+    if existing:
+        if existing.status == 'done':
+            return jsonify({"success": True, "message": "Restaurant has already been deleted.", "purge": serialize_restaurant_purge(existing)}), 200
+        if existing.status == 'failed':
+            # إعادة جدولة مهمة فشلت بعد استنفاد محاولاتها؛ تُستأنف من مرحلتها الحالية
+            retry_restaurant_purge(existing)
+            db.session.commit()
+            return jsonify({"success": True, "message": "Restaurant deletion has been restarted.", "purge": serialize_restaurant_purge(existing)}), 202
+        return jsonify({"success": True, "message": "Restaurant deletion is already in progress.", "purge": serialize_restaurant_purge(existing)}), 202
+
     restaurant = Restaurant.query.get(restaurant_id)
     if not restaurant:
         return jsonify({"success": False, "message": "Restaurant not found"}), 404
-    
-    # --- جديد: جمع أسماء ملفات الصور المراد حذفها ---
-    public_ids_to_delete = []
-    
-    # 1. شعار المطعم
-    if restaurant.logo_url:
-        public_id = extract_public_id_from_url(restaurant.logo_url)
-        if public_id:
-            public_ids_to_delete.append(public_id)
-
-    menu_items_ids = [item.id for item in restaurant.menu_items]
-    if menu_items_ids:
-        images = MenuItemImage.query.filter(MenuItemImage.menu_item_id.in_(menu_items_ids)).all()
-        for img in images:
-            public_id = extract_public_id_from_url(img.image_url)
-            if public_id:
-                public_ids_to_delete.append(public_id)
-
 
     try:
         # إعادة تعيين أدوار المستخدمين المرتبطين بالمطعم
@@ -183,19 +246,49 @@ def force_delete_restaurant(payload, restaurant_id):
         for user in users_to_reset:
             user.role = 'customer'
             user.associated_restaurant_id = None
-        
-        # الحذف من قاعدة البيانات (سيشمل كل شيء مرتبط بسبب cascade)
-        db.session.delete(restaurant)
+            invalidate_user_permissions(user.id)
+
+        purge = start_restaurant_purge(restaurant, payload['id'])
+        bump_content_version(restaurant.id)
+        broadcast_delivery_area_change(db.session, [restaurant_id])
         db.session.commit()
-        return jsonify({"success": True, "message": "Restaurant has been permanently deleted."}), 200
+        return jsonify({"success": True, "message": "Restaurant deletion has started.", "purge": serialize_restaurant_purge(purge)}), 202
     except Exception as e:
         db.session.rollback()
         return jsonify({"success": False, "message": f"An error occurred: {str(e)}"}), 500
 
+@admin_bp.route('/restaurant-purges', methods=['GET'])
+@requires_auth(allowed_roles=['manager', 'admin'])
+def get_restaurant_purges(payload):
+    """مهام الحذف النهائي للمطاعم مع نسبة التقدم، مع إمكانية التصفية حسب الحالة."""
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 20, type=int)
+    query = RestaurantPurge.query
+    status = request.args.get('status')
+    if status:
+        query = query.filter(RestaurantPurge.status == status)
+
+    pagination = query.order_by(RestaurantPurge.id.desc()).paginate(page=page, per_page=per_page, error_out=False)
+    return jsonify({
+        'purges': [serialize_restaurant_purge(p) for p in pagination.items],
+        'total_pages': pagination.pages,
+        'current_page': pagination.page
+    }), 200
+
+@admin_bp.route('/restaurant-purges/<int:purge_id>', methods=['GET'])
+@requires_auth(allowed_roles=['manager', 'admin'])
+def get_restaurant_purge(payload, purge_id):
+    """حالة مهمة حذف واحدة."""
+    purge = RestaurantPurge.query.get(purge_id)
+    if not purge:
+        return jsonify({"success": False, "message": "Purge job not found"}), 404
+    return jsonify(serialize_restaurant_purge(purge)), 200
+
 # --- إدارة طلبات المطاعم ---
 
 @admin_bp.route('/restaurant_applications', methods=['GET'])
 @requires_auth(allowed_roles=['manager', 'admin'])
+@read_only
 def get_restaurant_applications(payload):
     """جلب جميع طلبات المطاعم المعلقة مع ترقيم الصفحات."""
     page = request.args.get('page', 1, type=int)
@@ -256,6 +349,8 @@ def approve_restaurant_application(payload, app_id):
 
     user.associated_restaurant_id = new_restaurant.id
     application.status = 'approved'
+    invalidate_user_permissions(user.id)
+    broadcast_delivery_area_change(db.session, [new_restaurant.id])
     
     db.session.commit()
     return jsonify({"success": True, "message": "Application approved. Restaurant created."}), 200
@@ -295,6 +390,58 @@ def add_restaurant_admin(payload, restaurant_id):
 
     user_to_add.role = 'restaurant_admin'
     user_to_add.associated_restaurant_id = restaurant_id
+    invalidate_user_permissions(user_to_add.id)
     db.session.commit()
 
-    return jsonify({"success": True, "message": f"User {user_to_add.name} is now an admin for restaurant {restaurant.name}"}), 200
\ No newline at end of file
+    return jsonify({"success": True, "message": f"User {user_to_add.name} is now an admin for restaurant {restaurant.name}"}), 200
+
+# --- مراقبة الأداء ---
+
+@admin_bp.route('/metrics', methods=['GET'])
+@requires_auth(allowed_roles=['manager', 'admin'])
+def get_metrics(payload):
+    """عدادات الذاكرة المؤقتة للعامل الحالي (كل عامل gunicorn له عداداته الخاصة)."""
+    return jsonify({
+        'session_cache': session_cache.stats(),
+        'session_touch_buffer': session_touch_buffer.stats(),
+        'delivery_index': delivery_index.stats(),
+        'menu_cache': menu_cache.stats(),
+        'email_outbox': email_outbox_pool.stats(),
+        'image_uploads': upload_pool.stats(),
+        'image_variants': image_variant_pool.stats(),
+        'restaurant_purge': restaurant_purge_worker.stats(),
+        'read_replica': replica_router.stats()
+    }), 200
+
+# --- صندوق البريد الصادر ---
+
+@admin_bp.route('/email-outbox', methods=['GET'])
+@requires_auth(allowed_roles=['manager', 'admin'])
+def get_email_outbox(payload):
+    """حالة رسائل البريد الصادرة مع إمكانية التصفية حسب الحالة أو المستلم."""
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 20, type=int)
+    query = EmailOutbox.query
+    status = request.args.get('status')
+    if status:
+        query = query.filter(EmailOutbox.status == status)
+    to_email = request.args.get('email')
+    if to_email:
+        query = query.filter(EmailOutbox.to_email == to_email)
+
+    pagination = query.order_by(EmailOutbox.id.desc()).paginate(page=page, per_page=per_page, error_out=False)
+    return jsonify({
+        'messages': [serialize_email_outbox(m) for m in pagination.items],
+        'counts': outbox_status_counts(),
+        'total_pages': pagination.pages,
+        'current_page': pagination.page
+    }), 200
+
+@admin_bp.route('/email-outbox/<int:message_id>', methods=['GET'])
+@requires_auth(allowed_roles=['manager', 'admin'])
+def get_email_outbox_message(payload, message_id):
+    """حالة رسالة واحدة."""
+    message = EmailOutbox.query.get(message_id)
+    if not message:
+        return jsonify({"success": False, "message": "Message not found"}), 404
+    return jsonify(serialize_email_outbox(message)), 200
@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify, url_for, redirect
 from app.extensions import db
 from app.models import User, Session
 from app.auth.auth import requires_auth, AuthError
+from app.auth.session_cache import broadcast_session_revocation
 from app.utils.token_utils import generate_token, decode_token, generate_refresh_token
 from app.utils.auth_helpers import generate_verification_code, generate_unique_oauth_phone_placeholder, generate_numeric_otp
 from app.utils.email_utils import send_email_verification_code
@@ -53,9 +54,10 @@ def register():
        )
        new_user.set_password(password)
        db.session.add(new_user)
+       # يُضاف البريد إلى صندوق الصادر ضمن نفس المعاملة ويُرسل في الخلفية بعد الحفظ
+       send_email_verification_code(email, email_verification_code)
        db.session.commit()
 
-       send_email_verification_code(email, email_verification_code)
        return jsonify({"success": True, "message": "تم التسجيل بنجاح. يرجى تأكيد بريدك الإلكتروني."}), 201
    except Exception as e:
        db.session.rollback()
@@ -108,8 +110,8 @@ def resend_verification_email():
         user.email_verification_code = email_verification_code
         user.email_code_expires_at = now + timedelta(minutes=5)
         user.email_verification_requests_count += 1
-        db.session.commit()
         send_email_verification_code(email, email_verification_code)
+        db.session.commit()
         return jsonify({"success": True, "message": "تم إرسال كود التفعيل إلى بريدك الإلكتروني."}), 200
     except Exception as e:
         return jsonify({"success": False, "message": f"فشل إرسال البريد: {str(e)}"}), 500
@@ -129,9 +131,9 @@ def request_password_reset():
    code = generate_verification_code()
    user.reset_password_code = code
    user.reset_code_expires_at = datetime.now(timezone.utc) + timedelta(minutes=10)
+   send_email_verification_code(user.email, code)
    db.session.commit()
 
-   send_email_verification_code(user.email, code)
    return jsonify({"success": True, "message": "تم إرسال رمز إعادة تعيين كلمة المرور"}), 200
 
 @auth_api_bp.route('/reset-password', methods=['POST'])
@@ -182,10 +184,10 @@ def request_phone_verification_code(payload):
    code = generate_numeric_otp()
    user.phone_verification_code = code
    user.phone_code_expires_at = now + timedelta(minutes=5)
-   db.session.commit()
 
 #    send_sms(user.phone_number, f"رمز التحقق الخاص بك هو: {code}")
    send_sms_verification_email(user, code, method="email")
+   db.session.commit()
    return jsonify({"success": True, "message": f"تم إرسال رمز التحقق. المحاولات المتبقية: {5 - user.phone_verification_requests_count}"}), 200
 
 @auth_api_bp.route('/verify-phone', methods=['POST'])
@@ -309,6 +311,7 @@ def logout(payload):
    session_obj = Session.query.get(session_id)
    if session_obj:
        session_obj.revoked = True
+       broadcast_session_revocation(db.session, session_ids=[session_obj.id])
        db.session.commit()
    return jsonify({"success": True, "message": "Logged out successfully"}), 200
 
@@ -319,6 +322,7 @@ def logout_all_sessions(payload):
    user_sessions = Session.query.filter_by(user_id=user_id, revoked=False).all()
    for s in user_sessions:
        s.revoked = True
+   broadcast_session_revocation(db.session, user_id=user_id)
    db.session.commit()
    return jsonify({"success": True, "message": "Logged out from all sessions successfully"}), 200
 
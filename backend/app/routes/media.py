@@ -0,0 +1,18 @@
+from flask import Blueprint, abort, send_from_directory
+from app.utils.content_store import content_store, is_content_key
+
+media_bp = Blueprint('media_bp', __name__)
+
+# الملفات المخزنة حسب المحتوى لا تتغير أبداً، فتُخزَّن مؤقتاً لمدة سنة دون إعادة تحقق
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+@media_bp.route('/<string:key>', methods=['GET'])
+def get_media(key):
+    """خدمة ملف من مخزن المحتوى (الصور الأصلية ونسخها المصغرة)."""
+    if not is_content_key(key):
+        abort(404)
+    store = content_store()
+    response = send_from_directory(store.shard_dir(key), key, max_age=IMMUTABLE_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify, current_app
 from app.extensions import db
-from app.models import Order, OrderItem, MenuItem, Restaurant, Payment, Rating, User
+from app.models import Order, Restaurant, Rating, User
 from sqlalchemy.exc import IntegrityError
 from geoalchemy2.elements import WKTElement
 from geoalchemy2.shape import to_shape
@@ -8,6 +8,10 @@ from geoalchemy2.functions import ST_Contains
 from sqlalchemy import func
 from app.auth.auth import requires_auth
 from app.utils.serializers import serialize_order, serialize_rating
+from app.utils.order_loading import order_graph_query, apply_order_filters
+from app.utils.pagination import parse_page_size, keyset_paginate
+from app.utils.delivery_index import delivery_index, use_delivery_index
+from app.utils.order_placement import CartError, price_cart, insert_order
 
 orders_bp = Blueprint('orders', __name__)
 
@@ -31,62 +35,29 @@ def create_order(payload):
     if not restaurant:
         return jsonify({'message': 'المطعم غير موجود'}), 404
 
-    if restaurant.delivery_area is not None:
+    if use_delivery_index():
+        if not delivery_index.delivers_to(restaurant.id, delivery_location_data["longitude"], delivery_location_data["latitude"]):
+            return jsonify({'message': 'Delivery location is outside the restaurant\'s delivery area'}), 400
+    elif restaurant.delivery_area is not None:
         customer_point = WKTElement(f'POINT({delivery_location_data["longitude"]} {delivery_location_data["latitude"]})', srid=4326)
         if not db.session.query(func.ST_Within(customer_point, restaurant.delivery_area)).scalar():
             return jsonify({'message': 'Delivery location is outside the restaurant\'s delivery area'}), 400
 
-    total_price = 0
-    order_items_to_add = []
-    for item_data in items:
-        menu_item_id = item_data.get('menu_item_id')
-        quantity = item_data.get('quantity')
-
-        if not all([menu_item_id, quantity]) or quantity <= 0:
-            return jsonify({'message': 'بيانات المنتج غير صالحة'}), 400
-
-        menu_item = MenuItem.query.filter_by(id=menu_item_id, restaurant_id=restaurant_id, is_available=True).first()
-        if not menu_item:
-            return jsonify({'message': f'المنتج {menu_item_id} غير متوفر'}), 404
+    try:
+        total_price, order_item_rows = price_cart(restaurant_id, items)
+    except CartError as e:
+        return jsonify({'message': e.message}), e.status_code
 
-        total_price += menu_item.price * quantity
-        
-        order_items_to_add.append(OrderItem(
-            menu_item_id=menu_item.id,
-            quantity=quantity,
-            price_at_order=menu_item.price,
-            excluded_ingredients=item_data.get('excluded_ingredients'),
-            notes=item_data.get('notes')
-        ))
-    
     delivery_location_wkt = WKTElement(f'POINT({delivery_location_data["longitude"]} {delivery_location_data["latitude"]})', srid=4326)
 
     try:
-        new_order = Order(
-            user_id=user_id,
-            restaurant_id=restaurant_id,
-            total_price=total_price,
-            delivery_address=delivery_address,
-            delivery_location=delivery_location_wkt,
-            status='pending'
+        new_order_id = insert_order(
+            user_id, restaurant_id, total_price, delivery_address,
+            delivery_location_wkt, payment_method, order_item_rows
         )
-        db.session.add(new_order)
-        db.session.flush()
-
-        for item in order_items_to_add:
-            item.order_id = new_order.id
-            db.session.add(item)
-        
-        new_payment = Payment(
-            order_id=new_order.id,
-            amount=total_price,
-            payment_method=payment_method,
-            status='pending'
-        )
-        db.session.add(new_payment)
-
         db.session.commit()
-        return jsonify({'message': 'Order created successfully', 'order': serialize_order(new_order)}), 201
+        created_order = order_graph_query(id=new_order_id).first()
+        return jsonify({'message': 'Order created successfully', 'order': serialize_order(created_order)}), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': f'An error occurred: {str(e)}'}), 500
@@ -98,13 +69,23 @@ def get_user_orders(payload):
     """
     جلب الطلبات الشخصية للمستخدم الحالي فقط.
     هذه النقطة آمنة وتعرض فقط الطلبات التي يملكها المستخدم صاحب التوكن.
+    عند تمرير limit أو after تُرجع صفحة واحدة مع next_cursor (ترقيم بالمؤشر على created_at, id).
     """
     user_id = payload['id']
 
     # تم التعديل: المنطق الآن بسيط وآمن.
     # يتم جلب الطلبات فقط حيث user_id يطابق هوية المستخدم في التوكن.
-    orders = Order.query.filter_by(user_id=user_id).order_by(Order.created_at.desc()).all()
+    try:
+        query = apply_order_filters(order_graph_query(user_id=user_id), request.args)
+
+        if 'limit' in request.args or 'after' in request.args:
+            limit = parse_page_size(request.args.get('limit'))
+            orders, next_cursor = keyset_paginate(query, Order, limit, request.args.get('after'))
+            return jsonify({'orders': [serialize_order(o) for o in orders], 'next_cursor': next_cursor}), 200
+    except ValueError:
+        return jsonify({'message': 'Invalid limit, cursor or date filter'}), 400
 
+    orders = query.order_by(Order.created_at.desc()).all()
     return jsonify([serialize_order(o) for o in orders]), 200
 
 @orders_bp.route('/<int:order_id>', methods=['GET'])
@@ -116,7 +97,7 @@ def get_order_details(payload, order_id):
     """
     user_id = payload['id']
 
-    order = Order.query.filter_by(id=order_id, user_id=user_id).first()
+    order = order_graph_query(id=order_id, user_id=user_id).first()
     
     if not order:
         return jsonify({'message': 'Order not found or you do not have permission to view it'}), 404
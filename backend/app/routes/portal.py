@@ -1,16 +1,24 @@
 from flask import Blueprint, request, jsonify, current_app
 from app.extensions import db
 from app.models import User, Restaurant, MenuItem, MenuItemImage, Order
-from app.auth.auth import requires_auth
-from app.utils.serializers import serialize_restaurant, serialize_menu_item, serialize_order, serialize_user
-from app.utils.cloudinary_utils import upload_image
+from app.auth.auth import requires_auth, invalidate_user_permissions
+from app.utils.serializers import serialize_restaurant, serialize_menu_item, serialize_order, serialize_user, serialize_upload_job
+from app.utils.image_uploads import upload_pool, UploadQueueFull
+from app.utils.image_variants import image_variant_pool
+from app.utils.content_store import store_upload, content_store, content_url
+from app.utils.order_loading import order_graph_query, apply_order_filters
+from app.utils.pagination import parse_page_size, keyset_paginate
+from app.utils.statistics import GRANULARITIES, coarsen_granularity, sales_series
+from app.utils.sales_rollup import apply_status_change
+from app.utils.cursors import encode_cursor, decode_cursor, parse_cursor_datetime
+from app.utils.delivery_index import broadcast_delivery_area_change
+from app.utils.catalog_cache import bump_content_version
+from app.utils.db_routing import read_only, primary_reads
 from geoalchemy2.elements import WKTElement
-from sqlalchemy import func, cast, Date
-from datetime import datetime, timezone, timedelta
-from werkzeug.utils import secure_filename
+from sqlalchemy import func
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
 import json
-import os
-import uuid
 
 portal_bp = Blueprint('portal', __name__)
 
@@ -21,24 +29,30 @@ def allowed_file(filename):
 
 def get_authorized_restaurant(payload):
     """دالة مساعدة للتحقق من صلاحيات مدير/أدمن المطعم وإرجاع المطعم المرتبط به."""
-    user = User.query.get(payload['id'])
-    if not user or user.role not in ['restaurant_manager', 'restaurant_admin']:
-        return None
-    
-    restaurant = Restaurant.query.get(user.associated_restaurant_id)
+    # الصلاحيات تُقرأ من القاعدة الرئيسية دائماً، حتى داخل المسارات المعلّمة بـ read_only
+    with primary_reads():
+        user = User.query.get(payload['id'])
+        if not user or user.role not in ['restaurant_manager', 'restaurant_admin']:
+            return None
+
+        restaurant = Restaurant.query.get(user.associated_restaurant_id)
     return restaurant
 
 @portal_bp.route('/statistics', methods=['GET'])
 @requires_auth(allowed_roles=['restaurant_manager', 'restaurant_admin'])
+@read_only
 def get_portal_statistics(payload):
     """جلب إحصائيات المطعم لفترة زمنية محددة."""
     restaurant = get_authorized_restaurant(payload)
     if not restaurant:
         return jsonify({"success": False, "message": "Restaurant not found for this user"}), 404
 
+    # المنطقة الزمنية للمطعم: تُحسب الأيام والفترات بالتوقيت المحلي وليس UTC
+    tz_name = current_app.config['RESTAURANT_TIMEZONE']
+
     # --- 1. تحديد الفترة الزمنية ---
     period = request.args.get('period', 'weekly') # الخيارات: daily, weekly, monthly, custom
-    today = datetime.now(timezone.utc).date()
+    today = datetime.now(ZoneInfo(tz_name)).date()
     start_date = None
     end_date = None
 
@@ -68,39 +82,39 @@ def get_portal_statistics(payload):
     except ValueError:
         return jsonify({"success": False, "message": "Invalid date format. Please use YYYY-MM-DD."}), 400
 
-    # --- 2. حساب الإحصائيات الإجمالية للفترة المحددة ---
-    start_datetime = datetime.combine(start_date, datetime.min.time())
-    end_datetime = datetime.combine(end_date, datetime.max.time())
-    
-    base_query = Order.query.filter(
-        Order.restaurant_id == restaurant.id,
-        Order.status == 'delivered',
-        Order.created_at.between(start_datetime, end_datetime)
-    )
-    
-    total_sales = db.session.query(func.sum(Order.total_price)).select_from(base_query.subquery()).scalar() or 0
-    total_orders = base_query.count()
+    if end_date < start_date:
+        return jsonify({"success": False, "message": "end_date must not be before start_date"}), 400
+
+    max_range_days = current_app.config['STATISTICS_MAX_RANGE_DAYS']
+    if (end_date - start_date).days + 1 > max_range_days:
+        return jsonify({"success": False, "message": f"The selected range cannot exceed {max_range_days} days"}), 400
+
+    # دقة الرسم البياني: يوم/أسبوع/شهر، وتُخفَّض تلقائياً إذا تجاوز عدد النقاط الحد
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        return jsonify({"success": False, "message": "granularity must be one of: day, week, month"}), 400
+    granularity = coarsen_granularity(start_date, end_date, granularity, current_app.config['STATISTICS_MAX_BUCKETS'])
+
+    # --- 2. حساب السلسلة الزمنية والإجماليات من جدول التجميع اليومي في استعلام واحد ---
+    series = sales_series(restaurant.id, start_date, end_date, granularity)
+
+    total_sales = sum((sales for _, sales, _ in series), 0)
+    total_orders = sum(count for _, _, count in series)
     average_order_value = total_sales / total_orders if total_orders > 0 else 0
 
     # --- 3. تجهيز بيانات المبيعات للرسم البياني ---
     sales_over_time = []
-    delta = end_date - start_date
     day_names_ar = ['الاثنين', 'الثلاثاء', 'الأربعاء', 'الخميس', 'الجمعة', 'السبت', 'الأحد']
 
-    for i in range(delta.days + 1):
-        current_day = start_date + timedelta(days=i)
-        daily_sales = db.session.query(func.sum(Order.total_price)).filter(
-            Order.restaurant_id == restaurant.id,
-            Order.status == 'delivered',
-            cast(Order.created_at, Date) == current_day
-        ).scalar() or 0
-        
-        if period == 'weekly':
-            label = day_names_ar[current_day.weekday()]
+    for bucket_date, sales, count in series:
+        if period == 'weekly' and granularity == 'day':
+            label = day_names_ar[bucket_date.weekday()]
+        elif granularity == 'month':
+            label = bucket_date.strftime('%Y-%m')
         else:
-            label = current_day.strftime('%Y-%m-%d')
-            
-        sales_over_time.append({'date': label, 'sales': float(daily_sales)})
+            label = bucket_date.strftime('%Y-%m-%d')
+
+        sales_over_time.append({'date': label, 'sales': float(sales), 'orders': count})
 
     stats = {
         "total_sales": float(total_sales),
@@ -110,7 +124,9 @@ def get_portal_statistics(payload):
         "period_info": {
             "period": period,
             "start_date": start_date.isoformat(),
-            "end_date": end_date.isoformat()
+            "end_date": end_date.isoformat(),
+            "granularity": granularity,
+            "timezone": tz_name
         }
     }
 
@@ -142,10 +158,12 @@ def update_restaurant_settings(payload):
             wkt_coords.append(wkt_coords[0])
         polygon_wkt = f"POLYGON(({', '.join(wkt_coords)}))"
         restaurant.delivery_area = WKTElement(polygon_wkt, srid=4326)
+        broadcast_delivery_area_change(db.session, [restaurant.id])
 
     try:
+        bump_content_version(restaurant.id)
         db.session.commit()
-        return jsonify({"success": True, "message": "Settings updated successfully", "restaurant": serialize_restaurant(restaurant)}), 200
+        return jsonify({"success": True, "message": "Settings updated successfully", "restaurant": serialize_restaurant(restaurant, include_menu=False)}), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({"success": False, "message": f"An error occurred: {str(e)}"}), 500
@@ -153,14 +171,64 @@ def update_restaurant_settings(payload):
 @portal_bp.route('/orders', methods=['GET'])
 @requires_auth(allowed_roles=['restaurant_manager', 'restaurant_admin'])
 def get_portal_orders(payload):
-    """جلب طلبات المطعم."""
+    """
+    جلب طلبات المطعم.
+    وضع المزامنة (?sync=1 أو ?cursor=...) يُرجع فقط الطلبات التي أُنشئت أو تغيّرت منذ المؤشر السابق.
+    عند تمرير limit أو after تُرجع صفحة واحدة مع next_cursor.
+    """
     restaurant = get_authorized_restaurant(payload)
     if not restaurant:
         return jsonify({"success": False, "message": "Restaurant not found for this user"}), 404
-        
-    orders = Order.query.filter_by(restaurant_id=restaurant.id).order_by(Order.created_at.desc()).all()
+
+    cursor = request.args.get('cursor')
+    if cursor or request.args.get('sync', 'false').lower() in ['1', 'true']:
+        return sync_portal_orders(restaurant, cursor)
+
+    try:
+        query = apply_order_filters(order_graph_query(restaurant_id=restaurant.id), request.args)
+
+        if 'limit' in request.args or 'after' in request.args:
+            limit = parse_page_size(request.args.get('limit'))
+            orders, next_cursor = keyset_paginate(query, Order, limit, request.args.get('after'))
+            return jsonify({'orders': [serialize_order(o) for o in orders], 'next_cursor': next_cursor}), 200
+    except ValueError:
+        return jsonify({"success": False, "message": "Invalid limit, cursor or date filter"}), 400
+
+    orders = query.order_by(Order.created_at.desc()).all()
     return jsonify([serialize_order(o) for o in orders]), 200
 
+def sync_portal_orders(restaurant, cursor):
+    """
+    مزامنة تزايدية لطلبات المطعم.
+    المؤشر يحمل وقت قاعدة البيانات عند آخر مزامنة مطروحاً منه هامش تداخل،
+    لذلك قد يُعاد الطلب نفسه مرة إضافية ويجب على العميل دمج الطلبات حسب المعرّف.
+    """
+    changed_at = func.coalesce(Order.updated_at, Order.created_at)
+    query = order_graph_query(restaurant_id=restaurant.id)
+
+    if cursor:
+        try:
+            cursor_data = decode_cursor(cursor)
+            if cursor_data.get('r') != restaurant.id:
+                raise ValueError("Cursor belongs to another restaurant")
+            since = parse_cursor_datetime(cursor_data.get('ts'))
+        except ValueError:
+            return jsonify({"success": False, "message": "Invalid sync cursor"}), 400
+        query = query.filter(changed_at > since)
+
+    # وقت قاعدة البيانات وليس وقت الخادم لتجنّب فروق الساعة بين العمال
+    db_now = db.session.query(func.now()).scalar()
+    orders = query.order_by(Order.created_at.desc()).all()
+
+    overlap = timedelta(seconds=current_app.config['PORTAL_SYNC_OVERLAP_SECONDS'])
+    next_cursor = encode_cursor({'r': restaurant.id, 'ts': db_now - overlap})
+
+    return jsonify({
+        'orders': [serialize_order(o) for o in orders],
+        'cursor': next_cursor,
+        'full_sync': not cursor
+    }), 200
+
 @portal_bp.route('/orders/<int:order_id>/status', methods=['PUT'])
 @requires_auth(allowed_roles=['restaurant_manager', 'restaurant_admin'])
 def update_order_status(payload, order_id):
@@ -169,15 +237,18 @@ def update_order_status(payload, order_id):
     if not restaurant:
         return jsonify({"success": False, "message": "Unauthorized"}), 403
 
-    order = Order.query.filter_by(id=order_id, restaurant_id=restaurant.id).first()
+    # قفل صف الطلب حتى لا يُحتسب انتقال الحالة مرتين في جدول التجميع عند التحديث المتزامن
+    order = Order.query.filter_by(id=order_id, restaurant_id=restaurant.id).with_for_update().first()
     if not order:
         return jsonify({"success": False, "message": "Order not found"}), 404
         
     data = request.get_json()
     new_status = data.get('status')
     if new_status and new_status in ['preparing', 'out_for_delivery', 'delivered', 'cancelled']:
+        apply_status_change(order, order.status, new_status, current_app.config['RESTAURANT_TIMEZONE'])
         order.status = new_status
         db.session.commit()
+        order = order_graph_query(id=order_id).first()
         return jsonify({"success": True, "order": serialize_order(order)}), 200
     return jsonify({"success": False, "message": "Valid status is required"}), 400
 
@@ -216,15 +287,32 @@ def portal_add_menu_item(payload):
     db.session.add(new_item)
     db.session.flush()
 
-    for file in files:
-        if file and allowed_file(file.filename):
-            upload_result = upload_image(file, folder=f"khsa_aljou/menu_items/{new_item.id}")
-            if upload_result:
-                new_image = MenuItemImage(menu_item_id=new_item.id, image_url=upload_result['secure_url'])
-                db.session.add(new_image)
-            
-    db.session.commit()
-    return jsonify({'success': True, 'message': 'Menu item added', 'menu_item': serialize_menu_item(new_item)}), 201
+    # الصور تُرفع في الخلفية بعد الحفظ وتُضاف إلى العنصر عند اكتمالها
+    pending_uploads = []
+    try:
+        for file in files:
+            if file and allowed_file(file.filename):
+                pending_uploads.append(upload_pool.stage(
+                    'menu_item_image', new_item.id, payload['id'], file, f"khsa_aljou/menu_items/{new_item.id}"
+                ))
+        bump_content_version(restaurant.id, menu=True)
+        db.session.commit()
+    except UploadQueueFull:
+        db.session.rollback()
+        upload_pool.discard(pending_uploads)
+        return jsonify({"success": False, "message": "Upload queue is full, please try again shortly"}), 503
+    except Exception:
+        db.session.rollback()
+        upload_pool.discard(pending_uploads)
+        raise
+    upload_pool.dispatch(pending_uploads)
+
+    return jsonify({
+        'success': True,
+        'message': 'Menu item added',
+        'menu_item': serialize_menu_item(new_item),
+        'pending_images': [serialize_upload_job(p.job) for p in pending_uploads]
+    }), 201
 
 
 @portal_bp.route('/menu/<int:item_id>', methods=['PUT'])
@@ -250,6 +338,7 @@ def portal_update_menu_item(payload, item_id):
         removable_ingredients_str = data.get('removable_ingredients')
         menu_item.removable_ingredients = [item.strip() for item in removable_ingredients_str.split(',')]
 
+    bump_content_version(restaurant.id, menu=True)
     db.session.commit()
     return jsonify({'success': True, 'message': 'Menu item updated', 'menu_item': serialize_menu_item(menu_item)}), 200
 
@@ -266,6 +355,7 @@ def portal_delete_menu_item(payload, item_id):
         return jsonify({"success": False, "message": "Menu item not found"}), 404
         
     db.session.delete(menu_item)
+    bump_content_version(restaurant.id, menu=True)
     db.session.commit()
     return jsonify({'success': True, 'message': 'Menu item deleted'}), 200
 
@@ -289,17 +379,18 @@ def portal_add_menu_item_image(payload, item_id):
         return jsonify({'success': False, 'message': 'No selected file'}), 400
 
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        unique_filename = str(uuid.uuid4()) + "_" + filename
-        file.save(os.path.join(current_app.config['UPLOAD_FOLDER'], unique_filename))
-        
-        new_image = MenuItemImage(menu_item_id=item_id, image_url=unique_filename)
+        # تخزين حسب المحتوى: الصورة المكررة لا تُحفظ مرتين ورابطها ثابت
+        key = store_upload(file)
+        full_image_url = content_url(key)
+
+        new_image = MenuItemImage(menu_item_id=item_id, image_url=full_image_url)
         db.session.add(new_image)
+        bump_content_version(restaurant.id, menu=True)
         db.session.commit()
-        
-        backend_url = os.getenv('BACKEND_URL', 'http://localhost:5000')
-        full_image_url = f"{backend_url}/static/uploads/{unique_filename}"
-        
+        # النسخ المصغرة تُولَّد في الخلفية وتظهر في القائمة عند اكتمالها
+        store = content_store()
+        image_variant_pool.submit_menu_item_image(new_image.id, restaurant.id, store.shard_dir(key), key)
+
         return jsonify({'success': True, 'message': 'Image added', 'image': {'id': new_image.id, 'url': full_image_url}}), 201
 
     return jsonify({'success': False, 'message': 'File type not allowed'}), 400
@@ -340,6 +431,7 @@ def remove_team_member(payload, admin_id):
     # إعادته إلى مستخدم عادي وإلغاء ربطه بالمطعم
     admin_to_remove.role = 'customer'
     admin_to_remove.associated_restaurant_id = None
+    invalidate_user_permissions(admin_to_remove.id)
     
     try:
         db.session.commit()
@@ -1,39 +1,205 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app.extensions import db
 from app.models import Restaurant, MenuItem, User
 from sqlalchemy.exc import IntegrityError
 from geoalchemy2.elements import WKTElement
 from geoalchemy2.shape import to_shape
 from sqlalchemy import func
+from sqlalchemy.orm import selectinload
 from app.auth.auth import requires_auth
-from app.utils.serializers import serialize_restaurant, serialize_menu_item
+from app.utils.serializers import serialize_restaurant, serialize_restaurant_summary, serialize_menu_item
+from app.utils.restaurant_queries import restaurant_summary_query, restaurant_detail_options, wants_full_detail, restaurant_search_query, menu_item_search_query, nearby_menu_item_search_query, nearest_restaurants_query
+from app.utils.search import build_tsquery
+from app.utils.geo_sql import geometry_args, restaurant_geometry_options
+from app.utils.pagination import parse_page_size, distance_keyset_paginate
+from app.utils.delivery_index import delivery_index, use_delivery_index, broadcast_delivery_area_change
+from app.utils.catalog_cache import bump_content_version, restaurant_validators, menu_validators, catalog_list_validators, not_modified, with_catalog_headers
+from app.utils.menu_cache import menu_cache
+from app.utils.db_routing import read_only
 
 restaurants_bp = Blueprint('restaurants', __name__)
 
+# Largest page the search endpoints return
+SEARCH_MAX_PAGE_SIZE = 50
+
 # GET /api/restaurants - Get all restaurants (or filter by location)
 @restaurants_bp.route('/', methods=['GET'])
+@read_only
 def get_restaurants():
     # Optional: Filter by customer's location to find deliverable restaurants
     customer_lat = request.args.get('lat', type=float)
     customer_lon = request.args.get('lon', type=float)
 
-    query = Restaurant.query
+    etag, last_modified = catalog_list_validators()
+    cached = not_modified(etag, last_modified)
+    if cached:
+        return cached
+
+    # Summaries by default; ?detail=full embeds the menu and delivery area
+    full_detail = wants_full_detail(request.args)
+    if full_detail:
+        # Delivery areas are simplified for map display unless ?simplify=0; ?precision= sets the decimals
+        try:
+            precision, simplify = geometry_args(request.args, current_app.config['DELIVERY_AREA_LIST_SIMPLIFY_METRES'])
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        query = Restaurant.query.options(*restaurant_detail_options(), *restaurant_geometry_options(precision, simplify))
+    else:
+        query = restaurant_summary_query()
 
     if customer_lat is not None and customer_lon is not None:
-        customer_point = WKTElement(f'POINT({customer_lon} {customer_lat})', srid=4326)
-        # Filter restaurants where the customer's point is within the restaurant's delivery_area
-        query = query.filter(customer_point.ST_Within(Restaurant.delivery_area))
+        if use_delivery_index():
+            # The containment test runs against the in-memory index; the DB only fetches the rows
+            query = query.filter(Restaurant.id.in_(delivery_index.restaurants_delivering_to(customer_lon, customer_lat)))
+        else:
+            customer_point = WKTElement(f'POINT({customer_lon} {customer_lat})', srid=4326)
+            # Filter restaurants where the customer's point is within the restaurant's delivery_area
+            query = query.filter(customer_point.ST_Within(Restaurant.delivery_area))
 
     restaurants = query.all()
-    return jsonify([serialize_restaurant(r) for r in restaurants]), 200
+    if full_detail:
+        response = jsonify([serialize_restaurant(r) for r in restaurants])
+    else:
+        response = jsonify([serialize_restaurant_summary(r) for r in restaurants])
+    return with_catalog_headers(response, etag, last_modified), 200
+
+# GET /api/restaurants/nearby?lat=&lon=&limit=&after=&radius= - Active restaurants nearest to the point first
+@restaurants_bp.route('/nearby', methods=['GET'])
+@read_only
+def get_nearby_restaurants():
+    """
+    ترجع المطاعم النشطة مرتبة حسب المسافة من النقطة (سواء رسمت منطقة توصيل أم لا)
+    مع المسافة بالأمتار لكل مطعم. radius اختياري (بالأمتار). الترقيم بالمؤشر عبر limit و after.
+    """
+    customer_lat = request.args.get('lat', type=float)
+    customer_lon = request.args.get('lon', type=float)
+    if customer_lat is None or customer_lon is None:
+        return jsonify({'message': "Query parameters 'lat' and 'lon' are required"}), 400
+    if not (-90 <= customer_lat <= 90 and -180 <= customer_lon <= 180):
+        return jsonify({'message': 'Invalid coordinates'}), 400
+    radius = request.args.get('radius', type=float)
+    if radius is not None and radius <= 0:
+        return jsonify({'message': 'Invalid radius'}), 400
+
+    query, distance = nearest_restaurants_query(customer_lon, customer_lat, max_distance=radius)
+    try:
+        limit = parse_page_size(request.args.get('limit'), maximum=SEARCH_MAX_PAGE_SIZE)
+        rows, next_cursor = distance_keyset_paginate(query, distance, Restaurant, limit, request.args.get('after'))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    return jsonify({
+        'restaurants': [dict(serialize_restaurant_summary(row), distance_m=round(row.distance, 1)) for row in rows],
+        'next_cursor': next_cursor
+    }), 200
 
 # GET /api/restaurants/<id> - Get a single restaurant by ID
 @restaurants_bp.route('/<int:restaurant_id>', methods=['GET'])
+@read_only
 def get_restaurant(restaurant_id):
-    restaurant = Restaurant.query.get(restaurant_id)
+    validators = restaurant_validators(restaurant_id)
+    if not validators:
+        return jsonify({'message': 'Restaurant not found'}), 404
+    cached = not_modified(*validators)
+    if cached:
+        return cached
+
+    try:
+        precision, simplify = geometry_args(request.args)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    restaurant = Restaurant.query.options(
+        *restaurant_detail_options(), *restaurant_geometry_options(precision, simplify)
+    ).get(restaurant_id)
     if not restaurant:
         return jsonify({'message': 'Restaurant not found'}), 404
-    return jsonify(serialize_restaurant(restaurant)), 200
+    return with_catalog_headers(jsonify(serialize_restaurant(restaurant)), *validators), 200
+
+def parse_search_args():
+    """(tsquery, page, per_page) from ?q=&page=&per_page=; raises ValueError for a missing query or bad numbers."""
+    tsquery = build_tsquery(request.args.get('q', ''))
+    if tsquery is None:
+        raise ValueError("Search query parameter 'q' is required")
+    page = int(request.args.get('page', 1))
+    if page < 1:
+        raise ValueError("Invalid page")
+    return tsquery, page, parse_page_size(request.args.get('per_page'), maximum=SEARCH_MAX_PAGE_SIZE)
+
+# GET /api/restaurants/search?q= - Ranked full-text search over active restaurants
+@restaurants_bp.route('/search', methods=['GET'])
+@read_only
+def search_restaurants():
+    try:
+        tsquery, page, per_page = parse_search_args()
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    # One extra row tells whether another page exists, without a COUNT
+    rows = (
+        restaurant_search_query(tsquery)
+        .filter(Restaurant.status == 'active')
+        .offset((page - 1) * per_page)
+        .limit(per_page + 1)
+        .all()
+    )
+    return jsonify({
+        'restaurants': [dict(serialize_restaurant_summary(row), rank=row.rank) for row in rows[:per_page]],
+        'page': page,
+        'per_page': per_page,
+        'has_more': len(rows) > per_page
+    }), 200
+
+# GET /api/restaurants/menu-items/search?q= - Ranked full-text search over available menu items
+@restaurants_bp.route('/menu-items/search', methods=['GET'])
+@read_only
+def search_menu_items():
+    try:
+        tsquery, page, per_page = parse_search_args()
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    rows = menu_item_search_query(tsquery).offset((page - 1) * per_page).limit(per_page + 1).all()
+    return jsonify({
+        'items': [
+            dict(serialize_menu_item(item), restaurant_name=restaurant_name, rank=rank)
+            for item, restaurant_name, rank in rows[:per_page]
+        ],
+        'page': page,
+        'per_page': per_page,
+        'has_more': len(rows) > per_page
+    }), 200
+
+# GET /api/restaurants/menu-items/nearby?lat=&lon=&q= - Menu item search limited to restaurants delivering to the point
+@restaurants_bp.route('/menu-items/nearby', methods=['GET'])
+@read_only
+def search_nearby_menu_items():
+    customer_lat = request.args.get('lat', type=float)
+    customer_lon = request.args.get('lon', type=float)
+    if customer_lat is None or customer_lon is None:
+        return jsonify({'message': "Query parameters 'lat' and 'lon' are required"}), 400
+    if not (-90 <= customer_lat <= 90 and -180 <= customer_lon <= 180):
+        return jsonify({'message': 'Invalid coordinates'}), 400
+    try:
+        tsquery, page, per_page = parse_search_args()
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    # Coverage, text match, ranking and paging in a single statement (images follow in one batched query)
+    rows = (
+        nearby_menu_item_search_query(tsquery, customer_lon, customer_lat)
+        .offset((page - 1) * per_page)
+        .limit(per_page + 1)
+        .all()
+    )
+    return jsonify({
+        'items': [
+            dict(serialize_menu_item(item), restaurant_name=restaurant_name, rank=rank)
+            for item, restaurant_name, rank in rows[:per_page]
+        ],
+        'page': page,
+        'per_page': per_page,
+        'has_more': len(rows) > per_page
+    }), 200
 
 # POST /api/restaurants - Create a new restaurant (Manager only)
 @restaurants_bp.route('/', methods=['POST'])
@@ -86,6 +252,8 @@ def create_restaurant(payload):
             manager_id=user_id
         )
         db.session.add(new_restaurant)
+        db.session.flush()
+        broadcast_delivery_area_change(db.session, [new_restaurant.id])
         db.session.commit()
         return jsonify({'message': 'Restaurant created successfully', 'restaurant': serialize_restaurant(new_restaurant)}), 201
     except IntegrityError:
@@ -99,13 +267,26 @@ def create_restaurant(payload):
 
 # GET /api/restaurants/<restaurant_id>/menu - Get menu items for a specific restaurant
 @restaurants_bp.route('/<int:restaurant_id>/menu', methods=['GET'])
+@read_only
 def get_restaurant_menu(restaurant_id):
-    restaurant = Restaurant.query.get(restaurant_id)
-    if not restaurant:
+    validators = menu_validators(restaurant_id)
+    if not validators:
         return jsonify({'message': 'Restaurant not found'}), 404
-    
-    menu_items = MenuItem.query.filter_by(restaurant_id=restaurant_id).all()
-    return jsonify([serialize_menu_item(item) for item in menu_items]), 200
+    menu_version, etag, last_modified = validators
+    cached = not_modified(etag, last_modified)
+    if cached:
+        return cached
+
+    # The serialized body is cached per menu_version, so a hit skips both the query and serialization
+    body = menu_cache.get(restaurant_id, menu_version) if menu_cache.enabled else None
+    if body is not None:
+        response = current_app.response_class(body, mimetype=current_app.json.mimetype)
+    else:
+        menu_items = MenuItem.query.options(selectinload(MenuItem.images)).filter_by(restaurant_id=restaurant_id).all()
+        response = jsonify([serialize_menu_item(item) for item in menu_items])
+        if menu_cache.enabled:
+            menu_cache.put(restaurant_id, menu_version, response.get_data())
+    return with_catalog_headers(response, etag, last_modified), 200
 
 # POST /api/restaurants/<restaurant_id>/menu - Add a new menu item (Manager only)
 @restaurants_bp.route('/<int:restaurant_id>/menu', methods=['POST'])
@@ -135,6 +316,7 @@ def add_menu_item(payload, restaurant_id):
             is_available=is_available
         )
         db.session.add(new_item)
+        bump_content_version(restaurant_id, menu=True)
         db.session.commit()
         return jsonify({'message': 'Menu item added successfully', 'menu_item': serialize_menu_item(new_item)}), 201
     except Exception as e:
@@ -168,6 +350,7 @@ def update_menu_item(payload, restaurant_id, item_id):
     menu_item.is_available = data.get('is_available', menu_item.is_available)
 
     try:
+        bump_content_version(restaurant_id, menu=True)
         db.session.commit()
         return jsonify({'message': 'Menu item updated successfully', 'menu_item': serialize_menu_item(menu_item)}), 200
     except Exception as e:
@@ -196,6 +379,7 @@ def delete_menu_item(payload, restaurant_id, item_id):
 
     try:
         db.session.delete(menu_item)
+        bump_content_version(restaurant_id, menu=True)
         db.session.commit()
         return jsonify({'message': 'Menu item deleted successfully'}), 200
     except Exception as e:
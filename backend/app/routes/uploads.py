@@ -0,0 +1,21 @@
+from flask import Blueprint, jsonify
+from app.extensions import db
+from app.models import UploadJob
+from app.auth.auth import requires_auth
+from app.utils.serializers import serialize_upload_job
+from app.utils.image_uploads import upload_pool
+
+uploads_bp = Blueprint('uploads_bp', __name__)
+
+@uploads_bp.route('/<string:job_id>', methods=['GET'])
+@requires_auth(allowed_roles=['customer', 'restaurant_admin', 'restaurant_manager', 'manager', 'admin'])
+def get_upload_job(payload, job_id):
+    """حالة مهمة رفع صورة (لصاحبها أو للإدارة فقط)."""
+    job = UploadJob.query.get(job_id)
+    if not job or (job.user_id != payload['id'] and payload['role'] not in ['manager', 'admin']):
+        return jsonify({"success": False, "message": "Upload job not found"}), 404
+    if upload_pool.is_abandoned(job):
+        # العملية التي تحمل الملف توقفت؛ تُعلَّم المهمة فاشلة بدلاً من بقائها معلقة إلى الأبد
+        upload_pool.fail_abandoned_jobs()
+        db.session.refresh(job)
+    return jsonify({"success": True, "job": serialize_upload_job(job)}), 200
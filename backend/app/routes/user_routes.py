@@ -2,15 +2,15 @@ from flask import Blueprint, request, jsonify, current_app
 from app.extensions import db
 from app.models import User, RestaurantApplication, UserAddress
 from app.auth.auth import requires_auth
-from app.utils.serializers import serialize_user, serialize_user_address
+from app.utils.serializers import serialize_user, serialize_user_address, serialize_upload_job
 from app.utils.auth_helpers import generate_verification_code, generate_numeric_otp
 from app.utils.email_utils import send_email_verification_code
 from app.utils.sms_utils import send_sms_verification_email
-from app.utils.cloudinary_utils import upload_image, delete_image, extract_public_id_from_url
-from werkzeug.utils import secure_filename
+from app.utils.image_uploads import upload_pool, UploadQueueFull
+from app.utils.image_variants import image_variant_pool
+from app.utils.content_store import store_upload, content_store, content_url
+from app.utils.geo_sql import address_geometry_options
 from geoalchemy2.elements import WKTElement
-import os
-import uuid
 import json
 
 user_bp = Blueprint('user_bp', __name__)
@@ -57,20 +57,13 @@ def update_user_profile(payload):
         response_messages.append("تم تحديث الاسم.")
 
     # --- 3. تحديث الصورة الشخصية (رفع ملف) ---
+    # الصورة تُرفع في الخلفية بعد الحفظ؛ الصورة القديمة تُحذف بعد نجاح رفع الجديدة
+    profile_file = None
     if 'profile_image' in request.files:
         file = request.files['profile_image']
         if file and file.filename != '' and allowed_file(file.filename):
-            if user.profile_image_url:
-                public_id = extract_public_id_from_url(user.profile_image_url)
-                if public_id:
-                    delete_image(public_id)
-
-            upload_result = upload_image(file, folder="khsa_aljou/user_profiles")
-            if upload_result:
-                user.profile_image_url = upload_result['secure_url']
-                response_messages.append("تم تحديث الصورة الشخصية.")
-            else:
-                return jsonify({"success": False, "message": "فشل رفع الصورة"}), 500
+            profile_file = file
+            response_messages.append("جارٍ رفع الصورة الشخصية.")
         elif file and file.filename != '':
             return jsonify({"success": False, "message": "نوع الملف غير مسموح به"}), 400
 
@@ -106,17 +99,27 @@ def update_user_profile(payload):
     if not response_messages and 'profile_image' not in request.files:
         return jsonify({"success": False, "message": "لم يتم تقديم أي بيانات للتحديث"}), 400
 
+    pending_uploads = []
     try:
+        if profile_file:
+            pending_uploads.append(upload_pool.stage('profile_image', user.id, user.id, profile_file, "khsa_aljou/user_profiles"))
         db.session.commit()
-        return jsonify({
-            "success": True, 
-            "message": " ".join(response_messages),
-            "re_verification_needed": re_verification_needed,
-            "user": serialize_user(user)
-        }), 200
+    except UploadQueueFull:
+        db.session.rollback()
+        return jsonify({"success": False, "message": "Upload queue is full, please try again shortly"}), 503
     except Exception as e:
         db.session.rollback()
+        upload_pool.discard(pending_uploads)
         return jsonify({"success": False, "message": f"An error occurred: {str(e)}"}), 500
+    upload_pool.dispatch(pending_uploads)
+
+    return jsonify({
+        "success": True, 
+        "message": " ".join(response_messages),
+        "re_verification_needed": re_verification_needed,
+        "user": serialize_user(user),
+        "pending_upload": serialize_upload_job(pending_uploads[0].job) if pending_uploads else None
+    }), 200
     
 @user_bp.route('/apply_restaurant_manager', methods=['POST'])
 @requires_auth(allowed_roles=['customer'])
@@ -134,14 +137,12 @@ def apply_for_restaurant_manager(payload):
     if existing_app:
         return jsonify({"success": False, "message": "لديك طلب قيد المراجعة بالفعل"}), 409
 
-    logo_filename = None
+    logo_key = None
     if 'logo' in request.files:
         file = request.files['logo']
         if file and file.filename != '' and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            logo_filename = str(uuid.uuid4()) + "_" + filename
-            file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], logo_filename)
-            file.save(file_path)
+            # نفس الشعار المرفوع أكثر من مرة يُخزَّن مرة واحدة
+            logo_key = store_upload(file)
         elif file and file.filename != '':
             return jsonify({"success": False, "message": "نوع ملف الشعار غير مسموح به"}), 400
 
@@ -158,7 +159,7 @@ def apply_for_restaurant_manager(payload):
         user_id=user.id,
         restaurant_name=data['restaurant_name'],
         description=data.get('description'),
-        logo_url=logo_filename,
+        logo_url=content_url(logo_key) if logo_key else None,
         address=data['address'],
         location_lat=float(data['location_lat']),
         location_lon=float(data['location_lon']),
@@ -166,6 +167,8 @@ def apply_for_restaurant_manager(payload):
     )
     db.session.add(new_application)
     db.session.commit()
+    if logo_key:
+        image_variant_pool.submit_logo(content_store().shard_dir(logo_key), logo_key)
 
     return jsonify({"success": True, "message": "تم إرسال طلبك المفصل بنجاح."}), 201
 
@@ -216,13 +219,14 @@ def get_user_addresses(payload):
     if not user:
         return jsonify({"success": False, "message": "User not found"}), 404
         
-    return jsonify([serialize_user_address(addr) for addr in user.addresses]), 200
+    addresses = UserAddress.query.options(*address_geometry_options()).filter_by(user_id=user.id).order_by(UserAddress.id).all()
+    return jsonify([serialize_user_address(addr) for addr in addresses]), 200
 
 @user_bp.route('/me/addresses/default', methods=['GET'])
 @requires_auth(allowed_roles=['customer', 'restaurant_admin', 'restaurant_manager', 'manager', 'admin'])
 def get_default_address(payload):
     """جلب العنوان الافتراضي للمستخدم الحالي."""
-    default_address = UserAddress.query.filter_by(user_id=payload['id'], is_default=True).first()
+    default_address = UserAddress.query.options(*address_geometry_options()).filter_by(user_id=payload['id'], is_default=True).first()
     if not default_address:
         return jsonify({"success": False, "message": "No default address has been set."}), 404
         
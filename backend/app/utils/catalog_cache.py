@@ -0,0 +1,103 @@
+from flask import request, current_app, Response
+from sqlalchemy import func, update
+from app.extensions import db
+from app.models import Restaurant
+
+# يُرفع عند تغيير شكل JSON في واجهات الكتالوج حتى لا تُعاد نسخ قديمة مخزنة لدى العملاء
+CATALOG_SCHEMA_VERSION = 4
+
+
+def bump_content_version(restaurant_id, menu=False):
+    """
+    Increments the restaurant's content_version (and menu_version when the
+    menu changed) in the caller's transaction.
+    The UPDATE locks the restaurant row, so concurrent writers to the same
+    restaurant are serialized and every committed change gets its own version.
+    """
+    table = Restaurant.__table__
+    values = {'content_version': table.c.content_version + 1, 'updated_at': func.now()}
+    if menu:
+        values['menu_version'] = table.c.menu_version + 1
+    db.session.execute(update(table).where(table.c.id == restaurant_id).values(**values))
+
+
+def last_modified_column():
+    return func.coalesce(Restaurant.updated_at, Restaurant.created_at)
+
+
+def restaurant_validators(restaurant_id):
+    """
+    (etag, last_modified) for a restaurant's detail representation, read
+    without loading the row; None if the restaurant does not exist.
+    """
+    row = db.session.query(Restaurant.content_version, last_modified_column()).filter(
+        Restaurant.id == restaurant_id
+    ).first()
+    if row is None:
+        return None
+    version, last_modified = row
+    return f'restaurant-{restaurant_id}-v{version}-s{CATALOG_SCHEMA_VERSION}', last_modified
+
+
+def menu_validators(restaurant_id):
+    """
+    (menu_version, etag, last_modified) for a restaurant's menu; None if the
+    restaurant does not exist. menu_version is also the server-side cache key.
+    """
+    row = db.session.query(Restaurant.menu_version, last_modified_column()).filter(
+        Restaurant.id == restaurant_id
+    ).first()
+    if row is None:
+        return None
+    version, last_modified = row
+    return version, f'menu-{restaurant_id}-v{version}-s{CATALOG_SCHEMA_VERSION}', last_modified
+
+
+def catalog_list_validators():
+    """
+    (etag, last_modified) for the restaurant list. The count and max id change
+    on inserts and deletes, the version sum on any content change.
+    """
+    count, max_id, version_sum, last_modified = db.session.query(
+        func.count(Restaurant.id),
+        func.coalesce(func.max(Restaurant.id), 0),
+        func.coalesce(func.sum(Restaurant.content_version), 0),
+        func.max(last_modified_column())
+    ).one()
+    return f'restaurants-{count}-{max_id}-{version_sum}-s{CATALOG_SCHEMA_VERSION}', last_modified
+
+
+def not_modified(etag, last_modified):
+    """
+    A 304 response if the request's validators match, otherwise None.
+    If-None-Match takes precedence over If-Modified-Since (RFC 9110).
+    """
+    if request.if_none_match:
+        matched = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since and last_modified is not None:
+        matched = last_modified.replace(microsecond=0) <= request.if_modified_since
+    else:
+        matched = False
+    if not matched:
+        return None
+    return with_catalog_headers(Response(status=304), etag, last_modified)
+
+
+def with_catalog_headers(response, etag, last_modified):
+    """
+    Adds ETag, Last-Modified and Cache-Control to a catalog response.
+    Anonymous reads are public and cacheable for CATALOG_MAX_AGE_SECONDS, then
+    must be revalidated; requests carrying credentials are kept out of shared caches.
+    """
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    if 'Authorization' not in request.headers:
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config['CATALOG_MAX_AGE_SECONDS']
+        response.cache_control.must_revalidate = True
+    else:
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+    response.vary.add('Authorization')
+    return response
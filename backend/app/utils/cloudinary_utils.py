@@ -35,6 +35,15 @@ def delete_image(public_id):
         print(f"Cloudinary deletion failed: {e}")
         return False
 
+def delete_images(public_ids):
+    """
+    حذف مجموعة صور من Cloudinary بطلب واحد (بحد أقصى 100 معرف لكل طلب).
+    ترفع استثناء عند الفشل حتى يعيد المستدعي المحاولة.
+    :return: قاموس {public_id: 'deleted' أو 'not_found'}.
+    """
+    result = cloudinary.api.delete_resources(list(public_ids), resource_type="image")
+    return result.get("deleted", {})
+
 def extract_public_id_from_url(url):
     """
     دالة لاستخراج public_id من رابط Cloudinary.
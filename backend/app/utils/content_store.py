@@ -0,0 +1,82 @@
+import hashlib
+import os
+import re
+import tempfile
+from flask import current_app
+
+# الملفات تُخزَّن باسم بصمتها (sha256) فلا يتغير محتوى أي رابط أبداً
+CONTENT_KEY_PATTERN = re.compile(r'^([0-9a-f]{64})(\.[a-z0-9.]+)?$')
+CHUNK_SIZE = 64 * 1024
+
+
+class ContentStore:
+    """
+    Content-addressed file store under <UPLOAD_FOLDER>/cas.
+    A file's key is '<sha256>.<ext>' and it lives in a two-character shard
+    directory (cas/ab/ab12….png). Uploads are streamed to a temporary file in
+    the same directory while hashing, then renamed into place; if the key
+    already exists the copy is dropped, so identical uploads share one file.
+    Files are never modified or deleted once stored, which is what makes
+    their URLs safe to cache forever.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def shard_dir(self, key):
+        return os.path.join(self.root, key[:2])
+
+    def path(self, key):
+        return os.path.join(self.shard_dir(key), key)
+
+    def put(self, stream, extension):
+        """Stores a binary stream; returns (key, created)."""
+        os.makedirs(self.root, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=self.root, prefix='.incoming-')
+        try:
+            with os.fdopen(fd, 'wb') as temp:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    temp.write(chunk)
+            key = digest.hexdigest() + (f'.{extension.lower()}' if extension else '')
+            target = self.path(key)
+            if os.path.exists(target):
+                os.unlink(temp_path)
+                return key, False
+            os.makedirs(self.shard_dir(key), exist_ok=True)
+            os.chmod(temp_path, 0o644)
+            # rename ذري داخل نفس نظام الملفات؛ رفعتان متزامنتان لنفس المحتوى تنتجان الملف نفسه
+            os.replace(temp_path, target)
+            return key, True
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+
+def content_store():
+    return ContentStore(os.path.join(current_app.config['UPLOAD_FOLDER'], 'cas'))
+
+
+def store_upload(file):
+    """
+    Stores a werkzeug FileStorage in the content store and returns its key.
+    The extension comes from the (already validated) client filename.
+    """
+    extension = file.filename.rsplit('.', 1)[1] if '.' in file.filename else ''
+    key, _ = content_store().put(file.stream, extension)
+    return key
+
+
+def is_content_key(name):
+    return CONTENT_KEY_PATTERN.match(name) is not None
+
+
+def content_url(key):
+    """Public, immutable URL of a stored file or of one of its derivatives."""
+    backend_url = os.getenv('BACKEND_URL', 'http://localhost:5000')
+    return f"{backend_url}/media/{key}"
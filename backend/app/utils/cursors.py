@@ -0,0 +1,35 @@
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(data: dict) -> str:
+    """
+    Encodes a dict into an opaque, URL-safe cursor string.
+    datetime values are stored as ISO-8601 strings.
+    """
+    serializable = {k: (v.isoformat() if isinstance(v, datetime) else v) for k, v in data.items()}
+    raw = json.dumps(serializable, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> dict:
+    """
+    Decodes a cursor produced by encode_cursor.
+    Raises ValueError if the cursor is malformed.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(data, dict):
+        raise ValueError("Invalid cursor")
+    return data
+
+
+def parse_cursor_datetime(value) -> datetime:
+    """Parses an ISO-8601 timestamp stored inside a cursor."""
+    if not isinstance(value, str):
+        raise ValueError("Invalid cursor timestamp")
+    return datetime.fromisoformat(value)
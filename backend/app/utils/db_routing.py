@@ -0,0 +1,163 @@
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.selectable import Select, CompoundSelect
+
+# مفتاح الربط في SQLALCHEMY_BINDS لنسخة القراءة
+REPLICA_BIND = 'replica'
+
+# تأخر النسخة بالثواني: صفر إذا لم تكن في وضع الاستعادة، أو إذا كان مستقبل WAL متصلاً (streaming)
+# وأعادت تطبيق كل ما استلمته؛ وإلا عمر آخر معاملة أُعيد تطبيقها (NULL إذا لم تُطبَّق أي معاملة بعد).
+# نسخة انقطع عنها WAL يزداد تأخرها مع الوقت بدلاً من أن تبدو متزامنة.
+# قراءة status في pg_stat_wal_receiver تتطلب دور pg_read_all_stats؛ بدونه يُحسب التأخر من وقت آخر معاملة دائماً
+REPLICA_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+         AND EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN 0
+    ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+END
+"""
+
+
+class ReplicaRouter:
+    """
+    Per-process view of the read replica's health.
+    The replay lag is measured at most once per check_interval seconds, by
+    whichever request asks first; concurrent requests use the last result
+    instead of waiting. A replica that lags more than max_lag seconds, or
+    cannot be reached, is skipped until a later check finds it caught up.
+    """
+
+    def __init__(self, max_lag=5, check_interval=2):
+        self.enabled = False
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._engine = None
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._usable = False
+        self.last_lag = None
+        self.last_error = None
+        self.replica_requests = 0
+        self.primary_fallbacks = 0
+
+    def configure(self, engine, max_lag, check_interval):
+        with self._lock:
+            self._engine = engine
+            self.enabled = engine is not None
+            self.max_lag = max_lag
+            self.check_interval = check_interval
+            self._checked_at = 0.0
+            self._usable = False
+
+    def replica_usable(self):
+        """True if read-only requests may use the replica right now."""
+        if not self.enabled:
+            return False
+        if time.monotonic() - self._checked_at >= self.check_interval and self._lock.acquire(blocking=False):
+            try:
+                self._refresh()
+            finally:
+                self._lock.release()
+        if self._usable:
+            self.replica_requests += 1
+        else:
+            self.primary_fallbacks += 1
+        return self._usable
+
+    def _refresh(self):
+        try:
+            with self._engine.connect() as connection:
+                lag = connection.execute(text(REPLICA_LAG_SQL)).scalar()
+            self.last_lag = float(lag) if lag is not None else None
+            self.last_error = None
+            self._usable = self.last_lag is not None and self.last_lag <= self.max_lag
+        except Exception as e:
+            if self.last_error is None:
+                print(f"Read replica unavailable, reading from the primary: {e}")
+            self.last_error = str(e)
+            self.last_lag = None
+            self._usable = False
+        self._checked_at = time.monotonic()
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'usable': self._usable,
+            'lag_seconds': self.last_lag,
+            'max_lag_seconds': self.max_lag,
+            'last_error': self.last_error,
+            'replica_requests': self.replica_requests,
+            'primary_fallbacks': self.primary_fallbacks,
+        }
+
+
+replica_router = ReplicaRouter()
+
+
+class RoutingSession(Session):
+    """
+    db.session class that sends plain SELECTs to the replica bind during
+    requests marked with read_only (see replica_router for the lag check).
+    Flushes, INSERT/UPDATE/DELETE, SELECT ... FOR UPDATE and text() statements
+    always use the primary, and once a request has written, its later reads
+    go to the primary too so it reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._use_replica(clause):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self, clause):
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.info['wrote'] = True
+            return False
+        if self.info.get('wrote') or not (has_app_context() and g.get('db_read_replica')):
+            return False
+        return isinstance(clause, (Select, CompoundSelect)) and clause._for_update_arg is None
+
+
+def read_only(view):
+    """
+    Marks a view as safe to serve from the read replica: it only reads, and
+    tolerates data up to REPLICA_MAX_LAG_SECONDS old. Place it below
+    requires_auth so that the session checks still read the primary; lookups
+    made inside the view (permissions, shared caches) must use primary_reads.
+    """
+    @wraps(view)
+    def decorated(*args, **kwargs):
+        g.db_read_replica = replica_router.replica_usable()
+        return view(*args, **kwargs)
+    return decorated
+
+
+@contextmanager
+def primary_reads():
+    """
+    Sends the block's queries to the primary even inside a read_only request:
+    for permission checks, and for caches shared with requests that must not
+    see replica lag.
+    """
+    previous = g.get('db_read_replica')
+    g.db_read_replica = False
+    try:
+        yield
+    finally:
+        g.db_read_replica = previous
+
+
+def init_replica_routing(app):
+    """Points replica_router at the replica engine when REPLICA_DATABASE_URL is set."""
+    from app.extensions import db
+    engine = None
+    if REPLICA_BIND in app.config.get('SQLALCHEMY_BINDS', {}):
+        with app.app_context():
+            engine = db.engines[REPLICA_BIND]
+    replica_router.configure(engine, app.config['REPLICA_MAX_LAG_SECONDS'], app.config['REPLICA_LAG_CHECK_SECONDS'])
@@ -0,0 +1,159 @@
+import threading
+from shapely import wkb
+from shapely.geometry import Point
+from shapely.prepared import prep
+from shapely.strtree import STRtree
+from sqlalchemy import func
+from app.extensions import db
+from app.models import Restaurant
+from app.utils.pg_listener import pg_listener, notify
+from app.utils.db_routing import primary_reads
+
+# القناة التي تُبث عليها تغييرات مناطق التوصيل بين العمال
+DELIVERY_AREA_CHANNEL = 'delivery_area_changes'
+
+
+class DeliveryAreaIndex:
+    """
+    Per-worker STRtree over prepared delivery-area polygons, so "which restaurants
+    deliver to this point" and "does restaurant X deliver here" are answered in
+    memory instead of with a PostGIS round trip.
+    Polygons are loaded once, then reloaded one restaurant at a time when a
+    change is announced on DELIVERY_AREA_CHANNEL; the tree itself is immutable
+    and is re-packed lazily on the next lookup after a change.
+    Matches ST_Within semantics: a point on the boundary is outside.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._polygons = {}
+        self._restaurant_ids = set()
+        self._loaded = False
+        self._stale_ids = set()
+        self._snapshot = None
+        self.full_loads = 0
+        self.partial_reloads = 0
+        self.lookups = 0
+
+    def configure(self, enabled):
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        """Forces a full reload on the next lookup."""
+        with self._lock:
+            self._loaded = False
+            self._snapshot = None
+
+    def mark_stale(self, restaurant_ids):
+        with self._lock:
+            self._stale_ids.update(restaurant_ids)
+
+    def apply_notification(self, data):
+        self.mark_stale(data.get('restaurants', []))
+
+    def _refresh(self):
+        """Brings the index up to date; must run inside an app context."""
+        with self._lock:
+            loaded = self._loaded
+            stale_ids, self._stale_ids = self._stale_ids, set()
+        if loaded and not stale_ids and self._snapshot is not None:
+            return self._snapshot
+
+        # الفهرس مشترك بين كل الطلبات، فيُقرأ من القاعدة الرئيسية حتى لا يُخزَّن مضلع قديم من نسخة متأخرة
+        try:
+            with primary_reads():
+                query = db.session.query(Restaurant.id, func.ST_AsBinary(Restaurant.delivery_area))
+                if loaded:
+                    query = query.filter(Restaurant.id.in_(stale_ids))
+                rows = query.all()
+        except Exception:
+            # تُعاد المعرفات حتى يُعاد تحميلها في البحث التالي بدلاً من بقاء مضلعاتها القديمة
+            with self._lock:
+                self._stale_ids.update(stale_ids)
+            raise
+
+        with self._lock:
+            if not loaded:
+                self._polygons = {}
+                self._restaurant_ids = set()
+                self.full_loads += 1
+            else:
+                for restaurant_id in stale_ids:
+                    self._polygons.pop(restaurant_id, None)
+                    self._restaurant_ids.discard(restaurant_id)
+                self.partial_reloads += 1
+            for restaurant_id, area in rows:
+                self._restaurant_ids.add(restaurant_id)
+                if area is not None:
+                    polygon = wkb.loads(bytes(area))
+                    self._polygons[restaurant_id] = (polygon, prep(polygon))
+
+            ids = list(self._polygons)
+            tree = STRtree([self._polygons[i][0] for i in ids]) if ids else None
+            prepared = [self._polygons[i][1] for i in ids]
+            # مطاعم بلا منطقة توصيل تقبل أي عنوان، مثل السلوك السابق في create_order
+            unrestricted = frozenset(self._restaurant_ids - set(ids))
+            self._snapshot = (tree, ids, prepared, unrestricted)
+            self._loaded = True
+            return self._snapshot
+
+    def restaurants_delivering_to(self, lon, lat):
+        """IDs of restaurants whose delivery area contains the point."""
+        tree, ids, prepared, _ = self._refresh()
+        self.lookups += 1
+        if tree is None:
+            return []
+        point = Point(lon, lat)
+        return [ids[i] for i in tree.query(point) if prepared[i].contains(point)]
+
+    def delivers_to(self, restaurant_id, lon, lat):
+        """True if the restaurant has no delivery area or its area contains the point."""
+        tree, ids, prepared, unrestricted = self._refresh()
+        self.lookups += 1
+        if restaurant_id in unrestricted:
+            return True
+        point = Point(lon, lat)
+        if tree is None:
+            return False
+        return any(ids[i] == restaurant_id and prepared[i].contains(point) for i in tree.query(point))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'polygons': len(self._polygons),
+                'loaded': self._loaded,
+                'stale': len(self._stale_ids),
+                'full_loads': self.full_loads,
+                'partial_reloads': self.partial_reloads,
+                'lookups': self.lookups
+            }
+
+
+delivery_index = DeliveryAreaIndex()
+pg_listener.subscribe(DELIVERY_AREA_CHANNEL, delivery_index.apply_notification, on_reset=delivery_index.reset)
+
+
+def init_delivery_index(app):
+    """Applies DELIVERY_INDEX_ENABLED to the process-wide index."""
+    delivery_index.configure(app.config['DELIVERY_INDEX_ENABLED'])
+
+
+def use_delivery_index():
+    """True when lookups should go to the in-memory index; starts the listener on first use."""
+    if not delivery_index.enabled:
+        return False
+    pg_listener.ensure_started(db.engine)
+    return True
+
+
+def broadcast_delivery_area_change(db_session, restaurant_ids):
+    """
+    Marks restaurants for reload in this worker and queues a NOTIFY for the others.
+    Call before db.session.commit(); the NOTIFY is delivered only if the transaction commits.
+    """
+    restaurant_ids = list(restaurant_ids)
+    delivery_index.mark_stale(restaurant_ids)
+    notify(db_session, DELIVERY_AREA_CHANNEL, {'restaurants': restaurant_ids})
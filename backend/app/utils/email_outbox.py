@@ -0,0 +1,276 @@
+import os
+import smtplib
+import socket
+import ssl
+import threading
+import time
+from datetime import timedelta
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from sqlalchemy import select, update, func
+from app.extensions import db
+from app.models import EmailOutbox
+from app.utils.pg_listener import pg_listener, notify
+
+# قناة إيقاظ عمال الإرسال فور إضافة رسالة جديدة بدلاً من انتظار دورة الاستطلاع
+OUTBOX_CHANNEL = 'email_outbox'
+
+
+class PermanentDeliveryError(Exception):
+    """The server rejected the message itself; retrying will not help."""
+
+
+class SmtpMailer:
+    """
+    One SMTP connection that stays open and authenticated between messages.
+    Not thread-safe: each outbox worker thread owns its own mailer.
+    Settings come from the same MAIL_* environment variables as before;
+    MAIL_USERNAME/MAIL_PASSWORD are optional so a local debugging server
+    (e.g. python -m aiosmtpd -n -l localhost:1025 with MAIL_USE_TLS=False) works.
+    """
+
+    def __init__(self, idle_timeout=60):
+        self.idle_timeout = idle_timeout
+        self.server = os.getenv("MAIL_SERVER")
+        self.port = int(os.getenv("MAIL_PORT", 587))
+        self.username = os.getenv("MAIL_USERNAME")
+        self.password = os.getenv("MAIL_PASSWORD")
+        self.use_tls = os.getenv("MAIL_USE_TLS", "True").lower() == 'true'
+        self.use_ssl = os.getenv("MAIL_USE_SSL", "False").lower() == 'true'
+        self.sender_email = os.getenv("MAIL_SENDER_EMAIL")
+        sender_name = os.getenv("MAIL_SENDER_NAME")
+        self.from_header = f"{sender_name} <{self.sender_email}>" if sender_name else self.sender_email
+        # نطاق Message-ID: نطاق المرسل، وإلا اسم الخادم
+        self.message_id_domain = (self.sender_email or '').rpartition('@')[2] or socket.getfqdn()
+        self._smtp = None
+        self._last_used = 0
+        self.connections_opened = 0
+
+    def build_message(self, outbox_id, to_email, subject, body):
+        msg = MIMEMultipart()
+        msg['From'] = self.from_header
+        msg['To'] = to_email
+        msg['Subject'] = subject
+        # معرّف ثابت لكل رسالة في الصندوق (بلا وقت أو رقم عشوائي) حتى يتعرف المستلم على التكرار عند إعادة المحاولة
+        msg['Message-ID'] = f"<outbox-{outbox_id}@{self.message_id_domain}>"
+        msg.attach(MIMEText(body, 'plain'))
+        return msg
+
+    def send(self, message):
+        smtp = self._connection()
+        try:
+            smtp.send_message(message)
+        except smtplib.SMTPRecipientsRefused as e:
+            raise PermanentDeliveryError(str(e.recipients)) from e
+        except smtplib.SMTPResponseException as e:
+            if e.smtp_code >= 500 and not isinstance(e, smtplib.SMTPAuthenticationError):
+                raise PermanentDeliveryError(f"{e.smtp_code} {e.smtp_error!r}") from e
+            self.close()
+            raise
+        except Exception:
+            self.close()
+            raise
+        self._last_used = time.monotonic()
+
+    def _connection(self):
+        if not self.server or not self.sender_email:
+            raise RuntimeError("SMTP configuration missing (MAIL_SERVER, MAIL_SENDER_EMAIL).")
+        if self._smtp is not None:
+            if time.monotonic() - self._last_used < self.idle_timeout:
+                return self._smtp
+            # اتصال خامل لفترة؛ نتحقق أن الخادم لم يغلقه قبل إعادة استخدامه
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except smtplib.SMTPException:
+                pass
+            self.close()
+
+        if self.use_ssl:
+            smtp = smtplib.SMTP_SSL(self.server, self.port, context=ssl.create_default_context(), timeout=30)
+        else:
+            smtp = smtplib.SMTP(self.server, self.port, timeout=30)
+            if self.use_tls:
+                smtp.starttls(context=ssl.create_default_context())
+        if self.username and self.password:
+            smtp.login(self.username, self.password)
+        self._smtp = smtp
+        self._last_used = time.monotonic()
+        self.connections_opened += 1
+        return smtp
+
+    def close(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            pass
+        self._smtp = None
+
+
+class EmailOutboxPool:
+    """
+    Background threads that drain the email_outbox table.
+    Each thread claims a batch of due rows with FOR UPDATE SKIP LOCKED and
+    marks them 'sending' with a lease, so any number of threads and processes
+    can work the same table; a row whose lease expires (worker crashed) is
+    claimed again. Failures are retried with exponential backoff until
+    max_attempts, then marked 'failed'.
+    """
+
+    def __init__(self):
+        self.workers = 2
+        self.batch_size = 20
+        self.poll_interval = 5
+        self.max_attempts = 8
+        self.backoff_base = 30
+        self.backoff_max = 3600
+        self.lease_seconds = 120
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._engine = None
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+
+    def configure(self, workers, batch_size, poll_interval, max_attempts, backoff_base, backoff_max):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def ensure_started(self, engine):
+        """Starts the worker threads once per process (after gunicorn forks)."""
+        pid = os.getpid()
+        if self._pid == pid or self.workers <= 0:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            self._engine = engine
+        pg_listener.ensure_started(engine)
+        for index in range(self.workers):
+            threading.Thread(target=self._run, name=f'email-outbox-{index}', daemon=True).start()
+
+    def wake(self, data=None):
+        self._wake.set()
+
+    def _run(self):
+        mailer = SmtpMailer()
+        while True:
+            try:
+                rows = self._claim()
+            except Exception as e:
+                print(f"Email outbox claim failed: {e}")
+                rows = []
+            if not rows:
+                mailer.close()
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            for row in rows:
+                self._deliver(mailer, row)
+
+    def _claim(self):
+        table = EmailOutbox.__table__
+        due = (
+            select(table.c.id)
+            .where(table.c.status.in_(['pending', 'sending']), table.c.next_attempt_at <= func.now())
+            .order_by(table.c.next_attempt_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        with self._engine.begin() as connection:
+            return connection.execute(
+                update(table)
+                .where(table.c.id.in_(due.scalar_subquery()))
+                .values(
+                    status='sending',
+                    attempts=table.c.attempts + 1,
+                    next_attempt_at=func.now() + timedelta(seconds=self.lease_seconds)
+                )
+                .returning(table.c.id, table.c.to_email, table.c.subject, table.c.body, table.c.attempts)
+            ).all()
+
+    def _deliver(self, mailer, row):
+        table = EmailOutbox.__table__
+        try:
+            mailer.send(mailer.build_message(row.id, row.to_email, row.subject, row.body))
+            values = {'status': 'sent', 'sent_at': func.now(), 'last_error': None}
+            self.sent += 1
+        except Exception as e:
+            permanent = isinstance(e, PermanentDeliveryError)
+            if permanent or row.attempts >= self.max_attempts:
+                values = {'status': 'failed', 'last_error': str(e)}
+                self.failed += 1
+            else:
+                delay = min(self.backoff_base * 2 ** (row.attempts - 1), self.backoff_max)
+                values = {
+                    'status': 'pending',
+                    'last_error': str(e),
+                    'next_attempt_at': func.now() + timedelta(seconds=delay)
+                }
+                self.retried += 1
+            print(f"❌ Failed to send email {row.id} to {row.to_email} (attempt {row.attempts}): {e}")
+        try:
+            with self._engine.begin() as connection:
+                connection.execute(update(table).where(table.c.id == row.id).values(**values))
+        except Exception as e:
+            # تنتهي مهلة الحجز وتُعاد المحاولة؛ قد يُرسل البريد مرتين في هذه الحالة النادرة
+            print(f"Email outbox status update failed for {row.id}: {e}")
+
+    def stats(self):
+        return {
+            'workers': self.workers if self._pid == os.getpid() else 0,
+            'sent': self.sent,
+            'retried': self.retried,
+            'failed': self.failed
+        }
+
+
+email_outbox_pool = EmailOutboxPool()
+pg_listener.subscribe(OUTBOX_CHANNEL, email_outbox_pool.wake)
+
+
+def init_email_outbox(app):
+    """
+    Applies the EMAIL_OUTBOX_* settings. With EMAIL_OUTBOX_WORKERS > 0 every
+    app process runs its own worker threads, started on its first request;
+    with 0, run `flask email-outbox work` as a separate process instead.
+    """
+    email_outbox_pool.configure(
+        app.config['EMAIL_OUTBOX_WORKERS'],
+        app.config['EMAIL_OUTBOX_BATCH_SIZE'],
+        app.config['EMAIL_OUTBOX_POLL_SECONDS'],
+        app.config['EMAIL_OUTBOX_MAX_ATTEMPTS'],
+        app.config['EMAIL_OUTBOX_BACKOFF_SECONDS'],
+        app.config['EMAIL_OUTBOX_BACKOFF_MAX_SECONDS']
+    )
+
+    @app.before_request
+    def start_email_outbox_workers():
+        email_outbox_pool.ensure_started(db.engine)
+
+
+def queue_email(to_email, subject, body):
+    """
+    Adds a message to the outbox in the caller's transaction and wakes the
+    workers once it commits. Nothing is sent if the transaction rolls back.
+    Returns the outbox row.
+    """
+    message = EmailOutbox(to_email=to_email, subject=subject, body=body)
+    db.session.add(message)
+    db.session.flush()
+    notify(db.session, OUTBOX_CHANNEL, {'id': message.id})
+    return message
+
+
+def outbox_status_counts():
+    """Number of outbox rows per status."""
+    rows = db.session.query(EmailOutbox.status, func.count(EmailOutbox.id)).group_by(EmailOutbox.status).all()
+    return {status: count for status, count in rows}
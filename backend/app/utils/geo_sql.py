@@ -0,0 +1,88 @@
+from flask import current_app
+from sqlalchemy import func, Float, Numeric
+from sqlalchemy.dialects.postgresql import JSON
+from sqlalchemy.orm import defer, with_expression
+from app.models import Restaurant, Order, UserAddress
+
+# أقصى عدد منازل عشرية للإحداثيات (9 منازل ≈ 0.1 مم)
+MAX_GEOMETRY_PRECISION = 9
+# تحويل تقريبي من الأمتار إلى الدرجات لمعامل التبسيط
+METRES_PER_DEGREE = 111320
+
+
+def coordinate(expression, precision):
+    """A PostGIS coordinate rounded to precision decimal places, as float8."""
+    return func.round(expression.cast(Numeric), precision).cast(Float)
+
+
+def point_latitude(column, precision):
+    return coordinate(func.ST_Y(column), precision)
+
+
+def point_longitude(column, precision):
+    return coordinate(func.ST_X(column), precision)
+
+
+def geojson(column, precision, simplify_tolerance=None):
+    """
+    ST_AsGeoJSON of column as a json value (decoded by the driver), optionally
+    simplified with ST_SimplifyPreserveTopology(column, simplify_tolerance) first.
+    The tolerance is in the column's units (degrees for SRID 4326).
+    """
+    if simplify_tolerance:
+        column = func.ST_SimplifyPreserveTopology(column, simplify_tolerance)
+    return func.ST_AsGeoJSON(column, precision).cast(JSON)
+
+
+def geometry_args(args, default_simplify_metres=0):
+    """
+    (precision, simplify_tolerance) from ?precision=&simplify=, simplify being
+    in metres and returned in degrees (None when off).
+    Raises ValueError for non-numeric or out-of-range values.
+    """
+    precision = int(args.get('precision', current_app.config['GEOMETRY_PRECISION']))
+    if not 0 <= precision <= MAX_GEOMETRY_PRECISION:
+        raise ValueError("Invalid precision")
+    simplify_metres = float(args.get('simplify', default_simplify_metres))
+    if simplify_metres < 0:
+        raise ValueError("Invalid simplify tolerance")
+    return precision, (simplify_metres / METRES_PER_DEGREE) or None
+
+
+def restaurant_geometry_options(precision=None, simplify_tolerance=None):
+    """
+    Loader options that have PostGIS compute the location coordinates and the
+    delivery_area GeoJSON read by serialize_restaurant, instead of sending WKB
+    to be parsed with shapely. The raw geometry columns are deferred.
+    """
+    if precision is None:
+        precision = current_app.config['GEOMETRY_PRECISION']
+    return (
+        defer(Restaurant.location),
+        defer(Restaurant.delivery_area),
+        with_expression(Restaurant.location_latitude, point_latitude(Restaurant.location, precision)),
+        with_expression(Restaurant.location_longitude, point_longitude(Restaurant.location, precision)),
+        with_expression(Restaurant.delivery_area_geojson, geojson(Restaurant.delivery_area, precision, simplify_tolerance)),
+    )
+
+
+def order_geometry_options(precision=None):
+    """Same as restaurant_geometry_options, for Order.delivery_location."""
+    if precision is None:
+        precision = current_app.config['GEOMETRY_PRECISION']
+    return (
+        defer(Order.delivery_location),
+        with_expression(Order.delivery_latitude, point_latitude(Order.delivery_location, precision)),
+        with_expression(Order.delivery_longitude, point_longitude(Order.delivery_location, precision)),
+    )
+
+
+def address_geometry_options(precision=None):
+    """Same as restaurant_geometry_options, for UserAddress.location."""
+    if precision is None:
+        precision = current_app.config['GEOMETRY_PRECISION']
+    return (
+        defer(UserAddress.location),
+        with_expression(UserAddress.latitude, point_latitude(UserAddress.location, precision)),
+        with_expression(UserAddress.longitude, point_longitude(UserAddress.location, precision)),
+    )
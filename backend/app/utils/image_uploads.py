@@ -0,0 +1,262 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from app.extensions import db
+from app.models import UploadJob, MenuItem, MenuItemImage, User
+from app.utils.cloudinary_utils import upload_image, delete_image, delete_images, extract_public_id_from_url
+from app.utils.catalog_cache import bump_content_version
+
+
+class CloudinaryUploader:
+    def upload(self, file, folder):
+        return upload_image(file, folder=folder)
+
+    def delete(self, url):
+        public_id = extract_public_id_from_url(url)
+        if public_id:
+            delete_image(public_id)
+
+    def delete_many(self, public_ids):
+        return delete_images(public_ids)
+
+
+class FakeUploader:
+    """
+    Stand-in for Cloudinary in tests and local development (IMAGE_UPLOADER=fake).
+    Records every call; delay simulates a slow upload and fail makes uploads return None.
+    """
+
+    def __init__(self, delay=0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.uploads = []
+        self.deleted = []
+
+    def upload(self, file, folder):
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            return None
+        public_id = f"{folder}/{uuid.uuid4().hex}"
+        self.uploads.append((public_id, len(file.read())))
+        return {'secure_url': f"https://fake-uploads.local/image/upload/{public_id}.jpg", 'public_id': public_id}
+
+    def delete(self, url):
+        self.deleted.append(url)
+
+    def delete_many(self, public_ids):
+        self.deleted.extend(public_ids)
+        return {public_id: 'deleted' for public_id in public_ids}
+
+
+class PendingUpload:
+    """An UploadJob row plus the spooled file, waiting for its transaction to commit."""
+
+    def __init__(self, job, file, folder):
+        self.job = job
+        self.file = file
+        self.folder = folder
+
+
+class UploadQueueFull(Exception):
+    """Every upload slot in this process is taken."""
+
+
+class UploadJobPool:
+    """
+    Bounded per-process thread pool for image uploads.
+    At most queue_size uploads may be staged, queued or running at once;
+    staging beyond that raises UploadQueueFull and routes answer 503.
+    The file of a staged job exists only in the process that staged it; jobs
+    left pending or running by a process that exited are failed after
+    job_timeout seconds (see fail_abandoned_jobs).
+    """
+
+    def __init__(self):
+        self.workers = 4
+        self.queue_size = 32
+        self.spool_bytes = 1024 * 1024
+        self.job_timeout = 900
+        self.uploader = CloudinaryUploader()
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self._executor = None
+        self._pid = None
+        self._swept_pid = None
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+        self.abandoned = 0
+
+    def configure(self, workers, queue_size, spool_bytes, uploader, job_timeout):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.spool_bytes = spool_bytes
+        self.job_timeout = job_timeout
+        self.uploader = FakeUploader() if uploader == 'fake' else CloudinaryUploader()
+        self._slots = threading.BoundedSemaphore(queue_size)
+
+    def _get_executor(self):
+        # المنفذ لا ينجو من fork، لذلك يُنشأ مرة لكل عملية
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='image-upload')
+                    self._pid = pid
+        return self._executor
+
+    def stage(self, kind, target_id, user_id, file, folder):
+        """
+        Takes a slot, spools the request file and adds a pending UploadJob to
+        the session. Raises UploadQueueFull when no slot is free.
+        The caller commits, then passes the result to dispatch() (or discard()
+        if the transaction fails).
+        """
+        if not self._slots.acquire(blocking=False):
+            raise UploadQueueFull()
+        try:
+            spool = tempfile.SpooledTemporaryFile(max_size=self.spool_bytes)
+            shutil.copyfileobj(file.stream, spool)
+            spool.seek(0)
+        except Exception:
+            self._slots.release()
+            raise
+        job = UploadJob(
+            id=str(uuid.uuid4()), user_id=user_id, kind=kind, target_id=target_id,
+            filename=file.filename, status='pending'
+        )
+        db.session.add(job)
+        return PendingUpload(job, spool, folder)
+
+    def dispatch(self, pending_uploads):
+        """Submits staged uploads once their jobs are committed; slots are freed as uploads finish."""
+        app = current_app._get_current_object()
+        executor = self._get_executor()
+        for pending in pending_uploads:
+            executor.submit(self._run, app, pending.job.id, pending.file, pending.folder)
+        # أول رفع في كل عملية يُنهي مهام العمليات السابقة التي توقفت قبل إكمالها
+        pid = os.getpid()
+        if self._swept_pid != pid:
+            self._swept_pid = pid
+            self.fail_abandoned_jobs()
+
+    def discard(self, pending_uploads):
+        """Frees staged uploads whose transaction did not commit."""
+        for pending in pending_uploads:
+            pending.file.close()
+            self._slots.release()
+
+    def is_abandoned(self, job):
+        """True if the job is still pending or running past job_timeout."""
+        if job.status not in ('pending', 'running') or job.created_at is None:
+            return False
+        return job.created_at < datetime.now(timezone.utc) - timedelta(seconds=self.job_timeout)
+
+    def fail_abandoned_jobs(self):
+        """
+        Marks jobs pending or running for longer than job_timeout as failed and
+        commits. Their file was spooled by a process that has since exited, so
+        they can never finish. Returns the number of jobs failed.
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.job_timeout)
+        try:
+            count = UploadJob.query.filter(
+                UploadJob.status.in_(['pending', 'running']),
+                UploadJob.created_at < cutoff
+            ).update(
+                {'status': 'failed', 'error': 'Upload interrupted; please upload the image again',
+                 'finished_at': datetime.now(timezone.utc)},
+                synchronize_session=False
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Failed to expire abandoned upload jobs: {e}")
+            return 0
+        self.abandoned += count
+        return count
+
+    def _run(self, app, job_id, file, folder):
+        try:
+            with app.app_context():
+                try:
+                    job = UploadJob.query.get(job_id)
+                    job.status = 'running'
+                    db.session.commit()
+
+                    result = self.uploader.upload(file, folder)
+                    if not result:
+                        raise RuntimeError('Image upload failed')
+                    replaced_url = attach_upload(job, result['secure_url'])
+                    job.status = 'done'
+                    job.result_url = result['secure_url']
+                    job.finished_at = datetime.now(timezone.utc)
+                    db.session.commit()
+                    self.completed += 1
+                    if replaced_url:
+                        self.uploader.delete(replaced_url)
+                except Exception as e:
+                    db.session.rollback()
+                    self.failed += 1
+                    print(f"Upload job {job_id} failed: {e}")
+                    UploadJob.query.filter_by(id=job_id).update(
+                        {'status': 'failed', 'error': str(e), 'finished_at': datetime.now(timezone.utc)}
+                    )
+                    db.session.commit()
+        finally:
+            file.close()
+            self._slots.release()
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'queue_size': self.queue_size,
+            'uploader': type(self.uploader).__name__,
+            'completed': self.completed,
+            'failed': self.failed,
+            'abandoned': self.abandoned
+        }
+
+
+def attach_upload(job, url):
+    """
+    Records a finished upload on its target. Returns a previous URL that the
+    new one replaced (to delete from storage after commit), or None.
+    """
+    if job.kind == 'menu_item_image':
+        menu_item = MenuItem.query.get(job.target_id)
+        if not menu_item:
+            upload_pool.uploader.delete(url)
+            raise RuntimeError('Menu item no longer exists')
+        db.session.add(MenuItemImage(menu_item_id=menu_item.id, image_url=url))
+        bump_content_version(menu_item.restaurant_id, menu=True)
+        return None
+    if job.kind == 'profile_image':
+        user = User.query.get(job.target_id)
+        if not user:
+            upload_pool.uploader.delete(url)
+            raise RuntimeError('User no longer exists')
+        replaced_url = user.profile_image_url
+        user.profile_image_url = url
+        return replaced_url
+    raise ValueError(f'Unknown upload kind: {job.kind}')
+
+
+upload_pool = UploadJobPool()
+
+
+def init_upload_pool(app):
+    """Applies the UPLOAD_* settings to the process-wide pool."""
+    upload_pool.configure(
+        app.config['UPLOAD_WORKERS'],
+        app.config['UPLOAD_QUEUE_SIZE'],
+        app.config['UPLOAD_SPOOL_MEMORY_BYTES'],
+        app.config['IMAGE_UPLOADER'],
+        app.config['UPLOAD_JOB_TIMEOUT_SECONDS']
+    )
@@ -0,0 +1,205 @@
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app
+from sqlalchemy import update
+from app.extensions import db
+from app.models import MenuItemImage
+from app.utils.catalog_cache import bump_content_version
+
+# الأحجام الثابتة للنسخ المشتقة (أقصى عرض × أقصى ارتفاع مع الحفاظ على النسبة)
+VARIANT_SIZES = {
+    'thumbnail': (160, 160),
+    'card': (480, 480),
+    'full': (1280, 1280)
+}
+VARIANT_FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True}
+}
+
+
+def variant_filename(filename, size, fmt):
+    """'abc_photo.png' -> 'abc_photo.card.webp'; derivatives live next to the original."""
+    stem = os.path.splitext(filename)[0]
+    return f"{stem}.{size}.{fmt}"
+
+
+def variants_manifest_filename(filename):
+    """'abc_photo.png' -> 'abc_photo.variants.json'; written last, once every derivative is in place."""
+    return f"{os.path.splitext(filename)[0]}.variants.json"
+
+
+def _write_atomically(folder, name, write):
+    """
+    Calls write(file) on a temp file in folder, then renames it to name, so
+    readers never see a partially written file under its final name.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=folder, prefix='.rendering-')
+    try:
+        with os.fdopen(fd, 'wb') as temp:
+            write(temp)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, os.path.join(folder, name))
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def render_variants(folder, filename):
+    """
+    Writes every size/format derivative of folder/filename and returns
+    {size: {'width', 'height', 'webp', 'jpeg'}}.
+    Runs in a worker process. EXIF orientation is applied to the pixels and
+    no metadata (EXIF, GPS, ICC, comments) is copied to the derivatives.
+    Content-addressed originals (app.utils.content_store) always produce the
+    same derivatives, so a complete set (its manifest exists) is reused instead
+    of rendered again. Each file is written to a temp file and renamed into
+    place, and the manifest is written last, so a crash or a concurrent render
+    of the same image never leaves a truncated derivative that gets reused.
+    """
+    from PIL import Image, ImageOps
+
+    existing = _existing_variants(folder, filename)
+    if existing:
+        return existing
+
+    with Image.open(os.path.join(folder, filename)) as original:
+        original.draft('RGB', VARIANT_SIZES['full'])
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+
+        variants = {}
+        for size, box in VARIANT_SIZES.items():
+            resized = image.copy()
+            # لا نكبّر الصور الصغيرة؛ thumbnail يصغّر فقط
+            resized.thumbnail(box, Image.LANCZOS)
+            entry = {'width': resized.width, 'height': resized.height}
+            for fmt, options in VARIANT_FORMATS.items():
+                output = resized
+                if fmt == 'jpeg' and output.mode == 'RGBA':
+                    # JPEG لا يدعم الشفافية؛ نركّب الصورة على خلفية بيضاء
+                    background = Image.new('RGB', output.size, (255, 255, 255))
+                    background.paste(output, mask=output.getchannel('A'))
+                    output = background
+                name = variant_filename(filename, size, fmt)
+                _write_atomically(folder, name, lambda f, output=output, options=options: output.save(f, **options))
+                entry[fmt] = name
+            variants[size] = entry
+
+    manifest = json.dumps(variants).encode('utf-8')
+    _write_atomically(folder, variants_manifest_filename(filename), lambda f: f.write(manifest))
+    return variants
+
+
+def _existing_variants(folder, filename):
+    """The variants recorded in the manifest of a completed render, or None."""
+    try:
+        with open(os.path.join(folder, variants_manifest_filename(filename)), 'rb') as manifest:
+            variants = json.load(manifest)
+    except (OSError, ValueError):
+        return None
+    for entry in variants.values():
+        for fmt in VARIANT_FORMATS:
+            if not os.path.exists(os.path.join(folder, entry[fmt])):
+                return None
+    return variants
+
+
+class ImageVariantPool:
+    """
+    Per-process pool of worker processes that render image derivatives, so
+    resizing and encoding never hold a request thread or the GIL.
+    Workers use the 'spawn' start method: forking a threaded server process
+    can copy held locks into the child.
+    Results for menu item images are written to MenuItemImage.variants from
+    the pool's callback thread, and the menu version is bumped so cached
+    menus pick them up.
+    """
+
+    def __init__(self):
+        self.processes = 2
+        self.enabled = True
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+
+    def configure(self, processes, enabled=True):
+        self.processes = processes
+        self.enabled = enabled
+
+    def _get_executor(self):
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.processes, mp_context=multiprocessing.get_context('spawn')
+                    )
+                    self._pid = pid
+        return self._executor
+
+    def submit_menu_item_image(self, image_id, restaurant_id, folder, filename):
+        """Renders derivatives for a committed MenuItemImage whose file is folder/filename."""
+        if not self.enabled:
+            return
+        app = current_app._get_current_object()
+        future = self._get_executor().submit(render_variants, folder, filename)
+        future.add_done_callback(
+            lambda f: self._record_menu_item_image(app, f, image_id, restaurant_id, filename)
+        )
+
+    def submit_logo(self, folder, filename):
+        """Renders derivatives for an uploaded restaurant logo; nothing is recorded in the database."""
+        if not self.enabled:
+            return
+        future = self._get_executor().submit(render_variants, folder, filename)
+        future.add_done_callback(lambda f: self._count(f, filename))
+
+    def _count(self, future, filename):
+        if future.exception() is not None:
+            self.failed += 1
+            print(f"Image variants failed for {filename}: {future.exception()}")
+            return False
+        self.completed += 1
+        return True
+
+    def _record_menu_item_image(self, app, future, image_id, restaurant_id, filename):
+        if not self._count(future, filename):
+            return
+        with app.app_context():
+            try:
+                table = MenuItemImage.__table__
+                result = db.session.execute(
+                    update(table).where(table.c.id == image_id).values(variants=future.result())
+                )
+                if result.rowcount:
+                    bump_content_version(restaurant_id, menu=True)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Recording image variants for {filename} failed: {e}")
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'processes': self.processes,
+            'completed': self.completed,
+            'failed': self.failed
+        }
+
+
+image_variant_pool = ImageVariantPool()
+
+
+def init_image_variants(app):
+    """Applies the IMAGE_VARIANT_* settings to the process-wide pool."""
+    image_variant_pool.configure(app.config['IMAGE_VARIANT_PROCESSES'], app.config['IMAGE_VARIANTS_ENABLED'])
+
@@ -0,0 +1,75 @@
+import dataclasses
+import decimal
+import uuid
+from datetime import date
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+
+def _default(obj):
+    """
+    Types orjson (or json) does not encode itself: Decimal as its exact string
+    ('12.50', as the serializers always returned prices), shapely geometries
+    as GeoJSON mappings.
+    """
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    geo_interface = getattr(obj, '__geo_interface__', None)
+    if geo_interface is not None:
+        return geo_interface
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _compat_default(obj):
+    """_default plus what orjson encodes natively, in the same format (ISO 8601 dates, UUID strings)."""
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    return _default(obj)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider backed by orjson.
+    datetime/date (ISO 8601), UUID and dataclasses are encoded by orjson
+    itself; Decimal and shapely geometries go through _default. Responses are
+    built straight from the bytes orjson returns, UTF-8 and in the dicts'
+    own key order.
+
+    With JSON_COMPAT_OUTPUT the stdlib encoder is used as before (sorted keys,
+    ASCII escapes, trailing newline), so bodies stay byte-identical to the
+    previous output for clients or caches that compare them.
+    """
+
+    default = staticmethod(_compat_default)
+    options = orjson.OPT_NON_STR_KEYS
+
+    def _compat(self):
+        return self._app.config.get('JSON_COMPAT_OUTPUT', False)
+
+    def dumps_bytes(self, obj, indent=False):
+        options = (self.options | orjson.OPT_INDENT_2) if indent else self.options
+        return orjson.dumps(obj, default=_default, option=options)
+
+    def dumps(self, obj, **kwargs):
+        # kwargs such as separators are stdlib json options; orjson output is always compact
+        if self._compat() or kwargs.get('sort_keys') or kwargs.get('cls'):
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj, indent=bool(kwargs.get('indent'))).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if self._compat():
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumps_bytes(obj, indent=indent), mimetype=self.mimetype)
@@ -0,0 +1,91 @@
+import threading
+from collections import OrderedDict
+
+
+class MenuCache:
+    """
+    Per-worker LRU cache of serialized menu responses keyed by
+    (restaurant_id, menu_version).
+    A menu write bumps menu_version in the database, so readers simply stop
+    asking for the old key; no cross-worker invalidation is needed. Only the
+    newest version of each restaurant is kept, and total memory is bounded by
+    max_bytes of response bodies.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.enabled = True
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def configure(self, max_bytes, enabled=True):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self.enabled = enabled
+            self._entries.clear()
+            self._versions.clear()
+            self._bytes = 0
+
+    def get(self, restaurant_id, version):
+        key = (restaurant_id, version)
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, restaurant_id, version, body):
+        if len(body) > self.max_bytes:
+            return
+        key = (restaurant_id, version)
+        with self._lock:
+            previous = self._versions.get(restaurant_id)
+            if previous is not None and previous > version:
+                # قارئ متأخر لا يستبدل نسخة أحدث
+                return
+            if previous is not None:
+                self._remove((restaurant_id, previous))
+            self._entries[key] = body
+            self._versions[restaurant_id] = version
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key):
+        body = self._entries.pop(key, None)
+        if body is not None:
+            self._bytes -= len(body)
+            if self._versions.get(key[0]) == key[1]:
+                del self._versions[key[0]]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions
+            }
+
+
+menu_cache = MenuCache()
+
+
+def init_menu_cache(app):
+    """Applies the MENU_CACHE_* settings to the process-wide cache."""
+    menu_cache.configure(app.config['MENU_CACHE_MAX_BYTES'], app.config['MENU_CACHE_ENABLED'])
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+from sqlalchemy.orm import joinedload, selectinload
+from app.models import Order, OrderItem, MenuItem, User, Restaurant
+from app.utils.geo_sql import order_geometry_options
+
+
+def order_graph_options():
+    """
+    Loader options that fetch everything serialize_order touches.
+    Many-to-one and one-to-one relations are joined into the main SELECT,
+    order items (and their menu items) and item images are fetched with one
+    SELECT ... IN each, so a list of any length costs three round trips.
+    The delivery coordinates come from PostGIS (order_geometry_options).
+    """
+    return (
+        *order_geometry_options(),
+        joinedload(Order.customer).load_only(User.id, User.name, User.phone_number),
+        joinedload(Order.restaurant_obj).load_only(Restaurant.id, Restaurant.name),
+        joinedload(Order.payment),
+        joinedload(Order.rating),
+        selectinload(Order.order_items)
+            .joinedload(OrderItem.menu_item)
+            .load_only(MenuItem.id, MenuItem.name)
+            .selectinload(MenuItem.images),
+    )
+
+
+def order_graph_query(*criterion, **filters):
+    """
+    Returns an Order query with the full serialization graph eager-loaded.
+    Accepts the same arguments as filter() / filter_by().
+    """
+    query = Order.query.options(*order_graph_options())
+    if criterion:
+        query = query.filter(*criterion)
+    if filters:
+        query = query.filter_by(**filters)
+    return query
+
+
+def apply_order_filters(query, args):
+    """
+    Applies the optional list filters shared by the order history endpoints:
+    status (comma-separated), start_date and end_date (YYYY-MM-DD, inclusive).
+    Raises ValueError for malformed dates.
+    """
+    status = args.get('status')
+    if status:
+        statuses = [s.strip() for s in status.split(',') if s.strip()]
+        query = query.filter(Order.status.in_(statuses))
+
+    start_date = args.get('start_date')
+    if start_date:
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+        query = query.filter(Order.created_at >= start)
+
+    end_date = args.get('end_date')
+    if end_date:
+        end = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
+        query = query.filter(Order.created_at < end)
+
+    return query
@@ -0,0 +1,114 @@
+from sqlalchemy import insert, select, literal, Numeric, String
+from app.extensions import db
+from app.models import Order, OrderItem, MenuItem, Payment
+
+
+class CartError(Exception):
+    def __init__(self, message, status_code):
+        self.message = message
+        self.status_code = status_code
+
+
+def _cart_int(value):
+    """
+    value as an int if it is a JSON integer, an integral float (2.0) or a
+    string of digits ("5"); None for anything else, so 2.7 or true is never
+    silently turned into a different quantity.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else None
+    if isinstance(value, str):
+        value = value.strip()
+        return int(value) if value.isascii() and value.isdigit() else None
+    return None
+
+
+def price_cart(restaurant_id, items):
+    """
+    Validates and prices a cart with one IN lookup of all requested menu items.
+    Returns (total_price, order_item_rows); raises CartError for invalid lines
+    or items that are missing, unavailable or from another restaurant.
+    """
+    if not isinstance(items, list):
+        raise CartError('بيانات المنتج غير صالحة', 400)
+    lines = []
+    for item_data in items:
+        if not isinstance(item_data, dict):
+            raise CartError('بيانات المنتج غير صالحة', 400)
+        # المعرفات والكميات قد تصل كنصوص ("5")؛ أي قيمة ليست عدداً صحيحاً تماماً (2.7 أو true) خطأ من العميل
+        menu_item_id = _cart_int(item_data.get('menu_item_id'))
+        quantity = _cart_int(item_data.get('quantity'))
+        if menu_item_id is None or quantity is None or menu_item_id <= 0 or quantity <= 0:
+            raise CartError('بيانات المنتج غير صالحة', 400)
+        lines.append((menu_item_id, quantity, item_data))
+
+    requested_ids = {menu_item_id for menu_item_id, _, _ in lines}
+    prices = dict(
+        db.session.query(MenuItem.id, MenuItem.price).filter(
+            MenuItem.id.in_(requested_ids),
+            MenuItem.restaurant_id == restaurant_id,
+            MenuItem.is_available.is_(True)
+        ).all()
+    )
+
+    total_price = 0
+    rows = []
+    for menu_item_id, quantity, item_data in lines:
+        price = prices.get(menu_item_id)
+        if price is None:
+            raise CartError(f'المنتج {menu_item_id} غير متوفر', 404)
+        total_price += price * quantity
+        rows.append({
+            'menu_item_id': menu_item_id,
+            'quantity': quantity,
+            'price_at_order': price,
+            'excluded_ingredients': item_data.get('excluded_ingredients'),
+            'notes': item_data.get('notes')
+        })
+    return total_price, rows
+
+
+def insert_order(user_id, restaurant_id, total_price, delivery_address, delivery_location, payment_method, item_rows):
+    """
+    Writes an order, its payment and its items in two statements:
+    WITH new_order AS (INSERT INTO orders ... RETURNING id) INSERT INTO payments ... RETURNING order_id,
+    then one multi-row INSERT for the order items. Returns the new order id.
+    The caller commits.
+    """
+    orders = Order.__table__
+    new_order = (
+        insert(orders)
+        .values(
+            user_id=user_id,
+            restaurant_id=restaurant_id,
+            total_price=total_price,
+            delivery_address=delivery_address,
+            delivery_location=delivery_location,
+            status='pending'
+        )
+        .returning(orders.c.id)
+        .cte('new_order')
+    )
+    payments = Payment.__table__
+    order_id = db.session.execute(
+        insert(payments)
+        .from_select(
+            ['order_id', 'amount', 'payment_method', 'status'],
+            select(
+                new_order.c.id,
+                literal(total_price, Numeric(10, 2)),
+                literal(payment_method, String),
+                literal('pending', String)
+            )
+        )
+        .returning(payments.c.order_id)
+    ).scalar_one()
+
+    db.session.execute(
+        insert(OrderItem.__table__).values([dict(row, order_id=order_id) for row in item_rows])
+    )
+    return order_id
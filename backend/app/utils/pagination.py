@@ -0,0 +1,100 @@
+from sqlalchemy import tuple_, func, text
+from app.extensions import db
+from app.utils.cursors import encode_cursor, decode_cursor, parse_cursor_datetime
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# تحت هذا العدد التقديري يكون COUNT(*) رخيصاً فنُرجع العدد الدقيق
+EXACT_COUNT_THRESHOLD = 10000
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """
+    Converts the 'limit' query parameter into a page size between 1 and maximum.
+    Raises ValueError for non-numeric input.
+    """
+    if value is None or value == '':
+        return default
+    return max(1, min(int(value), maximum))
+
+
+def keyset_paginate(query, model, limit, after=None):
+    """
+    Seek pagination on (created_at, id), newest first.
+    'after' is the next_cursor of the previous page. Returns (items, next_cursor);
+    next_cursor is None on the last page. Raises ValueError for a malformed cursor.
+    """
+    if after:
+        cursor_data = decode_cursor(after)
+        last_created_at = parse_cursor_datetime(cursor_data.get('c'))
+        last_id = cursor_data.get('i')
+        if not isinstance(last_id, int):
+            raise ValueError("Invalid cursor id")
+        query = query.filter(tuple_(model.created_at, model.id) < tuple_(last_created_at, last_id))
+
+    # جلب عنصر إضافي لمعرفة وجود صفحة تالية دون COUNT
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+    items = rows[:limit]
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor({'c': last.created_at, 'i': last.id})
+    return items, next_cursor
+
+
+def id_keyset_paginate(query, model, limit, after=None):
+    """
+    Seek pagination on id, ascending. Same contract as keyset_paginate:
+    returns (items, next_cursor) and raises ValueError for a malformed cursor.
+    """
+    if after:
+        last_id = decode_cursor(after).get('i')
+        if not isinstance(last_id, int):
+            raise ValueError("Invalid cursor id")
+        query = query.filter(model.id > last_id)
+
+    rows = query.order_by(model.id.asc()).limit(limit + 1).all()
+    items = rows[:limit]
+    next_cursor = encode_cursor({'i': items[-1].id}) if len(rows) > limit else None
+    return items, next_cursor
+
+
+def distance_keyset_paginate(query, distance, model, limit, after=None):
+    """
+    Seek pagination on (distance, id), nearest first, for KNN queries.
+    distance is the ordering expression; rows must expose it as 'distance'.
+    Same contract as keyset_paginate: returns (rows, next_cursor) and raises
+    ValueError for a malformed cursor.
+    """
+    if after:
+        cursor_data = decode_cursor(after)
+        last_distance = cursor_data.get('d')
+        last_id = cursor_data.get('i')
+        if not isinstance(last_distance, (int, float)) or not isinstance(last_id, int):
+            raise ValueError("Invalid cursor")
+        query = query.filter(tuple_(distance, model.id) > tuple_(last_distance, last_id))
+
+    rows = query.order_by(distance, model.id).limit(limit + 1).all()
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor({'d': last.distance, 'i': last.id})
+    return items, next_cursor
+
+
+def approximate_count(model, exact_threshold=EXACT_COUNT_THRESHOLD):
+    """
+    Row count of model's table from the planner statistics (pg_class.reltuples),
+    kept current by autovacuum/ANALYZE, instead of a full COUNT(*).
+    Small or never-analyzed tables (reltuples is -1) are counted exactly.
+    Returns (count, is_estimate).
+    """
+    estimate = db.session.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table_name AS regclass)"),
+        {'table_name': model.__tablename__}
+    ).scalar()
+    if estimate is None or estimate < exact_threshold:
+        return db.session.query(func.count()).select_from(model).scalar(), False
+    return estimate, True
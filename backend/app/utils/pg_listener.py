@@ -0,0 +1,141 @@
+import json
+import os
+import select
+import threading
+import time
+from sqlalchemy import func, select as sql_select
+
+# مهلة الانتظار قبل استعلام keep-alive على اتصال LISTEN
+LISTEN_TIMEOUT_SECONDS = 30
+# بدون دعم LISTEN في المشغل تُعاد تهيئة الذاكرات المؤقتة دورياً حتى لا تبقى قديمة إلى الأبد
+NO_LISTEN_RESET_SECONDS = 30
+
+
+class PgNotificationListener:
+    """
+    One background LISTEN connection per worker process, shared by every
+    in-process cache that needs cross-worker invalidation.
+    Subscribers register a handler per channel plus an optional on_reset
+    callback, which runs whenever notifications may have been missed
+    (connection lost). Drivers without LISTEN support get on_reset every
+    NO_LISTEN_RESET_SECONDS instead, so caches are at most that stale.
+    Supports psycopg2 (poll/notifies list) and psycopg 3 (notifies() generator).
+    """
+
+    def __init__(self):
+        self._handlers = {}
+        self._reset_callbacks = []
+        self._lock = threading.Lock()
+        self._pid = None
+        self.connected = False
+
+    def subscribe(self, channel, handler, on_reset=None):
+        self._handlers[channel] = handler
+        if on_reset is not None:
+            self._reset_callbacks.append(on_reset)
+
+    def ensure_started(self, engine):
+        """Starts the listener thread once per worker process (after gunicorn forks)."""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+        # أي بيانات مخزنة قبل fork لم تكن تستمع للإشعارات
+        self._reset()
+        threading.Thread(target=self._run, args=(engine,), name='pg-notification-listener', daemon=True).start()
+
+    def _reset(self):
+        for callback in self._reset_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Notification reset callback failed: {e}")
+
+    def _run(self, engine):
+        backoff = 1
+        while True:
+            try:
+                if not self._listen(engine):
+                    self._reset_periodically()
+                    return
+                backoff = 1
+            except Exception as e:
+                print(f"Notification listener error: {e}")
+            self.connected = False
+            # ربما فاتتنا إشعارات أثناء الانقطاع
+            self._reset()
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+    def _reset_periodically(self):
+        print(
+            "Notification listener disabled: database driver does not support LISTEN/NOTIFY; "
+            f"in-process caches will be reset every {NO_LISTEN_RESET_SECONDS}s instead."
+        )
+        while True:
+            time.sleep(NO_LISTEN_RESET_SECONDS)
+            self._reset()
+
+    def _listen(self, engine):
+        """Blocks while connected; returns False if the driver cannot LISTEN."""
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            dbapi_connection = connection.connection.dbapi_connection
+            if hasattr(dbapi_connection, 'poll') and hasattr(dbapi_connection, 'notifies'):
+                receive = self._psycopg2_notifications
+            elif callable(getattr(dbapi_connection, 'notifies', None)):
+                receive = self._psycopg_notifications
+            else:
+                return False
+            for channel in self._handlers:
+                connection.exec_driver_sql(f'LISTEN {channel}')
+            self.connected = True
+            while True:
+                received = False
+                for channel, payload in receive(dbapi_connection):
+                    received = True
+                    self._dispatch(channel, payload)
+                if not received:
+                    connection.exec_driver_sql('SELECT 1')  # keep-alive
+
+    @staticmethod
+    def _psycopg2_notifications(dbapi_connection):
+        """(channel, payload) pairs received within LISTEN_TIMEOUT_SECONDS (psycopg2)."""
+        if select.select([dbapi_connection], [], [], LISTEN_TIMEOUT_SECONDS) == ([], [], []):
+            return
+        dbapi_connection.poll()
+        while dbapi_connection.notifies:
+            notification = dbapi_connection.notifies.pop(0)
+            yield notification.channel, notification.payload
+
+    @staticmethod
+    def _psycopg_notifications(dbapi_connection):
+        """(channel, payload) pairs received within LISTEN_TIMEOUT_SECONDS (psycopg 3.2+)."""
+        for notification in dbapi_connection.notifies(timeout=LISTEN_TIMEOUT_SECONDS):
+            yield notification.channel, notification.payload
+
+    def _dispatch(self, channel, payload):
+        handler = self._handlers.get(channel)
+        if handler is None:
+            return
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            return
+        try:
+            handler(data)
+        except Exception as e:
+            print(f"Notification handler for {channel} failed: {e}")
+
+
+pg_listener = PgNotificationListener()
+
+
+def notify(db_session, channel, payload):
+    """
+    Queues a NOTIFY with a JSON payload on the caller's transaction.
+    Listeners receive it only if and when the transaction commits.
+    """
+    db_session.execute(sql_select(func.pg_notify(channel, json.dumps(payload))))
@@ -0,0 +1,344 @@
+import os
+import threading
+from datetime import timedelta
+from sqlalchemy import select, update, delete, func, or_
+from app.extensions import db
+from app.models import (
+    RestaurantPurge, Restaurant, MenuItem, MenuItemImage, Order, OrderItem, Payment, Rating, User
+)
+from app.utils.cloudinary_utils import extract_public_id_from_url
+from app.utils.image_uploads import upload_pool
+from app.utils.delivery_index import broadcast_delivery_area_change
+from app.utils.pg_listener import pg_listener, notify
+
+# قناة إيقاظ عامل الحذف فور إنشاء مهمة جديدة
+PURGE_CHANNEL = 'restaurant_purge'
+# أقصى عدد معرفات يقبلها Cloudinary في طلب حذف جماعي واحد
+CLOUDINARY_BULK_DELETE_LIMIT = 100
+
+
+class RestaurantPurgeWorker:
+    """
+    Background thread that deletes force-deleted restaurants in bounded batches.
+    Every step is its own short transaction that locks the purge row, deletes
+    one batch and records progress, so a crash loses at most one batch of work
+    and the job resumes from its stored phase once its lease expires.
+    Phases: orders (ratings, payments and order items with each batch of
+    orders), menu (images and menu items), restaurant (the row itself),
+    remote_images (Cloudinary bulk deletes of the collected public ids).
+    """
+
+    def __init__(self):
+        self.workers = 1
+        self.batch_size = 500
+        self.poll_interval = 30
+        self.lease_seconds = 300
+        self.max_attempts = 5
+        self.backoff_base = 60
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._engine = None
+        self.completed = 0
+        self.failed = 0
+        self.batches = 0
+
+    def configure(self, workers, batch_size, poll_interval, max_attempts):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+
+    def ensure_started(self, engine):
+        """Starts the worker threads once per process (after gunicorn forks)."""
+        pid = os.getpid()
+        if self._pid == pid or self.workers <= 0:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            self._engine = engine
+        pg_listener.ensure_started(engine)
+        for index in range(self.workers):
+            threading.Thread(target=self._run, name=f'restaurant-purge-{index}', daemon=True).start()
+
+    def wake(self, data=None):
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            try:
+                purge_id = self._claim()
+            except Exception as e:
+                print(f"Restaurant purge claim failed: {e}")
+                purge_id = None
+            if purge_id is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            self.run(purge_id)
+
+    def _claim(self):
+        table = RestaurantPurge.__table__
+        due = (
+            select(table.c.id)
+            .where(
+                table.c.status.in_(['pending', 'running']),
+                or_(table.c.lease_expires_at.is_(None), table.c.lease_expires_at <= func.now())
+            )
+            .order_by(table.c.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        with self._engine.begin() as connection:
+            return connection.execute(
+                update(table)
+                .where(table.c.id == due.scalar_subquery())
+                .values(
+                    status='running',
+                    attempts=table.c.attempts + 1,
+                    lease_expires_at=func.now() + timedelta(seconds=self.lease_seconds)
+                )
+                .returning(table.c.id)
+            ).scalar()
+
+    def run(self, purge_id):
+        """Runs a claimed purge to completion, or records the error and schedules a retry."""
+        try:
+            while self.step(purge_id):
+                pass
+            self.completed += 1
+        except Exception as e:
+            print(f"Restaurant purge {purge_id} failed: {e}")
+            self._record_failure(purge_id, e)
+
+    def step(self, purge_id):
+        """Executes one batch of the purge's current phase. Returns False once the purge is done."""
+        table = RestaurantPurge.__table__
+        if self._phase(purge_id) == 'remote_images':
+            # الطلب إلى Cloudinary يتم خارج أي معاملة حتى لا تبقى الأقفال أثناء انتظار الشبكة
+            return self._delete_remote_images(purge_id)
+
+        with self._engine.begin() as connection:
+            purge = connection.execute(
+                select(table.c.restaurant_id, table.c.phase, table.c.deleted, table.c.pending_public_ids)
+                .where(table.c.id == purge_id).with_for_update()
+            ).one()
+            if purge.phase == 'done':
+                return False
+            deleted = dict(purge.deleted)
+            public_ids = list(purge.pending_public_ids)
+            handler = {
+                'orders': self._delete_orders_batch,
+                'menu': self._delete_menu_batch,
+                'restaurant': self._delete_restaurant
+            }[purge.phase]
+            next_phase = handler(connection, purge.restaurant_id, deleted, public_ids)
+            connection.execute(
+                update(table).where(table.c.id == purge_id).values(
+                    phase=next_phase or purge.phase,
+                    deleted=deleted,
+                    pending_public_ids=public_ids,
+                    lease_expires_at=func.now() + timedelta(seconds=self.lease_seconds),
+                    updated_at=func.now()
+                )
+            )
+        self.batches += 1
+        return True
+
+    def _phase(self, purge_id):
+        table = RestaurantPurge.__table__
+        with self._engine.connect() as connection:
+            return connection.execute(select(table.c.phase).where(table.c.id == purge_id)).scalar()
+
+    def _delete_orders_batch(self, connection, restaurant_id, deleted, public_ids):
+        orders = Order.__table__
+        order_ids = connection.execute(
+            select(orders.c.id).where(orders.c.restaurant_id == restaurant_id)
+            .order_by(orders.c.id).limit(self.batch_size)
+        ).scalars().all()
+        if not order_ids:
+            return 'menu'
+        for name, model in [('ratings', Rating), ('payments', Payment), ('order_items', OrderItem)]:
+            result = connection.execute(delete(model.__table__).where(model.__table__.c.order_id.in_(order_ids)))
+            _add(deleted, name, result.rowcount)
+        result = connection.execute(delete(orders).where(orders.c.id.in_(order_ids)))
+        _add(deleted, 'orders', result.rowcount)
+        return None
+
+    def _delete_menu_batch(self, connection, restaurant_id, deleted, public_ids):
+        menu_items = MenuItem.__table__
+        images = MenuItemImage.__table__
+        item_ids = connection.execute(
+            select(menu_items.c.id).where(menu_items.c.restaurant_id == restaurant_id)
+            .order_by(menu_items.c.id).limit(self.batch_size)
+        ).scalars().all()
+        if not item_ids:
+            return 'restaurant'
+        # عناصر طلبات قديمة قد تشير إلى هذه الأصناف من خارج طلبات المطعم
+        result = connection.execute(delete(OrderItem.__table__).where(OrderItem.__table__.c.menu_item_id.in_(item_ids)))
+        _add(deleted, 'order_items', result.rowcount)
+        image_urls = connection.execute(
+            delete(images).where(images.c.menu_item_id.in_(item_ids)).returning(images.c.image_url)
+        ).scalars().all()
+        _add(deleted, 'menu_item_images', len(image_urls))
+        _collect_public_ids(public_ids, image_urls)
+        result = connection.execute(delete(menu_items).where(menu_items.c.id.in_(item_ids)))
+        _add(deleted, 'menu_items', result.rowcount)
+        return None
+
+    def _delete_restaurant(self, connection, restaurant_id, deleted, public_ids):
+        restaurants = Restaurant.__table__
+        # القفل يمنع إضافة طلبات أو أصناف جديدة تشير إلى المطعم حتى نهاية المعاملة
+        restaurant = connection.execute(
+            select(restaurants.c.id, restaurants.c.logo_url).where(restaurants.c.id == restaurant_id).with_for_update()
+        ).first()
+        if restaurant is None:
+            return 'remote_images'
+        orders_left = connection.execute(
+            select(Order.__table__.c.id).where(Order.__table__.c.restaurant_id == restaurant_id).limit(1)
+        ).first()
+        items_left = connection.execute(
+            select(MenuItem.__table__.c.id).where(MenuItem.__table__.c.restaurant_id == restaurant_id).limit(1)
+        ).first()
+        if orders_left or items_left:
+            return 'orders'
+        users = User.__table__
+        connection.execute(
+            update(users).where(users.c.associated_restaurant_id == restaurant_id)
+            .values(role='customer', associated_restaurant_id=None)
+        )
+        _collect_public_ids(public_ids, [restaurant.logo_url])
+        # restaurant_daily_sales يُحذف تلقائياً (ON DELETE CASCADE)
+        connection.execute(delete(restaurants).where(restaurants.c.id == restaurant_id))
+        _add(deleted, 'restaurants', 1)
+        broadcast_delivery_area_change(connection, [restaurant_id])
+        return 'remote_images'
+
+    def _delete_remote_images(self, purge_id):
+        table = RestaurantPurge.__table__
+        with self._engine.connect() as connection:
+            public_ids = connection.execute(
+                select(table.c.pending_public_ids).where(table.c.id == purge_id)
+            ).scalar()
+        batch = public_ids[:CLOUDINARY_BULK_DELETE_LIMIT]
+        if batch:
+            upload_pool.uploader.delete_many(batch)
+        with self._engine.begin() as connection:
+            purge = connection.execute(
+                select(table.c.deleted, table.c.pending_public_ids).where(table.c.id == purge_id).with_for_update()
+            ).one()
+            remaining = [public_id for public_id in purge.pending_public_ids if public_id not in batch]
+            deleted = dict(purge.deleted)
+            _add(deleted, 'remote_images', len(batch))
+            values = {
+                'pending_public_ids': remaining,
+                'deleted': deleted,
+                'lease_expires_at': func.now() + timedelta(seconds=self.lease_seconds),
+                'updated_at': func.now()
+            }
+            if not remaining:
+                values.update(status='done', phase='done', finished_at=func.now(), last_error=None)
+            connection.execute(update(table).where(table.c.id == purge_id).values(**values))
+        self.batches += 1
+        return bool(remaining)
+
+    def _record_failure(self, purge_id, error):
+        table = RestaurantPurge.__table__
+        try:
+            with self._engine.begin() as connection:
+                attempts = connection.execute(select(table.c.attempts).where(table.c.id == purge_id)).scalar()
+                if attempts >= self.max_attempts:
+                    values = {'status': 'failed', 'lease_expires_at': None}
+                    self.failed += 1
+                else:
+                    delay = self.backoff_base * 2 ** (attempts - 1)
+                    values = {'status': 'pending', 'lease_expires_at': func.now() + timedelta(seconds=delay)}
+                connection.execute(
+                    update(table).where(table.c.id == purge_id)
+                    .values(last_error=str(error), updated_at=func.now(), **values)
+                )
+        except Exception as e:
+            # تنتهي مهلة الحجز ويستأنف عامل آخر المهمة
+            print(f"Restaurant purge status update failed for {purge_id}: {e}")
+
+    def stats(self):
+        return {
+            'workers': self.workers if self._pid == os.getpid() else 0,
+            'batch_size': self.batch_size,
+            'batches': self.batches,
+            'completed': self.completed,
+            'failed': self.failed
+        }
+
+
+def _add(counters, name, count):
+    counters[name] = counters.get(name, 0) + count
+
+
+def _collect_public_ids(public_ids, urls):
+    for url in urls:
+        public_id = extract_public_id_from_url(url)
+        if public_id and public_id not in public_ids:
+            public_ids.append(public_id)
+
+
+restaurant_purge_worker = RestaurantPurgeWorker()
+pg_listener.subscribe(PURGE_CHANNEL, restaurant_purge_worker.wake)
+
+
+def init_restaurant_purge(app):
+    """
+    Applies the RESTAURANT_PURGE_* settings. With RESTAURANT_PURGE_WORKERS > 0
+    every app process runs a worker thread, started on its first request;
+    with 0, run `flask restaurant-purge work` instead.
+    """
+    restaurant_purge_worker.configure(
+        app.config['RESTAURANT_PURGE_WORKERS'],
+        app.config['RESTAURANT_PURGE_BATCH_SIZE'],
+        app.config['RESTAURANT_PURGE_POLL_SECONDS'],
+        app.config['RESTAURANT_PURGE_MAX_ATTEMPTS']
+    )
+
+    @app.before_request
+    def start_restaurant_purge_worker():
+        restaurant_purge_worker.ensure_started(db.engine)
+
+
+def start_restaurant_purge(restaurant, requested_by):
+    """
+    Hides the restaurant, detaches its staff and queues a purge job in the
+    caller's transaction. Returns the RestaurantPurge row.
+    """
+    restaurant.status = 'deleting'
+    totals = {
+        'orders': db.session.query(func.count(Order.id)).filter(Order.restaurant_id == restaurant.id).scalar(),
+        'menu_items': db.session.query(func.count(MenuItem.id)).filter(MenuItem.restaurant_id == restaurant.id).scalar()
+    }
+    purge = RestaurantPurge(
+        restaurant_id=restaurant.id,
+        restaurant_name=restaurant.name,
+        requested_by=requested_by,
+        totals=totals,
+        deleted={},
+        pending_public_ids=[]
+    )
+    db.session.add(purge)
+    db.session.flush()
+    notify(db.session, PURGE_CHANNEL, {'id': purge.id})
+    return purge
+
+
+def retry_restaurant_purge(purge):
+    """
+    Requeues a failed purge in the caller's transaction: it resumes from its
+    current phase with a fresh attempt budget.
+    """
+    purge.status = 'pending'
+    purge.attempts = 0
+    purge.lease_expires_at = None
+    db.session.flush()
+    notify(db.session, PURGE_CHANNEL, {'id': purge.id})
+    return purge
+
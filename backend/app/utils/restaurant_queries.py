@@ -0,0 +1,117 @@
+from sqlalchemy import func, select, Float
+from geoalchemy2 import Geography
+from sqlalchemy.orm import selectinload
+from app.extensions import db
+from app.models import Restaurant, MenuItem
+from app.utils.search import search_rank
+
+
+def menu_item_count_subquery():
+    """Correlated COUNT of a restaurant's menu items."""
+    return (
+        select(func.count(MenuItem.id))
+        .where(MenuItem.restaurant_id == Restaurant.id)
+        .correlate(Restaurant)
+        .scalar_subquery()
+    )
+
+
+def restaurant_summary_query():
+    """
+    Column-limited query behind serialize_restaurant_summary.
+    Skips description, delivery_area and the menu; the location is returned as
+    plain coordinates computed by PostGIS.
+    """
+    return db.session.query(
+        Restaurant.id,
+        Restaurant.name,
+        Restaurant.logo_url,
+        Restaurant.address,
+        func.ST_Y(Restaurant.location).label('latitude'),
+        func.ST_X(Restaurant.location).label('longitude'),
+        Restaurant.status,
+        menu_item_count_subquery().label('item_count')
+    )
+
+
+def wants_full_detail(args):
+    """List endpoints return summaries unless the client asks for ?detail=full."""
+    return args.get('detail', 'summary').lower() == 'full'
+
+
+def restaurant_detail_options():
+    """Eager-loads the menu and item images embedded by serialize_restaurant."""
+    return (selectinload(Restaurant.menu_items).selectinload(MenuItem.images),)
+
+
+def restaurant_search_query(tsquery):
+    """
+    restaurant_summary_query() filtered by the search_vector GIN index and
+    ranked, with the rank as an extra 'rank' column. Best matches first.
+    """
+    rank = search_rank(Restaurant.search_vector, tsquery)
+    return (
+        restaurant_summary_query()
+        .add_columns(rank.label('rank'))
+        .filter(Restaurant.search_vector.op('@@')(tsquery))
+        .order_by(rank.desc(), Restaurant.id)
+    )
+
+
+def menu_item_search_query(tsquery):
+    """
+    Available menu items of active restaurants matching tsquery, ranked, as
+    (MenuItem, restaurant_name, rank) rows with images eager-loaded.
+    """
+    rank = search_rank(MenuItem.search_vector, tsquery)
+    return (
+        db.session.query(MenuItem, Restaurant.name.label('restaurant_name'), rank.label('rank'))
+        .join(Restaurant, Restaurant.id == MenuItem.restaurant_id)
+        .filter(
+            MenuItem.search_vector.op('@@')(tsquery),
+            MenuItem.is_available.is_(True),
+            Restaurant.status == 'active'
+        )
+        .options(selectinload(MenuItem.images))
+        .order_by(rank.desc(), MenuItem.id)
+    )
+
+
+def nearby_menu_item_search_query(tsquery, lon, lat):
+    """
+    menu_item_search_query() limited to restaurants whose delivery_area
+    contains (lon, lat). Coverage, text match, ranking and paging all run in
+    the same statement: ST_Contains uses the GiST index on delivery_area and
+    the @@ match the GIN index on search_vector.
+    """
+    customer_point = func.ST_SetSRID(func.ST_MakePoint(lon, lat), 4326)
+    return menu_item_search_query(tsquery).filter(func.ST_Contains(Restaurant.delivery_area, customer_point))
+
+
+def restaurant_geography():
+    """
+    restaurants.location as geography. Must stay identical to the expression
+    of idx_restaurants_location_geography for the planner to use that index.
+    """
+    return func.geography(Restaurant.location, type_=Geography)
+
+
+def nearest_restaurants_query(lon, lat, max_distance=None):
+    """
+    restaurant_summary_query() for active restaurants with a 'distance' column
+    (metres on the sphere) from (lon, lat). Returns (query, distance); order by
+    distance to get an index-driven KNN scan (<-> on the geography GiST index),
+    which only visits the rows it returns.
+    max_distance (metres) is applied with ST_DWithin on the same index, using the
+    sphere so that it agrees with the reported distance.
+    """
+    customer_point = func.geography(func.ST_SetSRID(func.ST_MakePoint(lon, lat), 4326), type_=Geography)
+    distance = restaurant_geography().op('<->', return_type=Float)(customer_point)
+    query = (
+        restaurant_summary_query()
+        .add_columns(distance.label('distance'))
+        .filter(Restaurant.status == 'active')
+    )
+    if max_distance is not None:
+        query = query.filter(func.ST_DWithin(restaurant_geography(), customer_point, max_distance, False))
+    return query, distance
@@ -0,0 +1,90 @@
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+from sqlalchemy import func, select, delete, insert, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.extensions import db
+from app.models import Order, OrderItem, RestaurantDailySales
+
+
+def order_sales_date(order, tz_name):
+    """The local calendar day an order is counted under in the rollup."""
+    return order.created_at.astimezone(ZoneInfo(tz_name)).date()
+
+
+def apply_status_change(order, old_status, new_status, tz_name):
+    """
+    Keeps restaurant_daily_sales in step with an order status change.
+    Must run inside the transaction that changes the status (with the order row
+    locked) so the rollup and the order commit or roll back together.
+    """
+    if (old_status == 'delivered') == (new_status == 'delivered'):
+        return
+    sign = 1 if new_status == 'delivered' else -1
+
+    item_count = db.session.query(func.coalesce(func.sum(OrderItem.quantity), 0)).filter(
+        OrderItem.order_id == order.id
+    ).scalar()
+
+    table = RestaurantDailySales.__table__
+    stmt = pg_insert(table).values(
+        restaurant_id=order.restaurant_id,
+        sales_date=order_sales_date(order, tz_name),
+        order_count=sign,
+        gross_sales=sign * order.total_price,
+        item_count=sign * item_count
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.restaurant_id, table.c.sales_date],
+        set_={
+            'order_count': table.c.order_count + stmt.excluded.order_count,
+            'gross_sales': table.c.gross_sales + stmt.excluded.gross_sales,
+            'item_count': table.c.item_count + stmt.excluded.item_count,
+            'updated_at': datetime.now(timezone.utc)
+        }
+    )
+    db.session.execute(stmt)
+
+
+def rebuild_daily_sales(tz_name, restaurant_id=None):
+    """
+    Recomputes the rollup from the orders table, for one restaurant or all of them.
+    The table is locked for the duration so concurrent status changes wait instead
+    of being lost or counted twice. Returns the number of rollup rows written.
+    """
+    table = RestaurantDailySales.__table__
+    db.session.execute(text('LOCK TABLE restaurant_daily_sales IN EXCLUSIVE MODE'))
+
+    clear = delete(table)
+    if restaurant_id is not None:
+        clear = clear.where(table.c.restaurant_id == restaurant_id)
+    db.session.execute(clear)
+
+    items_per_order = (
+        select(OrderItem.order_id, func.sum(OrderItem.quantity).label('quantity'))
+        .group_by(OrderItem.order_id)
+        .subquery()
+    )
+    local_day = func.date(func.timezone(tz_name, Order.created_at))
+    source = (
+        select(
+            Order.restaurant_id,
+            local_day.label('sales_date'),
+            func.count(Order.id),
+            func.sum(Order.total_price),
+            func.coalesce(func.sum(items_per_order.c.quantity), 0)
+        )
+        .select_from(Order.__table__.outerjoin(items_per_order, items_per_order.c.order_id == Order.id))
+        .where(Order.status == 'delivered')
+        .group_by(Order.restaurant_id, 'sales_date')
+    )
+    if restaurant_id is not None:
+        source = source.where(Order.restaurant_id == restaurant_id)
+
+    result = db.session.execute(
+        insert(table).from_select(
+            ['restaurant_id', 'sales_date', 'order_count', 'gross_sales', 'item_count'],
+            source
+        )
+    )
+    db.session.commit()
+    return result.rowcount
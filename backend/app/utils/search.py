@@ -0,0 +1,72 @@
+import re
+from sqlalchemy import func, literal_column
+
+# إعداد البحث النصي: 'simple' بلا تجذيع، لأن النصوص خليط من العربية والإنجليزية
+SEARCH_CONFIG = 'simple'
+
+# التشكيل (الفتحة..السكون، الحركات القرآنية، الألف الخنجرية) والتطويل
+ARABIC_DIACRITICS = r'[\u064B-\u065F\u0670\u0640]'
+# أشكال الألف والهمزة والتاء المربوطة والألف المقصورة وما تُوحَّد إليه؛ حرف مقابل حرف
+ARABIC_LETTERS_FROM = 'أإآٱؤئىة'  # أ إ آ ٱ ؤ ئ ى ة
+ARABIC_LETTERS_TO = 'ااااوييه'    # ا ا ا ا و ي ي ه
+
+_DIACRITICS_RE = re.compile(ARABIC_DIACRITICS)
+_TRANSLATION = str.maketrans(ARABIC_LETTERS_FROM, ARABIC_LETTERS_TO)
+_TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def normalize_arabic(text):
+    """
+    Python twin of the arabic_normalize() SQL function used by the
+    search_vector columns: strips diacritics and tatweel, unifies alef/hamza
+    forms, alef maqsura and taa marbuta, and lowercases.
+    Query text must be normalized the same way as the indexed text.
+    (The database needs a UTF-8 LC_CTYPE for the text search parser to treat
+    Arabic letters as word characters.)
+    """
+    if not text:
+        return ''
+    return _DIACRITICS_RE.sub('', text).lower().translate(_TRANSLATION)
+
+
+def build_tsquery(text):
+    """
+    A prefix tsquery matching every word of text ('شاورما دجاج' ->
+    'شاورما:* & دجاج:*'), or None if text has no words.
+    Only word characters reach to_tsquery, so user input cannot inject
+    tsquery operators.
+    """
+    tokens = _TOKEN_RE.findall(normalize_arabic(text))
+    if not tokens:
+        return None
+    return func.to_tsquery(literal_column(f"'{SEARCH_CONFIG}'"), ' & '.join(f'{token}:*' for token in tokens))
+
+
+def search_rank(search_vector, tsquery):
+    """Cover-density rank, normalized by document length (flag 1 = divide by 1 + log(length))."""
+    return func.ts_rank_cd(search_vector, tsquery, 1)
+
+
+def search_vector_sql(*weighted_columns):
+    """
+    SQL for a generated tsvector column: setweight(to_tsvector(normalized column), weight) || ...
+    weighted_columns are (column_name, weight) pairs; shared by the models and the migration.
+    """
+    parts = [
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', arabic_normalize({column})), '{weight}')"
+        for column, weight in weighted_columns
+    ]
+    return ' || '.join(parts)
+
+
+# تعريف الدالة في قاعدة البيانات؛ يجب أن تبقى مطابقة لـ normalize_arabic
+ARABIC_NORMALIZE_FUNCTION_SQL = f"""
+CREATE OR REPLACE FUNCTION arabic_normalize(input text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT translate(lower(regexp_replace(coalesce(input, ''), '{ARABIC_DIACRITICS}', '', 'g')),
+                     '{ARABIC_LETTERS_FROM}', '{ARABIC_LETTERS_TO}')
+$$
+"""
+
+RESTAURANT_SEARCH_VECTOR_SQL = search_vector_sql(('name', 'A'), ('description', 'B'), ('address', 'C'))
+MENU_ITEM_SEARCH_VECTOR_SQL = search_vector_sql(('name', 'A'), ('description', 'B'))
@@ -1,10 +1,34 @@
 from geoalchemy2.shape import to_shape
+from app.utils.content_store import is_content_key, content_url
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def serialize_user(user):
+# الصور القديمة المحفوظة محلياً تُخدم من مجلد static/uploads؛ الجديدة من مخزن المحتوى عبر /media
+UPLOADS_BASE_URL = f"{os.getenv('BACKEND_URL', 'http://localhost:5000')}/static/uploads"
+
+def local_upload_url(name):
+    return content_url(name) if is_content_key(name) else f"{UPLOADS_BASE_URL}/{name}"
+
+def serialize_image_variants(variants):
+    """{size: {'width', 'height', 'webp': url, 'jpeg': url}} or None while not generated."""
+    if not variants:
+        return None
+    return {
+        size: {
+            'width': entry['width'],
+            'height': entry['height'],
+            'webp': local_upload_url(entry['webp']),
+            'jpeg': local_upload_url(entry['jpeg'])
+        }
+        for size, entry in variants.items()
+    }
+
+def serialize_user(user, addresses=None):
+    """addresses: already serialized addresses (see addresses_by_user); loaded from the relationship if omitted."""
+    if addresses is None:
+        addresses = [serialize_user_address(addr) for addr in user.addresses]
     return {
         'id': user.id,
         'phone_number': user.phone_number,
@@ -17,15 +41,17 @@ def serialize_user(user):
         'oauth_provider': user.oauth_provider,
         'phone_number_verified': user.phone_number_verified,
         'associated_restaurant_id': user.associated_restaurant_id,
-        'addresses': [serialize_user_address(addr) for addr in user.addresses],
-        'created_at': user.created_at.isoformat() if user.created_at else None,
-        'updated_at': user.updated_at.isoformat() if user.updated_at else None
+        'addresses': addresses,
+        'created_at': user.created_at,
+        'updated_at': user.updated_at
     }
 
 # جديد: دالة لتحويل بيانات العنوان إلى JSON
 def serialize_user_address(address):
     location_data = None
-    if address.location:
+    if address.latitude is not None:
+        location_data = {'latitude': address.latitude, 'longitude': address.longitude}
+    elif address.location:
         point = to_shape(address.location)
         location_data = {'latitude': point.y, 'longitude': point.x}
     
@@ -35,7 +61,21 @@ def serialize_user_address(address):
         'name': address.name,
         'address_line': address.address_line,
         'location': location_data,
-        'created_at': address.created_at.isoformat() if address.created_at else None
+        'created_at': address.created_at
+    }
+
+def serialize_user_address_row(row):
+    """Same shape as serialize_user_address, for rows from addresses_by_user."""
+    location_data = None
+    if row.latitude is not None and row.longitude is not None:
+        location_data = {'latitude': row.latitude, 'longitude': row.longitude}
+    return {
+        'id': row.id,
+        'user_id': row.user_id,
+        'name': row.name,
+        'address_line': row.address_line,
+        'location': location_data,
+        'created_at': row.created_at
     }
 
 def serialize_restaurant_application(application):
@@ -51,7 +91,61 @@ def serialize_restaurant_application(application):
         'location_lon': application.location_lon,
         'delivery_area_geojson': application.delivery_area_geojson,
         'status': application.status,
-        'created_at': application.created_at.isoformat() if application.created_at else None
+        'created_at': application.created_at
+    }
+
+def serialize_email_outbox(message):
+    # لا يُعرض نص الرسالة لأنه قد يحتوي رموز تحقق
+    return {
+        'id': message.id,
+        'to_email': message.to_email,
+        'subject': message.subject,
+        'status': message.status,
+        'attempts': message.attempts,
+        'next_attempt_at': message.next_attempt_at,
+        'last_error': message.last_error,
+        'created_at': message.created_at,
+        'sent_at': message.sent_at
+    }
+
+def serialize_restaurant_purge(purge):
+    # نسبة التقدم من الطلبات والأصناف المعدودة عند بدء المهمة؛ 100 فقط بعد حذف صور Cloudinary أيضاً
+    deleted = purge.deleted or {}
+    total = sum((purge.totals or {}).values())
+    done = deleted.get('orders', 0) + deleted.get('menu_items', 0)
+    if purge.status == 'done':
+        progress = 100
+    else:
+        progress = min(99, round(100 * done / total)) if total else 0
+    return {
+        'id': purge.id,
+        'restaurant_id': purge.restaurant_id,
+        'restaurant_name': purge.restaurant_name,
+        'requested_by': purge.requested_by,
+        'status': purge.status,
+        'phase': purge.phase,
+        'progress': progress,
+        'totals': purge.totals,
+        'deleted': purge.deleted,
+        'remote_images_pending': len(purge.pending_public_ids or []),
+        'attempts': purge.attempts,
+        'last_error': purge.last_error,
+        'created_at': purge.created_at,
+        'updated_at': purge.updated_at,
+        'finished_at': purge.finished_at
+    }
+
+def serialize_upload_job(job):
+    return {
+        'job_id': job.id,
+        'kind': job.kind,
+        'target_id': job.target_id,
+        'filename': job.filename,
+        'status': job.status,
+        'url': job.result_url,
+        'error': job.error,
+        'created_at': job.created_at,
+        'finished_at': job.finished_at
     }
 
 def serialize_menu_item(menu_item):
@@ -60,26 +154,31 @@ def serialize_menu_item(menu_item):
         'restaurant_id': menu_item.restaurant_id,
         'name': menu_item.name,
         'description': menu_item.description,
-        'price': str(menu_item.price),
+        'price': menu_item.price,
         'is_available': menu_item.is_available,
         'images': [img.image_url for img in menu_item.images],
+        'image_variants': [serialize_image_variants(img.variants) for img in menu_item.images],
         'removable_ingredients': menu_item.removable_ingredients or [],
-        'created_at': menu_item.created_at.isoformat() if menu_item.created_at else None
+        'created_at': menu_item.created_at
     }
 
 
-def serialize_restaurant(restaurant):
+def serialize_restaurant(restaurant, include_menu=True):
     location_data = None
-    if restaurant.location:
-        point = to_shape(restaurant.location)
-        location_data = {'latitude': point.y, 'longitude': point.x}
-
     delivery_area_data = None
-    if restaurant.delivery_area:
-        polygon = to_shape(restaurant.delivery_area)
-        delivery_area_data = polygon.__geo_interface__
+    if restaurant.location_latitude is not None:
+        # الإحداثيات و GeoJSON جاهزة من PostGIS (restaurant_geometry_options)
+        location_data = {'latitude': restaurant.location_latitude, 'longitude': restaurant.location_longitude}
+        delivery_area_data = restaurant.delivery_area_geojson
+    else:
+        if restaurant.location:
+            point = to_shape(restaurant.location)
+            location_data = {'latitude': point.y, 'longitude': point.x}
+        if restaurant.delivery_area:
+            # المضلع نفسه؛ يرمزه مزود JSON إلى GeoJSON
+            delivery_area_data = to_shape(restaurant.delivery_area)
 
-    return {
+    data = {
         'id': restaurant.id,
         'name': restaurant.name,
         'description': restaurant.description,
@@ -89,24 +188,48 @@ def serialize_restaurant(restaurant):
         'delivery_area': delivery_area_data,
         'manager_id': restaurant.manager_id,
         'status': restaurant.status,
-        'created_at': restaurant.created_at.isoformat() if restaurant.created_at else None,
-        'menu_items': [serialize_menu_item(item) for item in restaurant.menu_items]
+        'created_at': restaurant.created_at
+    }
+    if include_menu:
+        data['menu_items'] = [serialize_menu_item(item) for item in restaurant.menu_items]
+    return data
+
+def serialize_restaurant_summary(row):
+    """
+    النسخة المختصرة للمطعم في القوائم (بدون القائمة ومنطقة التوصيل).
+    row هو صف من restaurant_summary_query.
+    """
+    location_data = None
+    if row.latitude is not None and row.longitude is not None:
+        location_data = {'latitude': row.latitude, 'longitude': row.longitude}
+
+    return {
+        'id': row.id,
+        'name': row.name,
+        'logo_url': row.logo_url or 'https://placehold.co/600x400/EFEFEF/AAAAAA?text=Logo',
+        'address': row.address,
+        'location': location_data,
+        'status': row.status,
+        'item_count': row.item_count
     }
 
 def serialize_order_item(order_item):
     menu_item_image_url = None
+    menu_item_image_variants = None
     if order_item.menu_item and order_item.menu_item.images:
         menu_item_image_url = order_item.menu_item.images[0].image_url
+        menu_item_image_variants = serialize_image_variants(order_item.menu_item.images[0].variants)
 
     return {
         'id': order_item.id,
         'menu_item_id': order_item.menu_item_id,
         'name': order_item.menu_item.name if order_item.menu_item else None,
         'quantity': order_item.quantity,
-        'price_at_order': str(order_item.price_at_order),
+        'price_at_order': order_item.price_at_order,
         'excluded_ingredients': order_item.excluded_ingredients or [],
         'notes': order_item.notes,
-        'menu_item_image_url': menu_item_image_url
+        'menu_item_image_url': menu_item_image_url,
+        'menu_item_image_variants': menu_item_image_variants
     }
 
 def serialize_payment(payment):
@@ -114,11 +237,11 @@ def serialize_payment(payment):
         return None
     return {
         'id': payment.id,
-        'amount': str(payment.amount),
+        'amount': payment.amount,
         'payment_method': payment.payment_method,
         'status': payment.status,
         'transaction_id': payment.transaction_id,
-        'created_at': payment.created_at.isoformat() if payment.created_at else None
+        'created_at': payment.created_at
     }
 
 def serialize_rating(rating):
@@ -128,12 +251,14 @@ def serialize_rating(rating):
         'id': rating.id,
         'restaurant_rating': rating.restaurant_rating,
         'comment': rating.comment,
-        'created_at': rating.created_at.isoformat() if rating.created_at else None
+        'created_at': rating.created_at
     }
 
 def serialize_order(order):
     delivery_location_data = None
-    if order.delivery_location:
+    if order.delivery_latitude is not None:
+        delivery_location_data = {'latitude': order.delivery_latitude, 'longitude': order.delivery_longitude}
+    elif order.delivery_location:
         point = to_shape(order.delivery_location)
         delivery_location_data = {'latitude': point.y, 'longitude': point.x}
 
@@ -152,11 +277,11 @@ def serialize_order(order):
         'restaurant_id': order.restaurant_id,
         'restaurant_name': order.restaurant_obj.name if order.restaurant_obj else None,
         'status': order.status,
-        'total_price': str(order.total_price),
+        'total_price': order.total_price,
         'delivery_address': order.delivery_address,
         'delivery_location': delivery_location_data,
-        'created_at': order.created_at.isoformat() if order.created_at else None,
-        'updated_at': order.updated_at.isoformat() if order.updated_at else None,
+        'created_at': order.created_at,
+        'updated_at': order.updated_at,
         'order_items': [serialize_order_item(item) for item in order.order_items],
         'payment': serialize_payment(order.payment),
         'rating': serialize_rating(order.rating)
@@ -27,64 +27,14 @@
     # )
     # return True # افترض النجاح لأغراض العرض التوضيحي
 
-import os
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import ssl
-
-# دالة عامة لإرسال رسائل البريد الإلكتروني
-def send_email(to_email: str, subject: str, body: str) -> bool:
-    """
-    Sends an email using SMTP configuration from .env.
-    Supports TLS or SSL based on environment variables.
-    """
-    sender_email = os.getenv("MAIL_SENDER_EMAIL")
-    sender_name = os.getenv("MAIL_SENDER_NAME")
-    mail_username = os.getenv("MAIL_USERNAME")
-    mail_password = os.getenv("MAIL_PASSWORD")
-    smtp_server = os.getenv("MAIL_SERVER")
-    smtp_port = int(os.getenv("MAIL_PORT", 587))
-    use_tls = os.getenv("MAIL_USE_TLS", "True").lower() == 'true'
-    use_ssl = os.getenv("MAIL_USE_SSL", "False").lower() == 'true'
-
-    if not all([sender_email, mail_username, mail_password, smtp_server]):
-        print("SMTP configuration missing in .env. Cannot send email.")
-        return False
-
-    from_header = f"{sender_name} <{sender_email}>" if sender_name else sender_email
-
-    msg = MIMEMultipart()
-    msg['From'] = from_header
-    msg['To'] = to_email
-    msg['Subject'] = subject
-    msg.attach(MIMEText(body, 'plain'))
-
-    try:
-        if use_ssl:
-            context = ssl.create_default_context()
-            with smtplib.SMTP_SSL(smtp_server, smtp_port, context=context) as server:
-                server.login(mail_username, mail_password)
-                server.send_message(msg)
-        else:
-            with smtplib.SMTP(smtp_server, smtp_port) as server:
-                if use_tls:
-                    server.starttls(context=ssl.create_default_context())
-                server.login(mail_username, mail_password)
-                server.send_message(msg)
-
-        print(f"✅ Email sent to {to_email} successfully.")
-        return True
-    except Exception as e:
-        print(f"❌ Failed to send email to {to_email}: {e}")
-        return False
-
+from app.utils.email_utils import send_email
 
 # دالة إرسال رمز التحقق لأي غرض
 def send_sms_verification_email(user, code: str, method: str = "email") -> bool:
     """
     Send verification code via email or (placeholder) SMS/WhatsApp.
     method: "email" or "sms"
+    Emails are queued in the outbox; the caller must commit db.session.
     """
     if method == "email":
         subject = "رمز التحقق من بريدك الإلكتروني لتطبيق خسى الجوع"
@@ -95,7 +45,8 @@ def send_sms_verification_email(user, code: str, method: str = "email") -> bool:
 صالح لمدة 5 دقائق.
 """
         # ✅ هنا نصحح الخطأ: نستدعي send_email بدل ما نستدعي send_sms_verification_email
-        return send_email(user.email, subject, body)
+        send_email(user.email, subject, body)
+        return True
     
     elif method == "sms":
         # دالة وهمية لإرسال رسالة SMS أو WhatsApp
@@ -0,0 +1,70 @@
+from datetime import datetime, time, timedelta
+from sqlalchemy import func, select, cast, literal, TIMESTAMP
+from sqlalchemy.dialects.postgresql import INTERVAL
+from app.extensions import db
+from app.models import RestaurantDailySales
+
+GRANULARITIES = ['day', 'week', 'month']
+
+
+def count_buckets(start_date, end_date, granularity):
+    """Number of day/week/month buckets touched by the inclusive range."""
+    if granularity == 'day':
+        return (end_date - start_date).days + 1
+    if granularity == 'week':
+        first_monday = start_date - timedelta(days=start_date.weekday())
+        return (end_date - first_monday).days // 7 + 1
+    return (end_date.year - start_date.year) * 12 + end_date.month - start_date.month + 1
+
+
+def coarsen_granularity(start_date, end_date, granularity, max_buckets):
+    """Moves to a coarser granularity until the series fits in max_buckets points."""
+    index = GRANULARITIES.index(granularity)
+    while index < len(GRANULARITIES) - 1 and count_buckets(start_date, end_date, GRANULARITIES[index]) > max_buckets:
+        index += 1
+    return GRANULARITIES[index]
+
+
+def sales_series(restaurant_id, start_date, end_date, granularity):
+    """
+    Delivered-order sales grouped into day/week/month buckets, read from the
+    restaurant_daily_sales rollup in one query, so the cost depends on the number
+    of days in the range rather than the number of orders.
+    generate_series supplies every bucket in the range so empty buckets come back as zeros.
+    Returns a list of (bucket_start_date, sales, orders_count).
+    """
+    # sales_date هو التاريخ المحلي للمطعم مسبقاً، لذلك لا حاجة لتحويل المنطقة الزمنية هنا
+    bucket = func.date_trunc(granularity, cast(RestaurantDailySales.sales_date, TIMESTAMP))
+    sales = (
+        select(
+            bucket.label('bucket'),
+            func.sum(RestaurantDailySales.gross_sales).label('sales'),
+            func.sum(RestaurantDailySales.order_count).label('orders_count')
+        )
+        .where(
+            RestaurantDailySales.restaurant_id == restaurant_id,
+            RestaurantDailySales.sales_date.between(start_date, end_date)
+        )
+        .group_by('bucket')
+        .subquery()
+    )
+
+    buckets = select(
+        func.generate_series(
+            func.date_trunc(granularity, datetime.combine(start_date, time.min)),
+            datetime.combine(end_date, time.min),
+            cast(literal(f'1 {granularity}'), INTERVAL)
+        ).label('bucket')
+    ).subquery()
+
+    rows = db.session.execute(
+        select(
+            buckets.c.bucket,
+            func.coalesce(sales.c.sales, 0),
+            func.coalesce(sales.c.orders_count, 0)
+        )
+        .select_from(buckets.outerjoin(sales, buckets.c.bucket == sales.c.bucket))
+        .order_by(buckets.c.bucket)
+    ).all()
+
+    return [(bucket_start.date(), total, int(count)) for bucket_start, total, count in rows]
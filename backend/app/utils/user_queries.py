@@ -0,0 +1,93 @@
+import re
+from collections import defaultdict
+from sqlalchemy import func, or_
+from app.extensions import db
+from app.models import User, UserAddress
+from app.utils.serializers import serialize_user_address_row
+
+
+def addresses_by_user(user_ids):
+    """
+    Serialized addresses for a page of users in one query, keyed by user id.
+    Coordinates come from PostGIS (ST_Y/ST_X) instead of parsing WKB per row;
+    pass the result to serialize_user(user, addresses=...).
+    """
+    grouped = defaultdict(list)
+    if not user_ids:
+        return grouped
+    rows = db.session.query(
+        UserAddress.id,
+        UserAddress.user_id,
+        UserAddress.name,
+        UserAddress.address_line,
+        func.ST_Y(UserAddress.location).label('latitude'),
+        func.ST_X(UserAddress.location).label('longitude'),
+        UserAddress.created_at
+    ).filter(UserAddress.user_id.in_(user_ids)).order_by(UserAddress.user_id, UserAddress.id).all()
+    for row in rows:
+        grouped[row.user_id].append(serialize_user_address_row(row))
+    return grouped
+
+
+# أقصر نص يستطيع فهرس الثلاثيات (pg_trgm) خدمته؛ الأقصر يُطابق تطابقاً تاماً
+TRIGRAM_MIN_LENGTH = 3
+PHONE_QUERY_PATTERN = re.compile(r'^\+?[\d\s\-()]+$')
+
+
+def escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def email_matches(term):
+    """Users whose email contains term (ILIKE, pg_trgm GIN index), most similar first."""
+    pattern = f"%{escape_like(term.lower())}%"
+    return (
+        User.query
+        .filter(User.email.ilike(pattern, escape='\\'))
+        .order_by(func.similarity(User.email, term.lower()).desc(), User.id)
+    )
+
+
+def find_users(term, limit):
+    """
+    Users matching term, best matches first, at most limit of them.
+    - Phone-like terms (digits, +, spaces, dashes): prefix matches on
+      phone_number first, with or without a leading '+', from the
+      text_pattern_ops index; the rest of the page is filled with substring
+      matches from the pg_trgm index, then with email matches as below
+      (so "2024" still finds ali2024@...).
+    - Other terms: substring matches on email (ILIKE, pg_trgm GIN index)
+      ranked by trigram similarity.
+    - Terms shorter than TRIGRAM_MIN_LENGTH, which a trigram index cannot
+      serve, only match an exact email or phone number.
+    """
+    term = term.strip()
+    if len(term) < TRIGRAM_MIN_LENGTH:
+        return User.query.filter(or_(User.email == term.lower(), User.phone_number == term)).limit(limit).all()
+
+    if PHONE_QUERY_PATTERN.match(term):
+        digits = re.sub(r'[^\d+]', '', term)
+        escaped = escape_like(digits)
+        prefixes = [f"{escaped}%"] if digits.startswith('+') else [f"{escaped}%", f"+{escaped}%"]
+        users = (
+            User.query
+            .filter(or_(*[User.phone_number.like(p, escape='\\') for p in prefixes]))
+            .order_by(User.phone_number)
+            .limit(limit)
+            .all()
+        )
+        if len(users) < limit and len(digits.lstrip('+')) >= TRIGRAM_MIN_LENGTH:
+            contains = User.query.filter(
+                User.phone_number.like(f"%{escape_like(digits.lstrip('+'))}%", escape='\\')
+            )
+            if users:
+                contains = contains.filter(User.id.notin_([u.id for u in users]))
+            users += contains.order_by(User.phone_number).limit(limit - len(users)).all()
+        if len(users) < limit:
+            emails = email_matches(term)
+            if users:
+                emails = emails.filter(User.id.notin_([u.id for u in users]))
+            users += emails.limit(limit - len(users)).all()
+        return users
+
+    return email_matches(term).limit(limit).all()
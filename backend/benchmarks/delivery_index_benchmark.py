@@ -0,0 +1,121 @@
+"""
+Benchmark: in-memory STRtree delivery-area lookups vs the PostGIS ST_Within query.
+
+Generates N random delivery polygons around Riyadh, then times M random
+customer points through both paths:
+  - memory:  shapely STRtree over prepared polygons (app.utils.delivery_index)
+  - postgis: SELECT id FROM <temp table> WHERE ST_Within(point, delivery_area),
+             with a GiST index, one round trip per point (as get_restaurants does)
+
+The PostGIS part runs only when DATABASE_URL points at a PostGIS database; it
+uses a TEMPORARY table and leaves no data behind.
+
+Usage (from backend/):
+    python benchmarks/delivery_index_benchmark.py --restaurants 2000 --points 5000
+"""
+import argparse
+import math
+import os
+import random
+import statistics
+import time
+from shapely.geometry import Point, Polygon
+from shapely.prepared import prep
+from shapely.strtree import STRtree
+
+CENTER_LON, CENTER_LAT = 46.6753, 24.7136
+
+
+def random_polygon(rng, vertices=12):
+    lon = CENTER_LON + rng.uniform(-0.5, 0.5)
+    lat = CENTER_LAT + rng.uniform(-0.5, 0.5)
+    radius = rng.uniform(0.02, 0.12)
+    points = []
+    for i in range(vertices):
+        angle = 2 * math.pi * i / vertices
+        r = radius * rng.uniform(0.7, 1.0)
+        points.append((lon + r * math.cos(angle), lat + r * math.sin(angle)))
+    return Polygon(points)
+
+
+def random_points(rng, count):
+    return [(CENTER_LON + rng.uniform(-0.55, 0.55), CENTER_LAT + rng.uniform(-0.55, 0.55)) for _ in range(count)]
+
+
+def report(name, timings, extra=''):
+    timings = sorted(timings)
+    p50 = timings[len(timings) // 2]
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    print(f"{name:<10} mean={statistics.mean(timings) * 1e6:9.1f}us  p50={p50 * 1e6:9.1f}us  p99={p99 * 1e6:9.1f}us {extra}")
+
+
+def bench_memory(polygons, points):
+    started = time.perf_counter()
+    tree = STRtree(polygons)
+    prepared = [prep(p) for p in polygons]
+    build = time.perf_counter() - started
+
+    timings, results = [], []
+    for lon, lat in points:
+        t0 = time.perf_counter()
+        point = Point(lon, lat)
+        results.append(sorted(int(i) for i in tree.query(point) if prepared[i].contains(point)))
+        timings.append(time.perf_counter() - t0)
+    report('memory', timings, f'(build {build * 1000:.1f}ms)')
+    return results
+
+
+def bench_postgis(database_url, polygons, points):
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(database_url)
+    with engine.connect() as connection:
+        connection.execute(text(
+            'CREATE TEMPORARY TABLE bench_delivery_areas (id integer PRIMARY KEY, delivery_area geometry(POLYGON, 4326))'
+        ))
+        connection.execute(
+            text('INSERT INTO bench_delivery_areas VALUES (:id, ST_GeomFromText(:wkt, 4326))'),
+            [{'id': i, 'wkt': p.wkt} for i, p in enumerate(polygons)]
+        )
+        connection.execute(text('CREATE INDEX ON bench_delivery_areas USING gist (delivery_area)'))
+        connection.execute(text('ANALYZE bench_delivery_areas'))
+
+        query = text(
+            'SELECT id FROM bench_delivery_areas '
+            'WHERE ST_Within(ST_SetSRID(ST_MakePoint(:lon, :lat), 4326), delivery_area) ORDER BY id'
+        )
+        timings, results = [], []
+        for lon, lat in points:
+            t0 = time.perf_counter()
+            results.append([row[0] for row in connection.execute(query, {'lon': lon, 'lat': lat})])
+            timings.append(time.perf_counter() - t0)
+        connection.rollback()
+    report('postgis', timings)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--restaurants', type=int, default=2000)
+    parser.add_argument('--points', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    polygons = [random_polygon(rng) for _ in range(args.restaurants)]
+    points = random_points(rng, args.points)
+    print(f"{args.restaurants} delivery areas, {args.points} lookups")
+
+    memory_results = bench_memory(polygons, points)
+
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url or not database_url.startswith('postgresql'):
+        print("postgis    skipped (set DATABASE_URL to a PostGIS database)")
+        return
+    postgis_results = bench_postgis(database_url, polygons, points)
+    mismatches = sum(1 for a, b in zip(memory_results, postgis_results) if a != b)
+    print(f"result mismatches: {mismatches}")
+
+
+if __name__ == '__main__':
+    main()
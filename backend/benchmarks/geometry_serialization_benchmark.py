@@ -0,0 +1,125 @@
+"""
+Benchmark: serializing restaurant geometries in Python (shapely) versus in PostGIS.
+
+Builds a TEMPORARY table of restaurants with large delivery polygons (buffers
+around a point with --vertices vertices each) and times, per path, fetching
+--rows rows and producing the JSON body the API would return:
+  - shapely      WKB fetched through GeoAlchemy2, to_shape() per row,
+                 point.x/point.y and polygon.__geo_interface__ (the old serializers)
+  - postgis      ST_Y/ST_X and ST_AsGeoJSON(delivery_area, precision)::json
+                 (app.utils.geo_sql.restaurant_geometry_options)
+  - simplified   the same with ST_SimplifyPreserveTopology(delivery_area, tolerance),
+                 as used for the restaurant lists
+Prints the median time and the response size for each.
+
+Needs DATABASE_URL pointing at PostgreSQL with PostGIS. Leaves no data behind.
+
+Usage (from backend/):
+    python benchmarks/geometry_serialization_benchmark.py --rows 200 --vertices 4000 --repeat 10
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from geoalchemy2 import Geometry
+from geoalchemy2.shape import to_shape
+from sqlalchemy import create_engine, text, column, table, select, func, Float, Numeric
+from sqlalchemy.dialects.postgresql import JSON
+
+METRES_PER_DEGREE = 111320
+
+bench_restaurants = table(
+    'bench_restaurants',
+    column('id'),
+    column('location', Geometry('POINT', srid=4326)),
+    column('delivery_area', Geometry('POLYGON', srid=4326)),
+)
+
+
+def coordinate(expression, precision):
+    return func.round(expression.cast(Numeric), precision).cast(Float)
+
+
+def shapely_path(connection, precision, simplify_tolerance):
+    rows = connection.execute(select(bench_restaurants.c.id, bench_restaurants.c.location, bench_restaurants.c.delivery_area)).all()
+    body = []
+    for row in rows:
+        point = to_shape(row.location)
+        body.append({
+            'id': row.id,
+            'location': {'latitude': point.y, 'longitude': point.x},
+            'delivery_area': to_shape(row.delivery_area).__geo_interface__,
+        })
+    return body
+
+
+def postgis_path(connection, precision, simplify_tolerance):
+    area = bench_restaurants.c.delivery_area
+    if simplify_tolerance:
+        area = func.ST_SimplifyPreserveTopology(area, simplify_tolerance)
+    rows = connection.execute(select(
+        bench_restaurants.c.id,
+        coordinate(func.ST_Y(bench_restaurants.c.location), precision).label('latitude'),
+        coordinate(func.ST_X(bench_restaurants.c.location), precision).label('longitude'),
+        func.ST_AsGeoJSON(area, precision).cast(JSON).label('delivery_area'),
+    )).all()
+    return [
+        {'id': row.id, 'location': {'latitude': row.latitude, 'longitude': row.longitude}, 'delivery_area': row.delivery_area}
+        for row in rows
+    ]
+
+
+def measure(connection, path, repeat, precision, simplify_tolerance):
+    timings, size = [], 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        size = len(json.dumps(path(connection, precision, simplify_tolerance), separators=(',', ':')))
+        timings.append(time.perf_counter() - t0)
+    return statistics.median(timings), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--vertices', type=int, default=4000, help='approximate vertices per delivery polygon')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--precision', type=int, default=6)
+    parser.add_argument('--simplify', type=float, default=10, help='simplification tolerance in metres')
+    args = parser.parse_args()
+
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url or not database_url.startswith('postgresql'):
+        raise SystemExit("Set DATABASE_URL to a PostgreSQL database with PostGIS.")
+
+    engine = create_engine(database_url)
+    with engine.connect() as connection:
+        connection.execute(text(
+            'CREATE TEMPORARY TABLE bench_restaurants ('
+            'id integer PRIMARY KEY, location geometry(POINT, 4326), delivery_area geometry(POLYGON, 4326))'
+        ))
+        # دوائر نصف قطرها ~5 كم حول نقاط في الرياض؛ quad_segs يحدد عدد الرؤوس
+        connection.execute(text(
+            "INSERT INTO bench_restaurants "
+            "SELECT g, p, ST_Buffer(p, 0.045, :quad_segs) "
+            "FROM generate_series(1, :rows) AS g, "
+            "LATERAL (SELECT ST_SetSRID(ST_MakePoint(46.6 + random() * 0.3, 24.6 + random() * 0.3), 4326) AS p) AS pt"
+        ), {'rows': args.rows, 'quad_segs': max(1, args.vertices // 4)})
+        connection.execute(text('ANALYZE bench_restaurants'))
+
+        simplify_tolerance = args.simplify / METRES_PER_DEGREE
+        baseline = None
+        print(f"{args.rows} restaurants, ~{args.vertices} vertices per delivery area, precision {args.precision}")
+        for name, path, tolerance in (
+            ('shapely', shapely_path, None),
+            ('postgis', postgis_path, None),
+            (f'simplified {args.simplify:g}m', postgis_path, simplify_tolerance),
+        ):
+            median, size = measure(connection, path, args.repeat, args.precision, tolerance)
+            baseline = baseline or median
+            print(f"{name:<16} median={median * 1000:9.2f}ms  x{baseline / median:5.2f}  body={size / 1024:10.1f} KiB")
+        connection.rollback()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark: encoding large order and restaurant payloads with the stdlib JSON
+provider (JSON_COMPAT_OUTPUT, byte-identical to the old output) versus the
+orjson-backed FastJSONProvider.
+
+Builds transient model objects in memory (no database rows are read):
+  - orders       --orders orders with --items items each, payment and customer
+  - restaurants  --restaurants restaurants with --menu-items menu items each
+                 and a delivery polygon of --vertices vertices
+and times, for each provider, the serializer plus the response encoding, and
+the encoding alone on the already-serialized dicts. Prints the median time
+and the body size.
+
+Runs without PostgreSQL (DATABASE_URL defaults to in-memory SQLite).
+
+Usage (from backend/):
+    python benchmarks/json_encoding_benchmark.py --orders 2000 --items 5 --repeat 20
+"""
+import argparse
+import math
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from geoalchemy2.elements import WKTElement  # noqa: E402
+from app import app  # noqa: E402
+from app.models import Restaurant, MenuItem, MenuItemImage, Order, OrderItem, Payment, User  # noqa: E402
+from app.utils.serializers import serialize_order, serialize_restaurant  # noqa: E402
+
+
+def polygon_wkt(lon, lat, vertices, radius=0.045):
+    ring = [
+        (lon + radius * math.cos(2 * math.pi * i / vertices), lat + radius * math.sin(2 * math.pi * i / vertices))
+        for i in range(vertices)
+    ]
+    ring.append(ring[0])
+    return 'POLYGON((' + ','.join(f'{x} {y}' for x, y in ring) + '))'
+
+
+def build_restaurants(count, menu_items, vertices):
+    created_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    restaurants = []
+    for r in range(count):
+        restaurant = Restaurant(
+            id=r + 1, name=f'مطعم الشاورما {r}', description='أفضل شاورما في المدينة', address='الرياض، حي العليا',
+            location=WKTElement(f'POINT(46.{r % 100:02d} 24.7)', srid=4326),
+            delivery_area=WKTElement(polygon_wkt(46.6, 24.7, vertices), srid=4326),
+            manager_id=1, status='active', created_at=created_at
+        )
+        restaurant.menu_items = [
+            MenuItem(
+                id=r * menu_items + i, restaurant_id=r + 1, name=f'وجبة شاورما دجاج {i}', description='مع بطاطس ومخلل',
+                price=Decimal('24.50'), is_available=True, removable_ingredients=['بصل', 'مخلل'], created_at=created_at,
+                images=[MenuItemImage(id=i, image_url=f'https://res.cloudinary.com/demo/{i}.jpg', variants=None)]
+            )
+            for i in range(menu_items)
+        ]
+        restaurants.append(restaurant)
+    return restaurants
+
+
+def build_orders(count, items, restaurant):
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    customer = User(id=7, name='عبدالله', phone_number='+966500000000')
+    orders = []
+    for o in range(count):
+        created_at = base + timedelta(minutes=o, microseconds=o)
+        order = Order(
+            id=o + 1, user_id=7, restaurant_id=restaurant.id, status='delivered', total_price=Decimal('98.00'),
+            delivery_address='الرياض، شارع الملك فهد', delivery_location=WKTElement('POINT(46.68 24.71)', srid=4326),
+            created_at=created_at, updated_at=created_at
+        )
+        order.order_items = [
+            OrderItem(id=o * items + i, menu_item_id=menu_item.id, quantity=2, price_at_order=Decimal('24.50'),
+                      excluded_ingredients=['بصل'], notes='بدون حار', menu_item=menu_item)
+            for i, menu_item in enumerate(restaurant.menu_items[:items])
+        ]
+        order.payment = Payment(id=o + 1, amount=Decimal('98.00'), payment_method='card', status='paid', created_at=created_at)
+        order.customer = customer
+        order.restaurant_obj = restaurant
+        orders.append(order)
+    return orders
+
+
+def timed(fn, repeat):
+    timings, size = [], 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        size = len(fn())
+        timings.append(time.perf_counter() - t0)
+    return statistics.median(timings), size
+
+
+def run(label, objects, serializer, repeat):
+    print(f"-- {label}")
+    serialized = [serializer(obj) for obj in objects]
+    for provider, compat in (('stdlib', True), ('orjson', False)):
+        app.config['JSON_COMPAT_OUTPUT'] = compat
+        full, size = timed(lambda: app.json.response([serializer(obj) for obj in objects]).get_data(), repeat)
+        encode, _ = timed(lambda: app.json.response(serialized).get_data(), repeat)
+        print(f"{provider:<7} serialize+encode={full * 1000:9.2f}ms  encode={encode * 1000:9.2f}ms  body={size / 1024:9.1f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=2000)
+    parser.add_argument('--items', type=int, default=5, help='items per order')
+    parser.add_argument('--restaurants', type=int, default=50)
+    parser.add_argument('--menu-items', type=int, default=40)
+    parser.add_argument('--vertices', type=int, default=1000, help='vertices per delivery polygon')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    restaurants = build_restaurants(args.restaurants, args.menu_items, args.vertices)
+    orders = build_orders(args.orders, args.items, restaurants[0])
+    with app.test_request_context():
+        run(f'{args.orders} orders x {args.items} items', orders, serialize_order, args.repeat)
+        run(f'{args.restaurants} restaurants x {args.menu_items} menu items, {args.vertices}-vertex areas',
+            restaurants, serialize_restaurant, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark: order creation latency and statement count against cart size.
+
+Compares the previous per-line path (one MenuItem lookup per cart line, ORM
+add + flush per row) with app.utils.order_placement (one IN lookup, then
+order + payment in one INSERT ... RETURNING and a multi-row item insert).
+Every iteration runs in a transaction that is rolled back, so the database
+is left unchanged.
+
+Needs DATABASE_URL pointing at a populated PostgreSQL database with at least
+one user and one restaurant that has available menu items.
+
+Usage (from backend/):
+    python benchmarks/order_creation_benchmark.py --sizes 1 5 15 30 --repeat 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geoalchemy2.elements import WKTElement
+from sqlalchemy import event, func
+from app import app
+from app.extensions import db
+from app.models import Order, OrderItem, MenuItem, Payment, User
+from app.utils.order_placement import price_cart, insert_order
+
+
+def legacy_create(user_id, restaurant_id, items, location):
+    total_price = 0
+    order_items = []
+    for item_data in items:
+        menu_item = MenuItem.query.filter_by(id=item_data['menu_item_id'], restaurant_id=restaurant_id, is_available=True).first()
+        total_price += menu_item.price * item_data['quantity']
+        order_items.append(OrderItem(menu_item_id=menu_item.id, quantity=item_data['quantity'], price_at_order=menu_item.price))
+    order = Order(user_id=user_id, restaurant_id=restaurant_id, total_price=total_price,
+                  delivery_address='benchmark', delivery_location=location, status='pending')
+    db.session.add(order)
+    db.session.flush()
+    for item in order_items:
+        item.order_id = order.id
+        db.session.add(item)
+    db.session.add(Payment(order_id=order.id, amount=total_price, payment_method='cash_on_delivery', status='pending'))
+    db.session.flush()
+
+
+def batched_create(user_id, restaurant_id, items, location):
+    total_price, rows = price_cart(restaurant_id, items)
+    insert_order(user_id, restaurant_id, total_price, 'benchmark', location, 'cash_on_delivery', rows)
+
+
+def run(path, user_id, restaurant_id, items, location, repeat, counter):
+    timings, statements = [], []
+    for _ in range(repeat):
+        counter[0] = 0
+        t0 = time.perf_counter()
+        path(user_id, restaurant_id, items, location)
+        timings.append(time.perf_counter() - t0)
+        statements.append(counter[0])
+        db.session.rollback()
+    return statistics.median(timings) * 1000, statistics.median(statements)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 5, 15, 30])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    with app.app_context():
+        restaurant_id, available = (
+            db.session.query(MenuItem.restaurant_id, func.count(MenuItem.id))
+            .filter(MenuItem.is_available.is_(True))
+            .group_by(MenuItem.restaurant_id)
+            .order_by(func.count(MenuItem.id).desc())
+            .first()
+        ) or (None, 0)
+        user = User.query.first()
+        if restaurant_id is None or user is None:
+            print("Need at least one user and one restaurant with available menu items.")
+            return
+        menu_ids = [i for (i,) in db.session.query(MenuItem.id).filter_by(restaurant_id=restaurant_id, is_available=True)]
+        location = WKTElement('POINT(46.6753 24.7136)', srid=4326)
+
+        counter = [0]
+
+        @event.listens_for(db.engine, 'before_cursor_execute')
+        def count_statements(*_):
+            counter[0] += 1
+
+        print(f"restaurant {restaurant_id} ({available} available items), {args.repeat} runs per size")
+        print(f"{'cart':>5} {'legacy ms':>10} {'stmts':>6} {'batched ms':>11} {'stmts':>6}")
+        for size in args.sizes:
+            # Menu items repeat when the restaurant has fewer items than the cart size
+            items = [{'menu_item_id': menu_ids[i % len(menu_ids)], 'quantity': 1 + i % 3} for i in range(size)]
+            legacy_ms, legacy_stmts = run(legacy_create, user.id, restaurant_id, items, location, args.repeat, counter)
+            batched_ms, batched_stmts = run(batched_create, user.id, restaurant_id, items, location, args.repeat, counter)
+            print(f"{size:>5} {legacy_ms:>10.2f} {legacy_stmts:>6.0f} {batched_ms:>11.2f} {batched_stmts:>6.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark: admin user search on a million synthetic users, before and after
+the pg_trgm / text_pattern_ops indexes.
+
+Builds a TEMPORARY copy of the searched users columns with generate_series,
+then runs the queries issued by app.utils.user_queries.find_users:
+  - email substring   ILIKE '%q%' ORDER BY similarity(email, q) DESC LIMIT n
+  - phone prefix      phone_number LIKE 'q%' OR LIKE '+q%' ORDER BY phone_number LIMIT n
+  - phone substring   phone_number LIKE '%q%' LIMIT n
+and the old unbounded query (email ILIKE '%q%' OR phone_number ILIKE '%q%').
+Each is timed and its top plan nodes are printed, first without indexes
+(sequential scans), then with the indexes from migration 8b5c7e0f1d63.
+
+Needs DATABASE_URL pointing at PostgreSQL with the pg_trgm extension
+available (CREATE EXTENSION needs the right privileges). Leaves no data behind.
+
+Usage (from backend/):
+    python benchmarks/user_search_benchmark.py --users 1000000 --repeat 20
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from sqlalchemy import create_engine, text
+
+QUERIES = {
+    'old unbounded': (
+        "SELECT id FROM bench_users WHERE email ILIKE :contains OR phone_number ILIKE :contains",
+        'user4242'
+    ),
+    'email substring': (
+        "SELECT id FROM bench_users WHERE email ILIKE :contains "
+        "ORDER BY similarity(email, :term) DESC, id LIMIT :limit",
+        'user4242'
+    ),
+    'phone prefix': (
+        "SELECT id FROM bench_users WHERE phone_number LIKE :prefix OR phone_number LIKE :plus_prefix "
+        "ORDER BY phone_number LIMIT :limit",
+        '96650042'
+    ),
+    'phone substring': (
+        "SELECT id FROM bench_users WHERE phone_number LIKE :contains ORDER BY phone_number LIMIT :limit",
+        '0424242'
+    ),
+}
+
+INDEXES = [
+    'CREATE INDEX ON bench_users USING gin (email gin_trgm_ops)',
+    'CREATE INDEX ON bench_users USING gin (phone_number gin_trgm_ops)',
+    'CREATE INDEX ON bench_users (phone_number text_pattern_ops)',
+]
+
+
+def params_for(term, limit):
+    return {
+        'term': term,
+        'contains': f'%{term}%',
+        'prefix': f'{term}%',
+        'plus_prefix': f'+{term}%',
+        'limit': limit,
+    }
+
+
+def plan_nodes(plan):
+    """Node types of a JSON EXPLAIN plan, outermost first."""
+    nodes = [plan['Node Type'] + (f" on {plan['Index Name']}" if 'Index Name' in plan else '')]
+    for child in plan.get('Plans', []):
+        nodes.extend(plan_nodes(child))
+    return nodes
+
+
+def run(connection, label, repeat, limit):
+    print(f"-- {label}")
+    for name, (sql, term) in QUERIES.items():
+        params = params_for(term, limit)
+        plan = connection.execute(text(f'EXPLAIN (FORMAT JSON) {sql}'), params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        timings, rows = [], 0
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            rows = len(connection.execute(text(sql), params).all())
+            timings.append(time.perf_counter() - t0)
+        print(f"{name:<16} median={statistics.median(timings) * 1000:9.2f}ms rows={rows:<6} plan: {' > '.join(plan_nodes(plan[0]['Plan']))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url or not database_url.startswith('postgresql'):
+        raise SystemExit("Set DATABASE_URL to a PostgreSQL database.")
+
+    engine = create_engine(database_url)
+    with engine.connect() as connection:
+        connection.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+        t0 = time.perf_counter()
+        connection.execute(text(
+            'CREATE TEMPORARY TABLE bench_users (id integer PRIMARY KEY, email varchar(255), phone_number varchar(20))'
+        ))
+        connection.execute(text(
+            "INSERT INTO bench_users "
+            "SELECT g, 'user' || g || '@example' || (g % 97) || '.com', '+9665' || lpad(g::text, 8, '0') "
+            "FROM generate_series(1, :users) AS g"
+        ), {'users': args.users})
+        connection.execute(text('ANALYZE bench_users'))
+        print(f"{args.users} users loaded in {time.perf_counter() - t0:.1f}s")
+
+        run(connection, 'without indexes', args.repeat, args.limit)
+
+        t0 = time.perf_counter()
+        for statement in INDEXES:
+            connection.execute(text(statement))
+        connection.execute(text('ANALYZE bench_users'))
+        print(f"indexes built in {time.perf_counter() - t0:.1f}s")
+
+        run(connection, 'with pg_trgm / text_pattern_ops indexes', args.repeat, args.limit)
+        connection.rollback()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,24 @@
+"""add restaurants content_version
+
+Revision ID: 3c41a9e7d2b6
+Revises: edf21b758387
+Create Date: 2026-10-17 14:05:41.127305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c41a9e7d2b6'
+down_revision = 'edf21b758387'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('restaurants', sa.Column('content_version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    op.drop_column('restaurants', 'content_version')
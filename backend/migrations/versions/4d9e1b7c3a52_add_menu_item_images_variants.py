@@ -0,0 +1,25 @@
+"""add menu_item_images.variants
+
+Revision ID: 4d9e1b7c3a52
+Revises: b7d4e2a90c15
+Create Date: 2026-10-17 17:05:12.401877
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '4d9e1b7c3a52'
+down_revision = 'b7d4e2a90c15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('menu_item_images', sa.Column('variants', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade():
+    op.drop_column('menu_item_images', 'variants')
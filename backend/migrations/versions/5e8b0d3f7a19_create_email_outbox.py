@@ -0,0 +1,42 @@
+"""create email_outbox table
+
+Revision ID: 5e8b0d3f7a19
+Revises: 9a2f6c81e4d0
+Create Date: 2026-10-17 15:32:09.481263
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8b0d3f7a19'
+down_revision = '9a2f6c81e4d0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'email_outbox',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('to_email', sa.String(length=255), nullable=False),
+        sa.Column('subject', sa.String(length=255), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(length=20), server_default='pending', nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('next_attempt_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('sent_at', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'idx_email_outbox_due', 'email_outbox', ['next_attempt_at'], unique=False,
+        postgresql_where=sa.text("status IN ('pending', 'sending')")
+    )
+
+
+def downgrade():
+    op.drop_index('idx_email_outbox_due', table_name='email_outbox', postgresql_where=sa.text("status IN ('pending', 'sending')"))
+    op.drop_table('email_outbox')
@@ -0,0 +1,25 @@
+"""add user_addresses.user_id index
+
+Revision ID: 6f3b9d2e8a41
+Revises: c2a8f5e61d37
+Create Date: 2026-10-17 18:21:54.730318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6f3b9d2e8a41'
+down_revision = 'c2a8f5e61d37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # يدعم تحميل عناوين صفحة كاملة من المستخدمين باستعلام واحد
+    op.create_index(op.f('ix_user_addresses_user_id'), 'user_addresses', ['user_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_user_addresses_user_id'), table_name='user_addresses')
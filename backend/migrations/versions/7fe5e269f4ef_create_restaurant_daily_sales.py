@@ -0,0 +1,35 @@
+"""create restaurant_daily_sales rollup table
+
+Revision ID: 7fe5e269f4ef
+Revises: 83d6c5d9febc
+Create Date: 2026-10-17 11:26:54.871032
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7fe5e269f4ef'
+down_revision = '83d6c5d9febc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # جدول التجميع اليومي للمبيعات؛ يُملأ بعد الترحيل عبر: flask sales-rollup rebuild
+    op.create_table(
+        'restaurant_daily_sales',
+        sa.Column('restaurant_id', sa.Integer(), nullable=False),
+        sa.Column('sales_date', sa.Date(), nullable=False),
+        sa.Column('order_count', sa.Integer(), nullable=False),
+        sa.Column('gross_sales', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('item_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['restaurant_id'], ['restaurants.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('restaurant_id', 'sales_date')
+    )
+
+
+def downgrade():
+    op.drop_table('restaurant_daily_sales')
@@ -0,0 +1,27 @@
+"""add orders keyset pagination indexes
+
+Revision ID: 83d6c5d9febc
+Revises: bd92a6b75ae5
+Create Date: 2026-10-17 10:03:17.220945
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '83d6c5d9febc'
+down_revision = 'bd92a6b75ae5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # فهارس مركبة للترقيم بالمؤشر على (created_at, id) حتى تبقى الصفحات العميقة بسرعة الصفحة الأولى
+    op.create_index('idx_orders_user_created_at_id', 'orders', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('idx_orders_restaurant_created_at_id', 'orders', ['restaurant_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_orders_restaurant_created_at_id', table_name='orders')
+    op.drop_index('idx_orders_user_created_at_id', table_name='orders')
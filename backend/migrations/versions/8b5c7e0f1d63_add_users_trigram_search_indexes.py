@@ -0,0 +1,41 @@
+"""add pg_trgm search indexes on users
+
+Revision ID: 8b5c7e0f1d63
+Revises: 6f3b9d2e8a41
+Create Date: 2026-10-17 18:47:10.562184
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b5c7e0f1d63'
+down_revision = '6f3b9d2e8a41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # مطابقة جزئية (ILIKE '%q%') وترتيب بالتشابه في بحث الإدارة
+    op.create_index(
+        'idx_users_email_trgm', 'users', ['email'], unique=False,
+        postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'}
+    )
+    op.create_index(
+        'idx_users_phone_number_trgm', 'users', ['phone_number'], unique=False,
+        postgresql_using='gin', postgresql_ops={'phone_number': 'gin_trgm_ops'}
+    )
+    # البحث ببادئة رقم الهاتف (LIKE 'q%') بغض النظر عن ترتيب اللغة (collation) في القاعدة
+    op.create_index(
+        'idx_users_phone_number_prefix', 'users', ['phone_number'], unique=False,
+        postgresql_ops={'phone_number': 'text_pattern_ops'}
+    )
+
+
+def downgrade():
+    op.drop_index('idx_users_phone_number_prefix', table_name='users')
+    op.drop_index('idx_users_phone_number_trgm', table_name='users')
+    op.drop_index('idx_users_email_trgm', table_name='users')
+    # الإضافة pg_trgm تبقى لأن مخططات أخرى قد تعتمد عليها
@@ -0,0 +1,24 @@
+"""add restaurants menu_version
+
+Revision ID: 9a2f6c81e4d0
+Revises: 3c41a9e7d2b6
+Create Date: 2026-10-17 14:48:12.604117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a2f6c81e4d0'
+down_revision = '3c41a9e7d2b6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('restaurants', sa.Column('menu_version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    op.drop_column('restaurants', 'menu_version')
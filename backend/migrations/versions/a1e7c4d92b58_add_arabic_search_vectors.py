@@ -0,0 +1,57 @@
+"""add Arabic-normalized search_vector columns to restaurants and menu_items
+
+Revision ID: a1e7c4d92b58
+Revises: 8b5c7e0f1d63
+Create Date: 2026-10-17 19:14:02.318745
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1e7c4d92b58'
+down_revision = '8b5c7e0f1d63'
+branch_labels = None
+depends_on = None
+
+# نسخة ثابتة من app.utils.search.ARABIC_NORMALIZE_FUNCTION_SQL وقت إنشاء الترحيل
+ARABIC_NORMALIZE_FUNCTION = r"""
+CREATE OR REPLACE FUNCTION arabic_normalize(input text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT translate(lower(regexp_replace(coalesce(input, ''), '[\u064B-\u065F\u0670\u0640]', '', 'g')),
+                     'أإآٱؤئىة', 'ااااوييه')
+$$
+"""
+
+RESTAURANT_SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple', arabic_normalize(name)), 'A') || "
+    "setweight(to_tsvector('simple', arabic_normalize(description)), 'B') || "
+    "setweight(to_tsvector('simple', arabic_normalize(address)), 'C')"
+)
+MENU_ITEM_SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple', arabic_normalize(name)), 'A') || "
+    "setweight(to_tsvector('simple', arabic_normalize(description)), 'B')"
+)
+
+
+def upgrade():
+    op.execute(ARABIC_NORMALIZE_FUNCTION)
+    # أعمدة مولدة: تُحسب عند كل كتابة وتُملأ للصفوف الحالية أثناء الترحيل
+    op.add_column('restaurants', sa.Column(
+        'search_vector', postgresql.TSVECTOR(), sa.Computed(RESTAURANT_SEARCH_VECTOR, persisted=True), nullable=True
+    ))
+    op.add_column('menu_items', sa.Column(
+        'search_vector', postgresql.TSVECTOR(), sa.Computed(MENU_ITEM_SEARCH_VECTOR, persisted=True), nullable=True
+    ))
+    op.create_index('idx_restaurants_search_vector', 'restaurants', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('idx_menu_items_search_vector', 'menu_items', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('idx_menu_items_search_vector', table_name='menu_items', postgresql_using='gin')
+    op.drop_index('idx_restaurants_search_vector', table_name='restaurants', postgresql_using='gin')
+    op.drop_column('menu_items', 'search_vector')
+    op.drop_column('restaurants', 'search_vector')
+    op.execute('DROP FUNCTION IF EXISTS arabic_normalize(text)')
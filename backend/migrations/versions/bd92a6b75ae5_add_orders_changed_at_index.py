@@ -0,0 +1,30 @@
+"""add orders changed_at index
+
+Revision ID: bd92a6b75ae5
+Revises: 0ee8da2bc077
+Create Date: 2026-10-17 09:12:41.503218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'bd92a6b75ae5'
+down_revision = '0ee8da2bc077'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # فهرس لمزامنة طلبات البوابة: الطلبات التي أُنشئت أو تغيّرت بعد مؤشر معيّن
+    op.create_index(
+        'idx_orders_restaurant_changed_at',
+        'orders',
+        ['restaurant_id', sa.text('COALESCE(updated_at, created_at)')],
+        unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('idx_orders_restaurant_changed_at', table_name='orders')
@@ -0,0 +1,52 @@
+"""create restaurant_purges table
+
+Revision ID: c2a8f5e61d37
+Revises: 4d9e1b7c3a52
+Create Date: 2026-10-17 17:48:36.215904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2a8f5e61d37'
+down_revision = '4d9e1b7c3a52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'restaurant_purges',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('restaurant_id', sa.Integer(), nullable=False),
+        sa.Column('restaurant_name', sa.String(length=100), nullable=True),
+        sa.Column('requested_by', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(length=20), server_default='pending', nullable=False),
+        sa.Column('phase', sa.String(length=20), server_default='orders', nullable=False),
+        sa.Column('totals', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('deleted', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('pending_public_ids', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('lease_expires_at', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('finished_at', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['requested_by'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('restaurant_id')
+    )
+    # الحذف على دفعات يبحث عن الصفوف التابعة بمفاتيحها الخارجية، ولم تكن مفهرسة
+    op.create_index(op.f('ix_order_items_order_id'), 'order_items', ['order_id'], unique=False)
+    op.create_index(op.f('ix_order_items_menu_item_id'), 'order_items', ['menu_item_id'], unique=False)
+    op.create_index(op.f('ix_menu_item_images_menu_item_id'), 'menu_item_images', ['menu_item_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_menu_item_images_menu_item_id'), table_name='menu_item_images')
+    op.drop_index(op.f('ix_order_items_menu_item_id'), table_name='order_items')
+    op.drop_index(op.f('ix_order_items_order_id'), table_name='order_items')
+    op.drop_table('restaurant_purges')
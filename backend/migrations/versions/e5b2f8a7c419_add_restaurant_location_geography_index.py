@@ -0,0 +1,28 @@
+"""add geography GiST index on restaurants.location for nearest-restaurant queries
+
+Revision ID: e5b2f8a7c419
+Revises: a1e7c4d92b58
+Create Date: 2026-10-17 21:02:47.519203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b2f8a7c419'
+down_revision = 'a1e7c4d92b58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # فهرس تعبيري على geography(location): ترتيب KNN ونصف القطر بالأمتار بدل الدرجات المسطحة
+    op.create_index(
+        'idx_restaurants_location_geography', 'restaurants', [sa.text('geography(location)')],
+        unique=False, postgresql_using='gist'
+    )
+
+
+def downgrade():
+    op.drop_index('idx_restaurants_location_geography', table_name='restaurants', postgresql_using='gist')
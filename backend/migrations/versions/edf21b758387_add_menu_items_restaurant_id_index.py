@@ -0,0 +1,25 @@
+"""add menu_items restaurant_id index
+
+Revision ID: edf21b758387
+Revises: 7fe5e269f4ef
+Create Date: 2026-10-17 12:40:05.318826
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'edf21b758387'
+down_revision = '7fe5e269f4ef'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # يدعم عدّ عناصر القائمة في ملخص المطعم وجلب قائمة مطعم واحد
+    op.create_index(op.f('ix_menu_items_restaurant_id'), 'menu_items', ['restaurant_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_menu_items_restaurant_id'), table_name='menu_items')
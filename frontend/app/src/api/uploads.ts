@@ -0,0 +1,24 @@
+import axiosClient from './axiosClient';
+
+export interface UploadJob {
+  job_id: string;
+  kind: 'menu_item_image' | 'profile_image';
+  target_id: number;
+  filename: string | null;
+  status: 'pending' | 'running' | 'done' | 'failed';
+  url: string | null;
+  error: string | null;
+}
+
+// انتظار انتهاء مهمة رفع تعمل في الخلفية عبر الاستعلام الدوري عن حالتها
+export const waitForUploadJob = async (jobId: string, intervalMs = 1000, timeoutMs = 120000): Promise<UploadJob> => {
+  const deadline = Date.now() + timeoutMs;
+  while (true) {
+    const response = await axiosClient.get(`/uploads/${jobId}`);
+    const job: UploadJob = response.data.job;
+    if (job.status === 'done' || job.status === 'failed' || Date.now() > deadline) {
+      return job;
+    }
+    await new Promise(resolve => setTimeout(resolve, intervalMs));
+  }
+};
@@ -84,7 +84,7 @@ const RestaurantsManagementPage = () => {
         try {
           await axiosClient.post(`/admin/restaurants/${restaurantId}/force-delete`);
           toast.dismiss(loadingToast);
-          toast.success('تم حذف المطعم نهائياً.');
+          toast.success('بدأ الحذف النهائي للمطعم في الخلفية.');
           fetchRestaurants();
         } catch (error: any) {
           toast.dismiss(loadingToast);
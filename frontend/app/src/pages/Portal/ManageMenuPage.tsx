@@ -5,6 +5,7 @@ import toast from 'react-hot-toast';
 import { useForm, type SubmitHandler } from 'react-hook-form';
 import { zodResolver } from '@hookform/resolvers/zod';
 import axiosClient from '../../api/axiosClient';
+import { waitForUploadJob } from '../../api/uploads';
 import { useAuthStore } from '../../store/authStore';
 import type { MenuItem, MenuItemImage } from '../../types';
 import { menuItemSchema } from '../../schemas/authSchema';
@@ -121,13 +122,18 @@ const ManageMenuPage = () => {
       : axiosClient.post('/portal/menu', formData, { headers: { 'Content-Type': 'multipart/form-data' } });
 
     try {
-      await toast.promise(apiCall, {
+      const response = await toast.promise(apiCall, {
         loading: editingItem ? 'جارٍ تحديث العنصر...' : 'جارٍ إضافة العنصر...',
         success: `تم ${editingItem ? 'تحديث' : 'إضافة'} العنصر بنجاح!`,
         error: `فشل ${editingItem ? 'تحديث' : 'إضافة'} العنصر.`,
       });
       fetchMenu();
       handleCloseModal();
+      // الصور تُرفع في الخلفية؛ نعيد جلب القائمة عند اكتمالها
+      const pendingImages: { job_id: string }[] = response.data?.pending_images ?? [];
+      if (pendingImages.length > 0) {
+        Promise.all(pendingImages.map(job => waitForUploadJob(job.job_id))).then(() => fetchMenu());
+      }
     } catch (error) {
       // Toast handles error
     }
@@ -1,4 +1,4 @@
-import { useEffect, useState, useCallback } from 'react';
+import { useEffect, useState, useCallback, useRef } from 'react';
 import { motion } from 'framer-motion';
 import toast from 'react-hot-toast';
 import axiosClient from '../../api/axiosClient';
@@ -11,13 +11,28 @@ const PortalOrdersPage = () => {
   const [orders, setOrders] = useState<Order[]>([]);
   const [isLoading, setIsLoading] = useState(true);
   const addOrdersToQueue = useNewOrderStore(state => state.addOrdersToQueue);
+  // مؤشر المزامنة: يجلب الخادم فقط الطلبات التي أُنشئت أو تغيّرت منذ آخر استعلام
+  const syncCursorRef = useRef<string | null>(null);
 
   const fetchOrders = useCallback(async (isInitialLoad = false) => {
-    if (isInitialLoad) setIsLoading(true);
+    if (isInitialLoad) {
+      setIsLoading(true);
+      syncCursorRef.current = null;
+    }
     try {
-      const response = await axiosClient.get('/portal/orders');
-      setOrders(response.data);
-      const pendingOrders = response.data.filter((o: Order) => o.status === 'pending');
+      const params = syncCursorRef.current ? { cursor: syncCursorRef.current } : { sync: 1 };
+      const response = await axiosClient.get('/portal/orders', { params });
+      const changedOrders: Order[] = response.data.orders;
+      const isFullSync: boolean = response.data.full_sync;
+      syncCursorRef.current = response.data.cursor;
+
+      setOrders(prevOrders => {
+        if (isFullSync) return changedOrders;
+        const changedIds = new Set(changedOrders.map(o => o.id));
+        return [...changedOrders, ...prevOrders.filter(o => !changedIds.has(o.id))]
+          .sort((a, b) => new Date(b.created_at).getTime() - new Date(a.created_at).getTime());
+      });
+      const pendingOrders = changedOrders.filter(o => o.status === 'pending');
       addOrdersToQueue(pendingOrders);
     } catch (error) {
       toast.error('فشل في جلب الطلبات.');
@@ -8,6 +8,7 @@ import { Link } from 'react-router-dom';
 import { useAuthStore } from '../../store/authStore';
 import { updateProfileSchema, type UpdateProfileFormInputs } from '../../schemas/authSchema';
 import axiosClient from '../../api/axiosClient';
+import { waitForUploadJob } from '../../api/uploads';
 import Input from '../../components/common/Input';
 import Button from '../../components/common/Button';
 
@@ -54,13 +55,19 @@ const ProfilePage = () => {
       const response = await axiosClient.put('/users/me', formData, {
         headers: { 'Content-Type': 'multipart/form-data' },
       });
-      const { user: updatedUserData } = response.data;
-      updateUser(updatedUserData);
+      const { user: updatedUserData, pending_upload } = response.data;
+      // الصورة تُرفع في الخلفية؛ ننتظر انتهاء المهمة ثم نجلب البيانات المحدثة
+      const job = pending_upload ? await waitForUploadJob(pending_upload.job_id) : null;
+      if (job && job.status !== 'done') {
+        throw new Error(job.error || 'فشل تحديث الصورة.');
+      }
+      const refreshed = job ? (await axiosClient.get('/users/me')).data.user : updatedUserData;
+      updateUser(refreshed);
       toast.dismiss(loadingToast);
       toast.success('تم تحديث الصورة بنجاح!');
     } catch (err: any) {
       toast.dismiss(loadingToast);
-      toast.error(err.response?.data?.message || 'فشل تحديث الصورة.');
+      toast.error(err.response?.data?.message || err.message || 'فشل تحديث الصورة.');
     }
   };
   
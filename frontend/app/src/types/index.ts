@@ -31,6 +31,7 @@ export interface Restaurant {
   manager_id: number;
   created_at: string | null;
   updated_at: string | null;
+  item_count?: number;
 }
 
 export interface MenuItemImage {
@@ -38,6 +39,16 @@ export interface MenuItemImage {
     image_url: string;
 }
 
+export interface ImageVariant {
+  width: number;
+  height: number;
+  webp: string;
+  jpeg: string;
+}
+
+// النسخ المصغرة للصورة؛ null حتى ينتهي توليدها أو للصور المرفوعة إلى Cloudinary
+export type ImageVariants = Record<'thumbnail' | 'card' | 'full', ImageVariant> | null;
+
 export interface MenuItem {
   id: number;
   restaurant_id: number;
@@ -46,6 +57,7 @@ export interface MenuItem {
   price: string;
   is_available: boolean;
   images?: MenuItemImage[];
+  image_variants?: ImageVariants[];
   removable_ingredients?: string[];
 }
 
@@ -70,6 +82,7 @@ export interface OrderItem {
   excluded_ingredients?: string[];
   notes?: string;
   menu_item_image_url?: string;
+  menu_item_image_variants?: ImageVariants;
   images?: string[];
 }
 